@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import BackgroundJob, StorageDeletion
 
-# Register your models here.
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_after", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("created_at", "finished_at", "locked_at")
+
+
+@admin.register(StorageDeletion)
+class StorageDeletionAdmin(admin.ModelAdmin):
+    list_display = ("name", "attempts", "run_after", "created_at")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("created_at", "locked_at", "lock_id")
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        # Registrar las tareas en segundo plano declaradas en el módulo jobs.py de cada app
+        autodiscover_modules("jobs")
+
+        from . import checks  # noqa: F401
@@ -0,0 +1,22 @@
+"""
+Verificaciones de configuración (`python manage.py check`, también al iniciar
+runserver y migrate).
+"""
+
+from django.core.checks import Error, register
+
+from .jobs import get_jobs_setting
+from .spool import SPOOL_DIR_REQUIRED
+
+
+@register()
+def check_spool_dir(app_configs, **kwargs):
+    if get_jobs_setting("ALWAYS_EAGER") or get_jobs_setting("SPOOL_DIR"):
+        return []
+    return [
+        Error(
+            SPOOL_DIR_REQUIRED,
+            hint="Definir BACKGROUND_JOBS_SPOOL_DIR con un directorio compartido.",
+            id="core.E001",
+        )
+    ]
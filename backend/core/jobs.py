@@ -0,0 +1,194 @@
+"""
+Tareas en segundo plano sin broker externo.
+
+Las tareas se declaran con el decorador `@job` en el módulo `jobs.py` de cada app y
+se encolan con `enqueue`, que inserta una fila `BackgroundJob` en la misma
+transacción que la operación que la origina. El comando `python manage.py run_jobs`
+las ejecuta, reintentando con espera exponencial las que fallan, y
+`python manage.py prune_jobs` elimina las terminadas hace más de los días de retención.
+
+Con BACKGROUND_JOBS["ALWAYS_EAGER"] las tareas se ejecutan en el mismo proceso al
+confirmarse la transacción (útil en desarrollo, sin worker).
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger("core")
+
+DEFAULT_SETTINGS = {
+    "ALWAYS_EAGER": False,
+    "MAX_ATTEMPTS": 3,
+    "RETRY_BACKOFF": 10,
+    "LOCK_TIMEOUT": 10 * 60,
+    "SPOOL_DIR": None,
+    "DONE_RETENTION_DAYS": 7,
+    "FAILED_RETENTION_DAYS": 30,
+}
+
+_registry = {}
+
+
+def get_jobs_setting(name):
+    return getattr(settings, "BACKGROUND_JOBS", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class RegisteredJob:
+    def __init__(self, name, func, on_failure=None):
+        self.name = name
+        self.func = func
+        self.on_failure = on_failure
+
+    def run(self, payload):
+        return self.func(**payload)
+
+    def fail(self, payload, error):
+        """Se llama cuando la tarea agotó sus intentos"""
+        if self.on_failure:
+            self.on_failure(error=error, **payload)
+
+
+def job(name, on_failure=None):
+    """
+    Registra una función como tarea en segundo plano.
+
+    Args:
+        name (str): Nombre único de la tarea (p. ej. "posts.process_post_image")
+        on_failure: Función opcional llamada con los mismos argumentos y `error`
+            cuando la tarea agota sus intentos
+    """
+
+    def decorator(func):
+        if name in _registry:
+            raise ValueError(f"La tarea '{name}' ya está registrada")
+        _registry[name] = RegisteredJob(name, func, on_failure)
+        return func
+
+    return decorator
+
+
+def get_job(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"La tarea '{name}' no está registrada")
+
+
+def enqueue(name, max_attempts=None, **payload):
+    """
+    Encola una tarea. Los argumentos deben ser serializables a JSON.
+
+    Returns:
+        BackgroundJob: La tarea creada, o None si se ejecuta en el momento (ALWAYS_EAGER)
+    """
+    registered = get_job(name)
+
+    if get_jobs_setting("ALWAYS_EAGER"):
+        transaction.on_commit(lambda: _run_eager(registered, payload))
+        return None
+
+    return BackgroundJob.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts or get_jobs_setting("MAX_ATTEMPTS"),
+    )
+
+
+def _run_eager(registered, payload):
+    try:
+        registered.run(payload)
+    except Exception as e:
+        logger.error(f"Error en la tarea {registered.name}: {str(e)}")
+        registered.fail(payload, e)
+
+
+def requeue_stale_jobs():
+    """
+    Devuelve a pendientes las tareas que quedaron "en ejecución" más de LOCK_TIMEOUT
+    segundos (p. ej. porque el worker se detuvo a mitad de la tarea).
+
+    Returns:
+        int: Cantidad de tareas reencoladas
+    """
+    limit = timezone.now() - timedelta(seconds=get_jobs_setting("LOCK_TIMEOUT"))
+    return BackgroundJob.objects.filter(
+        status=BackgroundJob.STATUS_RUNNING, locked_at__lt=limit
+    ).update(status=BackgroundJob.STATUS_PENDING, locked_at=None)
+
+
+def claim_next_job(candidates=10):
+    """
+    Toma la próxima tarea pendiente. La toma es un UPDATE condicionado al estado,
+    por lo que varios workers pueden competir sin ejecutar dos veces la misma tarea.
+
+    Returns:
+        BackgroundJob: La tarea tomada, o None si no hay tareas disponibles
+    """
+    now = timezone.now()
+    ids = list(
+        BackgroundJob.objects.filter(status=BackgroundJob.STATUS_PENDING, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:candidates]
+    )
+    for job_id in ids:
+        claimed = BackgroundJob.objects.filter(
+            id=job_id, status=BackgroundJob.STATUS_PENDING
+        ).update(
+            status=BackgroundJob.STATUS_RUNNING,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(background_job):
+    """
+    Ejecuta una tarea ya tomada y registra el resultado.
+
+    Returns:
+        bool: True si la tarea terminó correctamente
+    """
+    try:
+        registered = get_job(background_job.name)
+        registered.run(background_job.payload)
+    except Exception as e:
+        logger.error(
+            f"Error en la tarea {background_job.name} #{background_job.pk} "
+            f"(intento {background_job.attempts}/{background_job.max_attempts}): {str(e)}"
+        )
+        background_job.last_error = str(e)
+        background_job.locked_at = None
+
+        if background_job.attempts >= background_job.max_attempts:
+            background_job.status = BackgroundJob.STATUS_FAILED
+            background_job.finished_at = timezone.now()
+            background_job.save(update_fields=["status", "last_error", "locked_at", "finished_at"])
+            try:
+                get_job(background_job.name).fail(background_job.payload, e)
+            except Exception as failure_error:
+                logger.error(
+                    f"Error al marcar como fallida la tarea #{background_job.pk}: "
+                    f"{str(failure_error)}"
+                )
+        else:
+            # Espera exponencial: RETRY_BACKOFF, 2×RETRY_BACKOFF, 4×RETRY_BACKOFF...
+            delay = get_jobs_setting("RETRY_BACKOFF") * 2 ** (background_job.attempts - 1)
+            background_job.status = BackgroundJob.STATUS_PENDING
+            background_job.run_after = timezone.now() + timedelta(seconds=delay)
+            background_job.save(update_fields=["status", "last_error", "locked_at", "run_after"])
+        return False
+
+    background_job.status = BackgroundJob.STATUS_DONE
+    background_job.locked_at = None
+    background_job.finished_at = timezone.now()
+    background_job.save(update_fields=["status", "locked_at", "finished_at"])
+    return True
@@ -0,0 +1,66 @@
+"""
+Worker de la cola de eliminación de archivos del storage (ver core/storage_deletions.py).
+
+Se ejecuta como un proceso aparte de los workers web:
+    python manage.py drain_storage_deletions
+o para vaciar la cola y terminar (p. ej. desde cron):
+    python manage.py drain_storage_deletions --once
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.storage_deletions import drain_storage_deletions
+
+
+class Command(BaseCommand):
+    help = "Elimina por lotes los archivos pendientes de la cola de eliminación del storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa los archivos disponibles y termina.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Cantidad de archivos por lote (por defecto STORAGE_DELETIONS['BATCH_SIZE']).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5.0,
+            help="Segundos de espera cuando la cola está vacía (por defecto 5).",
+        )
+
+    def handle(self, *args, **options):
+        total_deleted = 0
+        total_failed = 0
+
+        try:
+            while True:
+                started = time.monotonic()
+                deleted, failed = drain_storage_deletions(options["batch_size"])
+                if not deleted and not failed:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                total_deleted += deleted
+                total_failed += failed
+                self.stdout.write(
+                    f"Lote: {deleted} eliminados, {failed} reprogramados "
+                    f"en {time.monotonic() - started:.2f}s"
+                )
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_deleted} archivos eliminados, {total_failed} reintentos programados"
+            )
+        )
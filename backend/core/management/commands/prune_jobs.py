@@ -0,0 +1,129 @@
+"""
+Elimina las tareas en segundo plano terminadas (ver core/jobs.py): las completadas
+con más de BACKGROUND_JOBS["DONE_RETENTION_DAYS"] días desde su fin y las fallidas
+con más de BACKGROUND_JOBS["FAILED_RETENTION_DAYS"], que se conservan más tiempo
+para poder revisar `last_error`. Las pendientes y en ejecución no se tocan.
+
+El borrado se hace por lotes cortos (una transacción por lote) con una pausa entre
+lotes, para poder ejecutarlo con tráfico (p. ej. desde cron):
+    python manage.py prune_jobs --batch-size 1000 --sleep 0.1
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.jobs import get_jobs_setting
+from core.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = "Elimina por lotes las tareas en segundo plano terminadas hace tiempo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--done-days",
+            type=int,
+            default=None,
+            help="Días de retención de las tareas completadas "
+            "(por defecto BACKGROUND_JOBS['DONE_RETENTION_DAYS']).",
+        )
+        parser.add_argument(
+            "--failed-days",
+            type=int,
+            default=None,
+            help="Días de retención de las tareas fallidas "
+            "(por defecto BACKGROUND_JOBS['FAILED_RETENTION_DAYS']).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de tareas eliminadas por lote (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Segundos de pausa entre lotes (por defecto 0.1).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa cuántas tareas se eliminarían.",
+        )
+
+    def handle(self, *args, **options):
+        done_days = options["done_days"]
+        if done_days is None:
+            done_days = get_jobs_setting("DONE_RETENTION_DAYS")
+        failed_days = options["failed_days"]
+        if failed_days is None:
+            failed_days = get_jobs_setting("FAILED_RETENTION_DAYS")
+        self.batch_size = options["batch_size"]
+        self.sleep = options["sleep"]
+        self.batches = 0
+        started = time.monotonic()
+
+        # Fijar los cortes al inicio para que la ejecución termine aunque sigan terminando
+        now = timezone.now()
+        done = BackgroundJob.objects.filter(
+            status=BackgroundJob.STATUS_DONE, finished_at__lt=now - timedelta(days=done_days)
+        )
+        failed = BackgroundJob.objects.filter(
+            status=BackgroundJob.STATUS_FAILED, finished_at__lt=now - timedelta(days=failed_days)
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Se eliminarían {done.count()} tareas completadas hace más de {done_days} días "
+                f"y {failed.count()} fallidas hace más de {failed_days} días"
+            )
+            return
+
+        total_done = self.prune(done)
+        total_failed = self.prune(failed)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_done} tareas completadas y {total_failed} fallidas eliminadas "
+                f"en {self.batches} lotes ({elapsed:.2f}s)"
+            )
+        )
+
+    def prune(self, finished):
+        total = 0
+        last = None
+        while True:
+            batch = finished.order_by("finished_at", "id")
+            if last is not None:
+                batch = batch.filter(
+                    Q(finished_at__gt=last[0]) | Q(finished_at=last[0], id__gt=last[1])
+                )
+            rows = list(batch.values_list("id", "finished_at")[: self.batch_size])
+            if not rows:
+                break
+
+            batch_started = time.monotonic()
+            with transaction.atomic():
+                # Se vuelve a aplicar el filtro: una tarea reencolada desde el admin
+                # después de leer el lote ya no está terminada y se conserva
+                deleted, _ = finished.filter(id__in=[row_id for row_id, _ in rows]).delete()
+
+            total += deleted
+            self.batches += 1
+            self.stdout.write(
+                f"Lote {self.batches}: {deleted} tareas en {time.monotonic() - batch_started:.2f}s"
+            )
+
+            last = (rows[-1][1], rows[-1][0])
+            if len(rows) < self.batch_size:
+                break
+            if self.sleep:
+                time.sleep(self.sleep)
+        return total
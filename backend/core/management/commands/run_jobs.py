@@ -0,0 +1,65 @@
+"""
+Worker de tareas en segundo plano (ver core/jobs.py).
+
+Se ejecuta como un proceso aparte de los workers web:
+    python manage.py run_jobs
+o para procesar lo pendiente y terminar (p. ej. desde cron):
+    python manage.py run_jobs --once
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Ejecuta las tareas en segundo plano pendientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa las tareas disponibles y termina.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Segundos de espera cuando no hay tareas (por defecto 1).",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=None,
+            help="Cantidad máxima de tareas a ejecutar antes de terminar.",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"{requeued} tareas colgadas devueltas a pendientes")
+
+        try:
+            while options["max_jobs"] is None or processed < options["max_jobs"]:
+                background_job = claim_next_job()
+                if background_job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    requeue_stale_jobs()
+                    continue
+
+                started = time.monotonic()
+                ok = run_job(background_job)
+                processed += 1
+                self.stdout.write(
+                    f"{background_job.name} #{background_job.pk}: "
+                    f"{'ok' if ok else 'error'} en {time.monotonic() - started:.2f}s"
+                )
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{processed} tareas ejecutadas"))
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="BackgroundJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="Nombre de la tarea")),
+                ("payload", models.JSONField(blank=True, default=dict, verbose_name="Argumentos")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("running", "En ejecución"),
+                            ("done", "Completada"),
+                            ("failed", "Fallida"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Estado",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(default=3, verbose_name="Intentos máximos"),
+                ),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Ejecutar después de"
+                    ),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Tomada en"),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Último error")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Fecha de fin"),
+                ),
+            ],
+            options={
+                "verbose_name": "Tarea en segundo plano",
+                "verbose_name_plural": "Tareas en segundo plano",
+                "ordering": ["run_after", "id"],
+                "indexes": [
+                    models.Index(fields=["status", "run_after"], name="job_status_run_after_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StorageDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Nombre del archivo"
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0, verbose_name="Intentos")),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Eliminar después de"
+                    ),
+                ),
+                ("lock_id", models.UUIDField(blank=True, null=True, verbose_name="Lote")),
+                (
+                    "locked_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Tomado en"),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Último error")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación"),
+                ),
+            ],
+            options={
+                "verbose_name": "Eliminación pendiente del storage",
+                "verbose_name_plural": "Eliminaciones pendientes del storage",
+                "ordering": ["run_after", "id"],
+                "indexes": [
+                    models.Index(fields=["run_after"], name="storage_deletion_run_after_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_storagedeletion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="backgroundjob",
+            index=models.Index(fields=["status", "finished_at"], name="job_status_finished_at_idx"),
+        ),
+    ]
@@ -1,3 +1,77 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class BackgroundJob(models.Model):
+    """
+    Tarea en segundo plano guardada en la base de datos.
+    Se encola con `core.jobs.enqueue` y la ejecuta el comando `run_jobs`.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pendiente"),
+        (STATUS_RUNNING, "En ejecución"),
+        (STATUS_DONE, "Completada"),
+        (STATUS_FAILED, "Fallida"),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Nombre de la tarea")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Argumentos")
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Estado",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="Intentos máximos")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Ejecutar después de")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Tomada en")
+    last_error = models.TextField(blank=True, verbose_name="Último error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de fin")
+
+    class Meta:
+        verbose_name = "Tarea en segundo plano"
+        verbose_name_plural = "Tareas en segundo plano"
+        ordering = ["run_after", "id"]
+        indexes = [
+            # El worker busca las tareas pendientes cuyo run_after ya pasó
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+            # `prune_jobs` recorre las terminadas por fecha de fin
+            models.Index(fields=["status", "finished_at"], name="job_status_finished_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class StorageDeletion(models.Model):
+    """
+    Archivo del storage pendiente de eliminar. Se agrega con
+    `core.storage_deletions.schedule_deletion` y lo elimina el comando
+    `drain_storage_deletions`, que reintenta los borrados que fallan.
+    """
+
+    name = models.CharField(max_length=255, unique=True, verbose_name="Nombre del archivo")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Eliminar después de")
+    lock_id = models.UUIDField(null=True, blank=True, verbose_name="Lote")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Tomado en")
+    last_error = models.TextField(blank=True, verbose_name="Último error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+
+    class Meta:
+        verbose_name = "Eliminación pendiente del storage"
+        verbose_name_plural = "Eliminaciones pendientes del storage"
+        ordering = ["run_after", "id"]
+        indexes = [
+            models.Index(fields=["run_after"], name="storage_deletion_run_after_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,65 @@
+"""
+Directorio local donde se dejan los archivos subidos hasta que una tarea en segundo
+plano los procesa y los guarda en el storage definitivo.
+
+El directorio (BACKGROUND_JOBS["SPOOL_DIR"]) debe ser compartido entre los procesos
+web y el worker `run_jobs`.
+"""
+
+import os
+import tempfile
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .jobs import get_jobs_setting
+
+SPOOL_DIR_REQUIRED = (
+    'BACKGROUND_JOBS["SPOOL_DIR"] es obligatorio cuando ALWAYS_EAGER es False: el worker '
+    "run_jobs debe leer los archivos del mismo directorio que los procesos web."
+)
+
+
+def get_spool_dir():
+    """
+    Directorio de spool. Sin SPOOL_DIR solo se admite el directorio temporal local
+    cuando las tareas se ejecutan en el mismo proceso (ALWAYS_EAGER).
+    """
+    spool_dir = get_jobs_setting("SPOOL_DIR")
+    if not spool_dir:
+        if not get_jobs_setting("ALWAYS_EAGER"):
+            raise ImproperlyConfigured(SPOOL_DIR_REQUIRED)
+        spool_dir = os.path.join(tempfile.gettempdir(), "focusapp-spool")
+    os.makedirs(spool_dir, exist_ok=True)
+    return str(spool_dir)
+
+
+def save_to_spool(uploaded_file, data=None):
+    """
+    Copia un archivo subido al directorio de spool.
+
+    Args:
+        uploaded_file: Archivo subido
+        data (bytes): Contenido del archivo si ya se leyó (evita volver a leerlo)
+
+    Returns:
+        str: Ruta absoluta del archivo en el spool
+    """
+    _, extension = os.path.splitext(uploaded_file.name or "")
+    path = os.path.join(get_spool_dir(), f"{uuid.uuid4().hex}{extension.lower()}")
+
+    with open(path, "wb") as destination:
+        if data is not None:
+            destination.write(data)
+        else:
+            uploaded_file.seek(0)
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+    return path
+
+
+def remove_from_spool(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
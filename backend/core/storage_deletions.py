@@ -0,0 +1,146 @@
+"""
+Eliminación diferida y por lotes de archivos del storage.
+
+Borrar un post o una foto de perfil no llama al storage durante la request:
+`schedule_deletion` inserta los nombres de los archivos en `StorageDeletion` (en la
+misma transacción que la operación que los origina, así que si ésta se revierte los
+archivos no se eliminan). El comando `python manage.py drain_storage_deletions` los
+elimina por lotes y reintenta con espera exponencial los que fallan, en lugar de
+dejar archivos huérfanos.
+
+Con BACKGROUND_JOBS["ALWAYS_EAGER"] (ver core/jobs.py) la cola se procesa en el mismo
+proceso al confirmarse la transacción.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .jobs import get_jobs_setting
+from .models import StorageDeletion
+
+logger = logging.getLogger("core")
+
+DEFAULT_SETTINGS = {
+    "BATCH_SIZE": 100,
+    "RETRY_BACKOFF": 30,
+    "MAX_BACKOFF": 60 * 60,
+    "LOCK_TIMEOUT": 10 * 60,
+}
+
+
+def get_deletions_setting(name):
+    return getattr(settings, "STORAGE_DELETIONS", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def schedule_deletion(*names):
+    """
+    Agrega archivos a la cola de eliminación con un único INSERT. Los nombres vacíos
+    se ignoran y los que ya estaban en la cola no se duplican.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+
+    StorageDeletion.objects.bulk_create(
+        [StorageDeletion(name=name) for name in names], ignore_conflicts=True
+    )
+
+    if get_jobs_setting("ALWAYS_EAGER"):
+        transaction.on_commit(drain_storage_deletions)
+
+
+def claim_deletions(batch_size):
+    """
+    Toma un lote de archivos cuya eliminación ya corresponde. La toma es un UPDATE
+    condicionado, por lo que varios workers pueden competir sin tomar el mismo archivo.
+
+    Returns:
+        list: Las filas StorageDeletion tomadas
+    """
+    now = timezone.now()
+    available = Q(locked_at__isnull=True) | Q(
+        locked_at__lt=now - timedelta(seconds=get_deletions_setting("LOCK_TIMEOUT"))
+    )
+    ids = list(
+        StorageDeletion.objects.filter(available, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    lock_id = uuid.uuid4()
+    StorageDeletion.objects.filter(available, id__in=ids).update(
+        lock_id=lock_id, locked_at=now, attempts=F("attempts") + 1
+    )
+    return list(StorageDeletion.objects.filter(lock_id=lock_id))
+
+
+def delete_files(names):
+    """
+    Elimina archivos del storage. Usa `delete_many` si el storage lo ofrece (una sola
+    petición por lote en GCS); si no, los elimina de a uno.
+
+    Returns:
+        dict: {nombre: error} de los archivos que no se pudieron eliminar
+    """
+    if hasattr(default_storage, "delete_many"):
+        return default_storage.delete_many(names)
+
+    failed = {}
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            failed[name] = str(e)
+    return failed
+
+
+def drain_storage_deletions(batch_size=None):
+    """
+    Procesa un lote de la cola: elimina los archivos del storage, borra de la cola los
+    que se eliminaron y reprograma los que fallaron.
+
+    Returns:
+        tuple: (eliminados, fallidos)
+    """
+    deletions = claim_deletions(batch_size or get_deletions_setting("BATCH_SIZE"))
+    if not deletions:
+        return 0, 0
+
+    try:
+        failed = delete_files([deletion.name for deletion in deletions])
+    except Exception as e:
+        failed = {deletion.name: str(e) for deletion in deletions}
+
+    StorageDeletion.objects.filter(
+        id__in=[deletion.id for deletion in deletions if deletion.name not in failed]
+    ).delete()
+
+    now = timezone.now()
+    for deletion in deletions:
+        if deletion.name not in failed:
+            continue
+        delay = min(
+            get_deletions_setting("RETRY_BACKOFF") * 2 ** (deletion.attempts - 1),
+            get_deletions_setting("MAX_BACKOFF"),
+        )
+        StorageDeletion.objects.filter(id=deletion.id).update(
+            lock_id=None,
+            locked_at=None,
+            run_after=now + timedelta(seconds=delay),
+            last_error=failed[deletion.name],
+        )
+        logger.warning(
+            f"No se pudo eliminar {deletion.name} del storage "
+            f"(intento {deletion.attempts}): {failed[deletion.name]}"
+        )
+
+    return len(deletions) - len(failed), len(failed)
@@ -1,3 +1,107 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import BackgroundJob, StorageDeletion
+from .storage_deletions import drain_storage_deletions, schedule_deletion
+
+TEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(BACKGROUND_JOBS={"DONE_RETENTION_DAYS": 7, "FAILED_RETENTION_DAYS": 30})
+class PruneJobsTests(TestCase):
+    def create_job(self, status, days_ago=None):
+        finished_at = None if days_ago is None else timezone.now() - timedelta(days=days_ago)
+        return BackgroundJob.objects.create(name="tarea", status=status, finished_at=finished_at)
+
+    def prune(self, **options):
+        call_command("prune_jobs", sleep=0, stdout=io.StringIO(), **options)
+        return set(BackgroundJob.objects.values_list("pk", flat=True))
+
+    def test_prunes_finished_jobs_after_retention(self):
+        old_done = self.create_job(BackgroundJob.STATUS_DONE, days_ago=10)
+        recent_done = self.create_job(BackgroundJob.STATUS_DONE, days_ago=1)
+        old_failed = self.create_job(BackgroundJob.STATUS_FAILED, days_ago=40)
+        recent_failed = self.create_job(BackgroundJob.STATUS_FAILED, days_ago=10)
+        pending = self.create_job(BackgroundJob.STATUS_PENDING)
+        running = self.create_job(BackgroundJob.STATUS_RUNNING)
+
+        remaining = self.prune(batch_size=1)
+
+        self.assertEqual(remaining, {recent_done.pk, recent_failed.pk, pending.pk, running.pk})
+        self.assertFalse(BackgroundJob.objects.filter(pk__in=[old_done.pk, old_failed.pk]))
+
+    def test_options_override_settings(self):
+        done = self.create_job(BackgroundJob.STATUS_DONE, days_ago=3)
+        self.create_job(BackgroundJob.STATUS_FAILED, days_ago=3)
+
+        self.assertEqual(self.prune(done_days=5, failed_days=2), {done.pk})
+
+    def test_dry_run_deletes_nothing(self):
+        job = self.create_job(BackgroundJob.STATUS_DONE, days_ago=10)
+        stdout = io.StringIO()
+
+        call_command("prune_jobs", dry_run=True, stdout=stdout)
+
+        self.assertIn("Se eliminarían 1 tareas completadas", stdout.getvalue())
+        self.assertTrue(BackgroundJob.objects.filter(pk=job.pk).exists())
+
+
+@override_settings(
+    STORAGES=TEST_STORAGES,
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    BACKGROUND_JOBS={"ALWAYS_EAGER": False},
+    STORAGE_DELETIONS={"BATCH_SIZE": 10, "RETRY_BACKOFF": 30},
+)
+class StorageDeletionTests(TestCase):
+    def scheduled(self):
+        return set(StorageDeletion.objects.values_list("name", flat=True))
+
+    def test_schedule_ignores_empty_and_repeated_names(self):
+        schedule_deletion("posts/a.jpg", "", None, "posts/a.jpg")
+        schedule_deletion("posts/a.jpg", "posts/b.jpg")
+        self.assertEqual(self.scheduled(), {"posts/a.jpg", "posts/b.jpg"})
+
+    def test_rolled_back_transaction_schedules_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            schedule_deletion("posts/a.jpg")
+            raise RuntimeError("Se revierte la operación")
+        self.assertEqual(self.scheduled(), set())
+
+    def test_drain_deletes_files_and_queue_rows(self):
+        names = [default_storage.save(f"posts/{i}.jpg", ContentFile(b"imagen")) for i in range(3)]
+        schedule_deletion(*names)
+
+        self.assertEqual(drain_storage_deletions(), (3, 0))
+        self.assertEqual(self.scheduled(), set())
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        self.assertEqual(drain_storage_deletions(), (0, 0))
+
+    def test_failed_deletion_is_rescheduled(self):
+        schedule_deletion("posts/a.jpg", "posts/b.jpg")
+        failed = {"posts/b.jpg": "Permiso denegado"}
+        with (
+            mock.patch("core.storage_deletions.delete_files", return_value=failed),
+            self.assertLogs("core", "WARNING"),
+        ):
+            self.assertEqual(drain_storage_deletions(), (1, 1))
+
+        deletion = StorageDeletion.objects.get()
+        self.assertEqual(deletion.name, "posts/b.jpg")
+        self.assertEqual(deletion.attempts, 1)
+        self.assertEqual(deletion.last_error, "Permiso denegado")
+        self.assertIsNone(deletion.locked_at)
+        self.assertGreater(deletion.run_after, timezone.now() + timedelta(seconds=20))
+        # Hasta que pase la espera no se vuelve a intentar
+        self.assertEqual(drain_storage_deletions(), (0, 0))
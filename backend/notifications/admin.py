@@ -4,7 +4,7 @@ from .models import Notification
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ("recipient", "actor", "type", "target", "is_read", "created_at")
+    list_display = ("recipient", "actor", "type", "target", "actor_count", "is_read", "updated_at")
     list_filter = ("is_read", "recipient")
     search_fields = ("recipient__username", "actor__username", "target__title")
-    ordering = ("-created_at",)
+    ordering = ("-updated_at",)
@@ -0,0 +1,105 @@
+"""
+Stream de notificaciones en tiempo real con Server-Sent Events.
+
+Reemplaza el polling de `count/` y `unread/`: el cliente abre una conexión y recibe
+los eventos de notifications/events.py ("notification" y "unread_count") a medida que
+ocurren. La autenticación se hace una sola vez al conectar, con el encabezado
+Authorization o, desde EventSource (que no permite enviar encabezados), con un ticket
+de un solo uso en `?ticket=` (ver notifications/stream_tickets.py).
+
+Es una vista async de Django: bajo ASGI cada conexión abierta espera eventos sin
+ocupar un hilo del servidor (ver posts/async_views.py). Cada HEARTBEAT segundos se
+envía un comentario para mantener viva la conexión a través de proxies, y se cierra
+al vencer el token o a los MAX_DURATION segundos; EventSource reconecta solo.
+"""
+
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+
+from posts.async_views import sse_event
+from users.authentication import BlacklistCheckingJWTAuthentication
+from users.models import AppUser
+from .broker import SubscriptionClosed, get_broker, get_stream_setting
+from .events import count_unread
+from .stream_tickets import redeem_ticket
+
+logger = logging.getLogger("notifications")
+
+
+def authenticate(request):
+    """
+    Returns:
+        tuple: (usuario, vencimiento de la sesión en epoch), o None si las credenciales
+            no son válidas
+    """
+    ticket = request.GET.get("ticket")
+    if ticket:
+        data = redeem_ticket(ticket)
+        if data is None:
+            return None
+        user = AppUser.objects.filter(pk=data["user_id"], is_active=True).first()
+        return (user, data["expires_at"]) if user else None
+
+    try:
+        auth = BlacklistCheckingJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, TokenError):
+        return None
+    if auth is None:
+        return None
+    user, validated_token = auth
+    return user, validated_token["exp"]
+
+
+@require_GET
+async def notification_stream(request):
+    """
+    Stream SSE de las notificaciones del usuario autenticado
+    """
+    auth = await sync_to_async(authenticate)(request)
+    if auth is None:
+        return JsonResponse(
+            {"success": False, "message": "Credenciales de autenticación no válidas"},
+            status=401,
+        )
+    user, expires_at = auth
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        max_duration = min(get_stream_setting("MAX_DURATION"), expires_at - time.time())
+        deadline = loop.time() + max_duration
+        heartbeat = get_stream_setting("HEARTBEAT")
+
+        async with get_broker().subscribe(user.pk) as subscription:
+            # Estado inicial, ya con la suscripción activa para no perder eventos
+            unread_count = await sync_to_async(count_unread)(user.pk)
+            yield f"retry: {heartbeat * 1000}\n\n"
+            yield sse_event("unread_count", {"unread_count": unread_count})
+
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event, data = await asyncio.wait_for(
+                        subscription.get(), min(heartbeat, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                except SubscriptionClosed:
+                    # El cliente se reconecta a los `retry` milisegundos
+                    break
+                yield sse_event(event, data)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Evitar que un proxy (p. ej. nginx) acumule los eventos
+    response["X-Accel-Buffering"] = "no"
+    return response
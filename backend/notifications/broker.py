@@ -0,0 +1,250 @@
+"""
+Pub/sub de eventos de notificaciones para el stream SSE (ver notifications/async_views.py).
+
+Los productores (señales y vistas síncronas) publican con `publish(user_id, event, data)`
+desde cualquier hilo; cada conexión SSE se suscribe a los eventos de su usuario.
+
+El broker se elige con NOTIFICATION_STREAM["BROKER"]:
+
+- `InMemoryBroker` reparte los eventos dentro del proceso, así que solo llegan a las
+  conexiones atendidas por el mismo proceso que los publica (incluido el hilo de
+  notifications/outbox.py). Sirve en desarrollo y tests, con un único proceso que
+  atienda a la vez la API y el stream.
+- `RedisBroker` usa pub/sub de Redis (un canal por usuario): los workers WSGI que
+  crean notificaciones y los workers ASGI que atienden el stream pueden ser procesos
+  distintos. Es el que se usa en producción.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("notifications")
+
+DEFAULT_SETTINGS = {
+    "BROKER": "notifications.broker.InMemoryBroker",
+    "QUEUE_SIZE": 100,
+    "HEARTBEAT": 15,
+    "MAX_DURATION": 60 * 60,
+    "TICKET_TTL": 30,
+    "REDIS_URL": None,
+    "CHANNEL_PREFIX": "notifications:stream",
+}
+
+
+def get_stream_setting(name):
+    return getattr(settings, "NOTIFICATION_STREAM", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class Broker:
+    """
+    Interfaz de los brokers.
+    """
+
+    def publish(self, user_id, event, data):
+        """Publica un evento para un usuario. No bloquea ni falla si nadie escucha."""
+        raise NotImplementedError
+
+    def has_subscribers(self, user_id):
+        """
+        Indica si vale la pena armar eventos para el usuario. Los brokers que no lo
+        pueden saber devuelven siempre True.
+        """
+        return True
+
+    def subscribe(self, user_id):
+        """
+        Context manager asíncrono que devuelve una suscripción con `get()`, que espera
+        el próximo evento `(event, data)` del usuario o lanza SubscriptionClosed si la
+        suscripción terminó.
+        """
+        raise NotImplementedError
+
+
+class SubscriptionClosed(Exception):
+    """La suscripción terminó (p. ej. se perdió la conexión con Redis)"""
+
+
+# Marca que `close()` deja en la cola para despertar a quien espera en `get()`
+_CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Un cliente que no consume no debe acumular memoria; recibirá el
+            # contador actualizado con el próximo evento que quepa
+            logger.warning("Cola de notificaciones llena, se descarta un evento")
+
+    def close(self):
+        """Termina la suscripción: `get()` entrega lo que quede en la cola y luego falla"""
+        self.closed = True
+        try:
+            self.queue.put_nowait(_CLOSED)
+        except asyncio.QueueFull:
+            # `get()` ve `closed` cuando termina de vaciar la cola
+            pass
+
+    async def get(self):
+        """
+        Espera el próximo evento `(event, data)`.
+
+        Raises:
+            SubscriptionClosed: Si la suscripción terminó y no quedan eventos
+        """
+        if self.closed and self.queue.empty():
+            raise SubscriptionClosed()
+        message = await self.queue.get()
+        if message is _CLOSED:
+            raise SubscriptionClosed()
+        return message
+
+
+class InMemoryBroker(Broker):
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or get_stream_setting("QUEUE_SIZE")
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            # Cada suscripción vive en el event loop de su conexión
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, (event, data))
+            except RuntimeError:
+                # El loop ya se cerró
+                pass
+
+    def has_subscribers(self, user_id):
+        with self._lock:
+            return bool(self._subscriptions.get(user_id))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscriptions = self._subscriptions.get(user_id)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[user_id]
+
+
+class RedisBroker(Broker):
+    """
+    Broker compartido entre procesos sobre pub/sub de Redis.
+
+    Args:
+        url: URL de Redis (por defecto NOTIFICATION_STREAM["REDIS_URL"])
+    """
+
+    def __init__(self, url=None):
+        self.url = url or get_stream_setting("REDIS_URL")
+        self.channel_prefix = get_stream_setting("CHANNEL_PREFIX")
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _channel(self, user_id):
+        return f"{self.channel_prefix}:{user_id}"
+
+    def _get_client(self):
+        import redis
+
+        with self._lock:
+            if self._client is None:
+                self._client = redis.Redis.from_url(self.url)
+            return self._client
+
+    def publish(self, user_id, event, data):
+        import redis
+
+        payload = json.dumps({"event": event, "data": data}, cls=DjangoJSONEncoder)
+        try:
+            self._get_client().publish(self._channel(user_id), payload)
+        except redis.RedisError as e:
+            logger.warning(f"No se pudo publicar el evento {event}: {str(e)}")
+
+    def has_subscribers(self, user_id):
+        import redis
+
+        try:
+            channels = self._get_client().pubsub_numsub(self._channel(user_id))
+        except redis.RedisError:
+            return True
+        return bool(channels and channels[0][1])
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel(user_id))
+        # Una tarea lee el canal y llena la cola de la suscripción; así el timeout de
+        # `get()` (keepalive del stream) no cancela una lectura de Redis a medias
+        subscription = Subscription(asyncio.get_running_loop(), get_stream_setting("QUEUE_SIZE"))
+        reader = asyncio.create_task(self._read(pubsub, subscription))
+        try:
+            yield subscription
+        finally:
+            reader.cancel()
+            await pubsub.aclose()
+            await client.aclose()
+
+    @staticmethod
+    async def _read(pubsub, subscription):
+        import redis
+
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    payload = json.loads(message["data"])
+                    event, data = payload["event"], payload["data"]
+                except (ValueError, TypeError, KeyError) as e:
+                    # Un mensaje mal formado no debe cortar el stream del usuario
+                    logger.warning(f"Se descarta un evento de notificaciones inválido: {str(e)}")
+                    continue
+                subscription.put((event, data))
+        except redis.RedisError as e:
+            logger.warning(f"Se perdió la conexión con Redis del stream: {str(e)}")
+        finally:
+            # Sin lector la suscripción ya no recibe eventos: el stream se cierra y el
+            # cliente se reconecta
+            subscription.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Broker configurado en NOTIFICATION_STREAM["BROKER"] (una instancia por proceso)"""
+    return import_string(get_stream_setting("BROKER"))()
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    if setting == "NOTIFICATION_STREAM":
+        get_broker.cache_clear()
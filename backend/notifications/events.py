@@ -0,0 +1,52 @@
+"""
+Eventos que se envían a los clientes conectados al stream de notificaciones
+(ver notifications/broker.py y notifications/async_views.py):
+
+- "notification": una notificación nueva, con el formato de NotificationSerializer.
+- "unread_count": el contador de notificaciones no leídas cambió.
+
+Los eventos solo se arman si el destinatario tiene alguna conexión abierta.
+"""
+
+import logging
+
+from django.db import transaction
+
+from .broker import get_broker
+from .models import Notification
+from .unread_counter import unread_counter
+
+logger = logging.getLogger("notifications")
+
+
+def count_unread(user_id):
+    return unread_counter.get(user_id)
+
+
+def publish_unread_count(user_id):
+    """Publica el contador de no leídas al confirmarse la transacción actual"""
+    broker = get_broker()
+    if not broker.has_subscribers(user_id):
+        return
+    transaction.on_commit(
+        lambda: broker.publish(user_id, "unread_count", {"unread_count": count_unread(user_id)})
+    )
+
+
+def publish_notification(notification_id, recipient_id):
+    """Publica una notificación ya guardada y el nuevo contador de no leídas"""
+    broker = get_broker()
+    if not broker.has_subscribers(recipient_id):
+        return
+
+    from .serializers import NotificationSerializer
+
+    try:
+        notification = NotificationSerializer.setup_eager_loading(
+            Notification.objects.filter(pk=notification_id)
+        ).get()
+    except Notification.DoesNotExist:
+        return
+
+    broker.publish(recipient_id, "notification", NotificationSerializer(notification).data)
+    publish_unread_count(recipient_id)
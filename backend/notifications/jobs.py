@@ -0,0 +1,23 @@
+"""
+Tareas en segundo plano de la app notifications (ver core/jobs.py).
+"""
+
+import logging
+
+from core.jobs import job
+from .outbox import WRITE_EVENTS_JOB, events_from_payload, write_events
+
+logger = logging.getLogger("notifications")
+
+
+def log_events_failed(events, error):
+    logger.error(f"No se pudieron escribir {len(events)} notificaciones: {str(error)}")
+
+
+@job(WRITE_EVENTS_JOB, on_failure=log_events_failed)
+def write_notification_events(events):
+    """
+    Escribe eventos de notificaciones que no pudo escribir el hilo de
+    notifications/outbox.py, o todos con NOTIFICATION_OUTBOX["DURABLE"].
+    """
+    write_events(events_from_payload(events))
@@ -0,0 +1,215 @@
+"""
+Aplica la política de retención de notificaciones (NOTIFICATION_RETENTION):
+
+1. Elimina las notificaciones leídas sin actividad en los últimos READ_DAYS días,
+   recorriéndolas en el orden del índice de `created_at`.
+2. Deja a cada usuario con sus MAX_PER_USER notificaciones más recientes, recorriendo
+   el índice (recipient, -updated_at).
+
+El borrado se hace por lotes cortos (una transacción por lote) con una pausa entre
+lotes, para poder ejecutarlo con tráfico. Con --archive las filas eliminadas se
+agregan antes a un archivo JSONL comprimido con gzip:
+    python manage.py prune_notifications --archive /var/backups/notifications.jsonl.gz
+"""
+
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from notifications.models import Notification
+from notifications.unread_counter import unread_counter
+
+DEFAULT_SETTINGS = {
+    "READ_DAYS": 90,
+    "MAX_PER_USER": 500,
+}
+
+ARCHIVE_FIELDS = [
+    "id",
+    "recipient_id",
+    "actor_id",
+    "type",
+    "content_type_id",
+    "object_id",
+    "actor_count",
+    "recent_actors",
+    "is_read",
+    "created_at",
+    "updated_at",
+]
+
+
+def get_retention_setting(name):
+    return getattr(settings, "NOTIFICATION_RETENTION", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class Command(BaseCommand):
+    help = "Elimina por lotes las notificaciones antiguas según la política de retención."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--read-days",
+            type=int,
+            default=None,
+            help="Días de retención de las notificaciones leídas "
+            "(por defecto NOTIFICATION_RETENTION['READ_DAYS']).",
+        )
+        parser.add_argument(
+            "--max-per-user",
+            type=int,
+            default=None,
+            help="Notificaciones máximas por usuario "
+            "(por defecto NOTIFICATION_RETENTION['MAX_PER_USER']).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de notificaciones eliminadas por lote (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Segundos de pausa entre lotes (por defecto 0.1).",
+        )
+        parser.add_argument(
+            "--archive",
+            default=None,
+            help="Archivo .jsonl.gz al que se agregan las notificaciones eliminadas.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa cuántas notificaciones se eliminarían.",
+        )
+
+    def handle(self, *args, **options):
+        read_days = options["read_days"]
+        if read_days is None:
+            read_days = get_retention_setting("READ_DAYS")
+        max_per_user = options["max_per_user"]
+        if max_per_user is None:
+            max_per_user = get_retention_setting("MAX_PER_USER")
+        self.batch_size = options["batch_size"]
+        self.sleep = options["sleep"]
+        self.batches = 0
+        started = time.monotonic()
+
+        # Fijar el corte al inicio para que la ejecución termine aunque sigan leyéndose
+        cutoff = timezone.now() - timedelta(days=read_days)
+        expired = Notification.objects.filter(
+            is_read=True, created_at__lt=cutoff, updated_at__lt=cutoff
+        )
+        over_limit = (
+            Notification.objects.values("recipient_id")
+            .annotate(total=Count("id"))
+            .filter(total__gt=max_per_user)
+            .values_list("recipient_id", "total")
+        )
+
+        if options["dry_run"]:
+            excess = sum(total - max_per_user for _, total in over_limit)
+            self.stdout.write(
+                f"Se eliminarían {expired.count()} notificaciones leídas de más de "
+                f"{read_days} días y hasta {excess} por superar {max_per_user} por usuario"
+            )
+            return
+
+        self.archive = gzip.open(options["archive"], "at") if options["archive"] else None
+        try:
+            total_expired = self.prune_expired(expired)
+            total_capped = self.prune_over_limit(list(over_limit), max_per_user)
+        finally:
+            if self.archive:
+                self.archive.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_expired} notificaciones leídas antiguas y {total_capped} por superar "
+                f"el máximo por usuario eliminadas en {self.batches} lotes ({elapsed:.2f}s)"
+            )
+        )
+
+    def prune_expired(self, expired):
+        total = 0
+        last = None
+        while True:
+            batch = expired.order_by("created_at", "id")
+            if last is not None:
+                batch = batch.filter(
+                    Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1])
+                )
+            rows = list(batch.values_list("id", "created_at")[: self.batch_size])
+            if not rows:
+                break
+
+            total += self.delete_batch(expired.filter(id__in=[row_id for row_id, _ in rows]))
+            last = (rows[-1][1], rows[-1][0])
+            if len(rows) < self.batch_size:
+                break
+            self.pause()
+        return total
+
+    def prune_over_limit(self, over_limit, max_per_user):
+        total = 0
+        for recipient_id, _ in over_limit:
+            # Las más recientes se conservan: se recorre el resto en el mismo orden
+            while True:
+                rows = list(
+                    Notification.objects.filter(recipient_id=recipient_id)
+                    .order_by("-updated_at", "-id")
+                    .values_list("id", "updated_at")[max_per_user : max_per_user + self.batch_size]
+                )
+                if not rows:
+                    break
+                # Una notificación con actividad nueva desde la lectura vuelve a estar entre
+                # las más recientes y se conserva
+                total += self.delete_batch(
+                    Notification.objects.filter(
+                        recipient_id=recipient_id,
+                        id__in=[row_id for row_id, _ in rows],
+                        updated_at__lte=rows[0][1],
+                    )
+                )
+                self.pause()
+        return total
+
+    def delete_batch(self, candidates):
+        """
+        Elimina un lote. `candidates` filtra los ids leídos con el mismo criterio de
+        retención, para no borrar las que cambiaron entre la lectura y el borrado.
+        """
+        batch_started = time.monotonic()
+
+        with transaction.atomic():
+            # Se bloquean las que siguen cumpliendo el criterio y solo esas se archivan
+            # y se eliminan
+            rows = list(candidates.select_for_update().order_by("id").values(*ARCHIVE_FIELDS))
+            if self.archive:
+                for row in rows:
+                    self.archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+            # Los contadores de no leídas de los afectados se recalculan en su próxima lectura
+            unread_counter.invalidate({row["recipient_id"] for row in rows if not row["is_read"]})
+            deleted, _ = Notification.objects.filter(id__in=[row["id"] for row in rows]).delete()
+
+        self.batches += 1
+        self.stdout.write(
+            f"Lote {self.batches}: {deleted} notificaciones "
+            f"en {time.monotonic() - batch_started:.2f}s"
+        )
+        return deleted
+
+    def pause(self):
+        if self.sleep:
+            time.sleep(self.sleep)
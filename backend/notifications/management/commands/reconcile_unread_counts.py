@@ -0,0 +1,63 @@
+"""
+Recalcula desde la tabla de notificaciones los contadores de no leídas cacheados
+(ver notifications/unread_counter.py). Los contadores se corrigen solos al vencer,
+pero este comando permite corregirlos todos de una vez (p. ej. desde cron o tras
+modificar notificaciones directamente en la base de datos):
+    python manage.py reconcile_unread_counts --batch-size 1000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.unread_counter import unread_counter
+from users.models import AppUser
+
+
+class Command(BaseCommand):
+    help = "Recalcula por lotes los contadores de notificaciones no leídas cacheados."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de usuarios por lote (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Segundos de pausa entre lotes (por defecto 0).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        batch_size = options["batch_size"]
+        users = 0
+        unread = 0
+        last_id = 0
+
+        while True:
+            user_ids = list(
+                AppUser.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+
+            counts = unread_counter.reconcile(user_ids)
+            users += len(user_ids)
+            unread += sum(counts.values())
+            last_id = user_ids[-1]
+
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{users} contadores recalculados ({unread} notificaciones no leídas) "
+                f"en {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+def seed_actor_ids(apps, schema_editor):
+    # Las filas existentes solo conservan sus actores recientes; su actor_count se deja
+    # como está
+    Notification = apps.get_model("notifications", "Notification")
+    for notification in Notification.objects.only("id", "actor_id", "recent_actors").iterator():
+        actor_ids = [notification.actor_id]
+        for recent in notification.recent_actors or []:
+            if recent["id"] not in actor_ids:
+                actor_ids.append(recent["id"])
+        Notification.objects.filter(pk=notification.pk).update(actor_ids=actor_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_notification_aggregation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="actor_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(seed_actor_ids, migrations.RunPython.noop),
+    ]
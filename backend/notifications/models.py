@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.utils import timezone
 from users.models import AppUser
 
 
@@ -24,9 +25,18 @@ class Notification(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey("content_type", "object_id")
 
+    # agregación: las notificaciones del mismo tipo y objeto dentro de una ventana de
+    # tiempo se acumulan en una sola fila (ver notifications/services.py)
+    actor_count = models.PositiveIntegerField(default=1)
+    # ids de todos los actores distintos acumulados; actor_count es su cantidad
+    actor_ids = models.JSONField(default=list, blank=True)
+    # últimos actores, del más reciente al más antiguo: [{"id": ..., "username": ...}]
+    recent_actors = models.JSONField(default=list, blank=True)
+
     # estado
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"{self.actor.username} - {self.get_type_display()}"
@@ -36,6 +46,18 @@ class Notification(models.Model):
         """Devuelve un mensaje dinámico para mostrar en el frontend"""
         base_message = f"{self.actor.username} "
 
+        others = self.actor_count - 1
+        if others > 0:
+            base_message += f"y {others} {'persona' if others == 1 else 'personas'} más "
+
+            if self.type == "comment":
+                base_message += "comentaron tu publicación."
+
+            else:
+                base_message += "realizaron una acción."
+
+            return base_message
+
         if self.type == "comment":
             base_message += "ha comentado tu publicación."
 
@@ -48,4 +70,8 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["recipient", "is_read"]),
             models.Index(fields=["created_at"]),
+            # Listados ordenados por última actividad y búsqueda de la fila a agregar
+            models.Index(
+                fields=["recipient", "-updated_at"], name="notification_recipient_upd_idx"
+            ),
         ]
@@ -0,0 +1,179 @@
+"""
+Cola de salida de las notificaciones.
+
+Las señales no escriben notificaciones dentro de la request que las origina: encolan
+un `NotificationEvent` al confirmarse la transacción y un hilo escritor por proceso
+los aplica por lotes con `NotificationService.notify_many` (un `bulk_create` y un
+`bulk_update` por lote). Después de escribir actualiza los contadores de no leídas y
+publica las notificaciones en el stream SSE.
+
+Los lotes se forman solos bajo carga: el escritor toma todo lo que se acumuló
+mientras escribía el lote anterior, hasta BATCH_SIZE eventos.
+
+Los eventos que no se pueden escribir en memoria pasan a la cola persistente de
+core/jobs.py (tarea "notifications.write_notification_events", con reintentos):
+
+- los que fallan al escribirse,
+- los que no entran en la cola (QUEUE_SIZE),
+- los que siguen pendientes al terminar el proceso normalmente.
+
+Si el proceso muere sin terminar (SIGKILL, falta de memoria, timeout del worker), los
+eventos que estaban en memoria se pierden. Con NOTIFICATION_OUTBOX["DURABLE"] cada
+evento se guarda en cambio en la cola persistente dentro de la misma transacción que
+lo origina (una inserción más por comentario, sin lotes). Con ["SYNC"] los eventos se
+escriben al confirmarse la transacción, sin el hilo (útil en tests).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from core.jobs import enqueue as enqueue_job
+from .events import publish_notification
+from .services import NotificationEvent, NotificationService
+from .unread_counter import unread_counter
+
+logger = logging.getLogger("notifications")
+
+DEFAULT_SETTINGS = {
+    "SYNC": False,
+    "DURABLE": False,
+    "BATCH_SIZE": 200,
+    "QUEUE_SIZE": 10000,
+    "SHUTDOWN_TIMEOUT": 5,
+}
+
+WRITE_EVENTS_JOB = "notifications.write_notification_events"
+
+
+def get_outbox_setting(name):
+    return getattr(settings, "NOTIFICATION_OUTBOX", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def write_events(events):
+    """Escribe un lote de eventos, actualiza los contadores y publica el resultado"""
+    published = {}
+    for notification, created in NotificationService.notify_many(events):
+        if notification is None:
+            continue
+        if created:
+            unread_counter.increment(notification.recipient_id)
+        published[notification.pk] = notification.recipient_id
+
+    for notification_id, recipient_id in published.items():
+        publish_notification(notification_id, recipient_id)
+
+
+def events_from_payload(events):
+    return [NotificationEvent(*event) for event in events]
+
+
+class NotificationOutbox:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def enqueue(self, event):
+        """Encola un evento al confirmarse la transacción actual"""
+        if get_outbox_setting("DURABLE"):
+            # En la misma transacción que el comentario
+            enqueue_job(WRITE_EVENTS_JOB, events=[list(event)])
+            return
+        transaction.on_commit(lambda: self.put(event))
+
+    def put(self, event):
+        if get_outbox_setting("SYNC"):
+            self.write([event])
+            return
+
+        try:
+            self._get_queue().put_nowait(event)
+        except queue.Full:
+            logger.warning("Cola de notificaciones llena, el evento pasa a la cola persistente")
+            self.spill([event])
+
+    def write(self, events):
+        try:
+            write_events(events)
+        except Exception as e:
+            if len(events) == 1:
+                logger.error(f"Error al escribir una notificación: {str(e)}")
+                self.spill(events)
+                return
+            # Reintentar de a uno para no demorar el lote por un solo evento
+            logger.error(f"Error al escribir un lote de {len(events)} notificaciones: {str(e)}")
+            for event in events:
+                self.write([event])
+
+    def spill(self, events):
+        """Pasa eventos a la cola persistente de core/jobs.py, que los reintenta"""
+        try:
+            enqueue_job(WRITE_EVENTS_JOB, events=[list(event) for event in events])
+        except Exception as e:
+            logger.error(f"Se perdieron {len(events)} notificaciones: {str(e)}")
+
+    def flush(self):
+        """Espera a que se escriban los eventos encolados por este proceso"""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def shutdown(self):
+        """
+        Al terminar el proceso: espera hasta SHUTDOWN_TIMEOUT segundos a que el hilo
+        escriba lo pendiente y pasa el resto a la cola persistente.
+        """
+        if self._queue is None or self._pid != os.getpid():
+            return
+
+        deadline = time.monotonic() + get_outbox_setting("SHUTDOWN_TIMEOUT")
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self.spill(pending)
+
+    def _get_queue(self):
+        # El hilo escritor se crea con el primer evento de cada proceso (también
+        # después de un fork de los workers)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=get_outbox_setting("QUEUE_SIZE"))
+                self._pid = os.getpid()
+                threading.Thread(
+                    target=self._run, args=(self._queue,), name="notification-outbox", daemon=True
+                ).start()
+            return self._queue
+
+    def _run(self, events_queue):
+        batch_size = get_outbox_setting("BATCH_SIZE")
+        while True:
+            events = [events_queue.get()]
+            while len(events) < batch_size:
+                try:
+                    events.append(events_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self.write(events)
+            finally:
+                close_old_connections()
+                for _ in events:
+                    events_queue.task_done()
+
+
+notification_outbox = NotificationOutbox()
+atexit.register(notification_outbox.shutdown)
@@ -2,10 +2,30 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 
 from .models import Notification
-from posts.serializers import AuthorSerializer
+from posts.serializers import AuthorCardsListSerializer, AuthorSerializer
+from utils.eager_loading import EagerLoadingMixin
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    # recipient (StringRelatedField), actor (serializer anidado y `message`) y
+    # target_type (content_type.model) se resuelven con JOIN en lugar de fila por fila
+    select_related_fields = ["recipient", "actor", "content_type"]
+    author_card_fields = ["actor"]
+    only_fields = [
+        "id",
+        "recipient__id",
+        "recipient__username",
+        *AuthorSerializer.only_fields_for("actor"),
+        "type",
+        "content_type__id",
+        "content_type__model",
+        "object_id",
+        "actor_count",
+        "recent_actors",
+        "is_read",
+        "created_at",
+        "updated_at",
+    ]
 
     recipient = serializers.StringRelatedField(read_only=True)
     actor = AuthorSerializer(read_only=True)
@@ -21,6 +41,7 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
+        list_serializer_class = AuthorCardsListSerializer
         fields = [
             "id",
             "recipient",
@@ -28,9 +49,19 @@ class NotificationSerializer(serializers.ModelSerializer):
             "type",
             "target_id",
             "target_type",
+            "actor_count",
+            "recent_actors",
             "is_read",
             "created_at",
+            "updated_at",
+            "message",
+        ]
+        read_only_fields = [
+            "id",
+            "actor_count",
+            "recent_actors",
+            "created_at",
+            "updated_at",
             "message",
         ]
-        read_only_fields = ["id", "created_at", "message"]
         depth = 1
@@ -0,0 +1,155 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import AppUser
+
+from .models import Notification
+
+# Notificación a crear o agregar, sin instancias de modelos para poder encolarla
+NotificationEvent = namedtuple(
+    "NotificationEvent", ["recipient_id", "actor_id", "type", "content_type_id", "object_id"]
+)
+
+DEFAULT_SETTINGS = {
+    "WINDOW": 60 * 60,
+    "RECENT_ACTORS": 3,
+}
+
+
+def get_aggregation_setting(name):
+    return getattr(settings, "NOTIFICATION_AGGREGATION", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class NotificationService:
+    """
+    Servicio para crear notificaciones agregadas.
+
+    Las notificaciones del mismo tipo sobre el mismo objeto para el mismo destinatario
+    se acumulan en una sola fila mientras no se lean y no pasen más de WINDOW segundos
+    desde la última actividad ("Ana y 37 personas más comentaron tu publicación").
+    Así una publicación viral no escribe una fila por comentario ni llena la lista de
+    notificaciones del autor.
+    """
+
+    @staticmethod
+    def actor_entry(actor):
+        return {"id": actor.pk, "username": actor.username}
+
+    @staticmethod
+    def notify(recipient, actor, type, content_type, object_id):
+        """
+        Crea la notificación o la agrega a una existente.
+
+        Returns:
+            tuple: (Notification, created: bool)
+        """
+        event = NotificationEvent(
+            recipient_id=recipient.pk,
+            actor_id=actor.pk,
+            type=type,
+            content_type_id=content_type.pk if content_type else None,
+            object_id=object_id,
+        )
+        return NotificationService.notify_many([event], actors={actor.pk: actor})[0]
+
+    @staticmethod
+    def notify_many(events, actors=None):
+        """
+        Aplica varios eventos con una consulta de lectura y, a lo sumo, un `bulk_create`
+        y un `bulk_update`. Los eventos se agregan en orden, también entre sí.
+
+        Args:
+            events: Lista de NotificationEvent
+            actors (dict): Actores ya cargados, por id (los demás se consultan)
+
+        Returns:
+            list: (Notification, created: bool) por evento, en el mismo orden. `created`
+                solo es True para el evento que creó la fila.
+        """
+        if not events:
+            return []
+
+        now = timezone.now()
+        window_start = now - timedelta(seconds=get_aggregation_setting("WINDOW"))
+        recent_limit = get_aggregation_setting("RECENT_ACTORS")
+
+        actors = dict(actors or {})
+        missing = {event.actor_id for event in events} - actors.keys()
+        if missing:
+            actors.update(AppUser.objects.only("id", "username").in_bulk(missing))
+
+        def group_key(notification):
+            return (
+                notification.recipient_id,
+                notification.type,
+                notification.content_type_id,
+                notification.object_id,
+            )
+
+        groups = Q()
+        for key in {group_key(event) for event in events}:
+            groups |= Q(recipient_id=key[0], type=key[1], content_type_id=key[2], object_id=key[3])
+
+        with transaction.atomic():
+            # Bloquear las filas para que dos escritores simultáneos no pierdan actores
+            pending = {}
+            for notification in (
+                Notification.objects.select_for_update()
+                .filter(groups, is_read=False, updated_at__gte=window_start)
+                .order_by("updated_at")
+            ):
+                # Queda la de actividad más reciente de cada grupo
+                pending[group_key(notification)] = notification
+
+            results = []
+            to_create = []
+            to_update = {}
+            for event in events:
+                actor = actors.get(event.actor_id)
+                if actor is None:
+                    # El actor se eliminó antes de escribir la notificación
+                    results.append((None, False))
+                    continue
+
+                entry = NotificationService.actor_entry(actor)
+                notification = pending.get(group_key(event))
+                if notification is None:
+                    notification = Notification(
+                        recipient_id=event.recipient_id,
+                        actor=actor,
+                        type=event.type,
+                        content_type_id=event.content_type_id,
+                        object_id=event.object_id,
+                        actor_ids=[actor.pk],
+                        recent_actors=[entry],
+                        updated_at=now,
+                    )
+                    pending[group_key(event)] = notification
+                    to_create.append(notification)
+                    results.append((notification, True))
+                    continue
+
+                # Se cuentan personas, no comentarios: un actor que ya comentó no suma
+                if actor.pk not in notification.actor_ids:
+                    notification.actor_ids.append(actor.pk)
+                    notification.actor_count += 1
+                notification.recent_actors = [entry] + [
+                    recent for recent in notification.recent_actors if recent["id"] != actor.pk
+                ][: recent_limit - 1]
+                notification.actor = actor
+                notification.updated_at = now
+                if notification.pk is not None:
+                    to_update[notification.pk] = notification
+                results.append((notification, False))
+
+            Notification.objects.bulk_create(to_create)
+            Notification.objects.bulk_update(
+                to_update.values(),
+                ["actor", "actor_count", "actor_ids", "recent_actors", "updated_at"],
+            )
+        return results
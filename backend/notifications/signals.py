@@ -1,7 +1,8 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Notification
 from django.contrib.contenttypes.models import ContentType
+from .outbox import notification_outbox
+from .services import NotificationEvent
 
 from posts.models import PostComment
 
@@ -9,19 +10,22 @@ from posts.models import PostComment
 @receiver(post_save, sender=PostComment)
 def comment_notification(sender, instance, created, **kwargs):
     if created:
-        recipient = instance.post.author
-        actor = instance.author
+        # La vista ya cargó el post: se usan los ids sin consultar al autor
+        recipient_id = instance.post.author_id
+        actor_id = instance.author_id
 
         # Evitar auto-notificaciones
-        if recipient == actor:
+        if recipient_id == actor_id:
             return
 
-        content_type = ContentType.objects.get_for_model(PostComment)
-
-        Notification.objects.create(
-            recipient=recipient,
-            actor=actor,
-            type="comment",
-            content_type=content_type,
-            object_id=instance.post.id,
+        # La notificación se escribe fuera de la request (ver notifications/outbox.py).
+        # El ContentType queda cacheado por el manager después de la primera consulta.
+        notification_outbox.enqueue(
+            NotificationEvent(
+                recipient_id=recipient_id,
+                actor_id=actor_id,
+                type="comment",
+                content_type_id=ContentType.objects.get_for_model(PostComment).pk,
+                object_id=instance.post_id,
+            )
         )
@@ -0,0 +1,56 @@
+"""
+Tickets de conexión al stream de notificaciones (ver notifications/async_views.py).
+
+EventSource no permite enviar encabezados, y poner el access token en la URL lo deja
+en logs de proxies y en el historial del navegador. En cambio, el cliente pide un
+ticket con su access token (`POST stream/ticket/`) y abre `stream/?ticket=...`.
+
+El ticket es aleatorio, vence a los TICKET_TTL segundos y se consume al conectar:
+uno que quede registrado en un log ya no sirve. Se guarda en la caché compartida,
+así que puede canjearse en cualquier proceso.
+"""
+
+import secrets
+
+from django.core.cache import cache
+
+from .broker import get_stream_setting
+
+
+def _key(ticket):
+    return f"notifications:stream_ticket:{ticket}"
+
+
+def issue_ticket(user_id, expires_at):
+    """
+    Emite un ticket de un solo uso.
+
+    Args:
+        user_id: Usuario autenticado
+        expires_at: Vencimiento (epoch) del access token con el que se pidió; el
+            stream se cierra en ese momento
+
+    Returns:
+        str: El ticket
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(
+        _key(ticket),
+        {"user_id": user_id, "expires_at": expires_at},
+        get_stream_setting("TICKET_TTL"),
+    )
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """
+    Consume un ticket.
+
+    Returns:
+        dict: {"user_id", "expires_at"}, o None si no existe, venció o ya se usó
+    """
+    data = cache.get(_key(ticket))
+    # delete() indica si la clave existía: de dos canjes simultáneos gana uno solo
+    if data is None or not cache.delete(_key(ticket)):
+        return None
+    return data
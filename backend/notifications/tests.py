@@ -1,3 +1,387 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import os
+import queue
+import sys
+import tempfile
+import types
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.jobs import claim_next_job, run_job
+from core.models import BackgroundJob
+from posts.models import Category, Post, PostComment
+from users.author_cards import author_card_cache
+from users.models import AppUser
+from utils.media_urls import media_url_cache
+from utils.testing import QueryBudgetMixin, query_budget
+
+from .broker import SubscriptionClosed, get_broker
+from .management.commands.prune_notifications import Command as PruneNotificationsCommand
+from .models import Notification
+from .outbox import WRITE_EVENTS_JOB, NotificationOutbox, notification_outbox
+from .services import NotificationEvent, NotificationService
+
+# Hasher rápido para no demorar la creación de usuarios
+TEST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+TEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Consultas del listado, iguales con 1, 10 o 30 notificaciones
+NOTIFICATION_LIST_BUDGET = 1
+
+
+def create_user(username):
+    return AppUser.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password4567",
+        date_of_birth=datetime.date(2000, 1, 1),
+    )
+
+
+@override_settings(
+    PASSWORD_HASHERS=TEST_PASSWORD_HASHERS,
+    STORAGES=TEST_STORAGES,
+    MEDIA_ROOT=tempfile.gettempdir(),
+    MEDIA_URL="/media/",
+    NOTIFICATION_OUTBOX={"SYNC": True},
+)
+class NotificationTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = create_user("autor")
+        cls.actors = [create_user(f"lector{i}") for i in range(30)]
+        cls.category = Category.objects.create(name="Paisaje", slug="paisaje")
+
+    def setUp(self):
+        cache.clear()
+        media_url_cache.clear_local()
+        author_card_cache.clear_local()
+        self.client = APIClient()
+        self.client.force_authenticate(self.recipient)
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.recipient, image="posts/foto.jpg", category=self.category
+        )
+
+
+class NotificationListQueryBudgetTests(NotificationTestCase):
+    def test_notification_list(self):
+        content_type = ContentType.objects.get_for_model(PostComment)
+        created = 0
+        for total in (1, 10, 30):
+            # Una notificación por post, cada una con otro actor
+            NotificationService.notify_many(
+                [
+                    NotificationEvent(
+                        recipient_id=self.recipient.pk,
+                        actor_id=actor.pk,
+                        type="comment",
+                        content_type_id=content_type.pk,
+                        object_id=self.create_post().pk,
+                    )
+                    for actor in self.actors[created:total]
+                ]
+            )
+            created = total
+            author_card_cache.clear_local()
+
+            with query_budget(NOTIFICATION_LIST_BUDGET):
+                response = self.client.get("/api/notifications/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["data"]), total)
+
+
+class NotificationAggregationTests(NotificationTestCase):
+    def comment(self, post, actor):
+        with self.captureOnCommitCallbacks(execute=True):
+            PostComment.objects.create(post=post, author=actor, content="Muy buena")
+
+    def test_actor_count_counts_distinct_actors(self):
+        post = self.create_post()
+        first, second, third, fourth = self.actors[:4]
+        for actor in [first, second, third, fourth, first, first, second]:
+            self.comment(post, actor)
+
+        notification = Notification.objects.get(recipient=self.recipient)
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.actor_id, second.pk)
+        self.assertEqual(
+            sorted(notification.actor_ids),
+            sorted(actor.pk for actor in [first, second, third, fourth]),
+        )
+
+    def test_repeated_actor_does_not_grow_actor_count(self):
+        post = self.create_post()
+        for _ in range(3):
+            self.comment(post, self.actors[0])
+
+        notification = Notification.objects.get(recipient=self.recipient)
+        self.assertEqual(notification.actor_count, 1)
+
+
+class UnreadCounterTests(NotificationTestCase):
+    def comment(self, post, actor):
+        with self.captureOnCommitCallbacks(execute=True):
+            PostComment.objects.create(post=post, author=actor, content="Muy buena")
+
+    def patch(self, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.patch(url).status_code, 200)
+
+    def assertUnreadCount(self, expected):
+        response = self.client.get("/api/notifications/count/")
+        self.assertEqual(response.data["unread_count"], expected)
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.recipient, is_read=False).count(),
+            expected,
+        )
+
+    def test_counter_follows_notifications(self):
+        self.assertUnreadCount(0)
+        first_post, second_post = self.create_post(), self.create_post()
+        self.comment(first_post, self.actors[0])
+        self.comment(second_post, self.actors[1])
+        self.assertUnreadCount(2)
+
+        # Marcar dos veces la misma descuenta una sola vez
+        notification = Notification.objects.get(object_id=first_post.pk)
+        self.patch(f"/api/notifications/mark-as-read/{notification.pk}/")
+        self.patch(f"/api/notifications/mark-as-read/{notification.pk}/")
+        self.assertUnreadCount(1)
+
+        self.patch("/api/notifications/mark-all-as-read/")
+        self.assertUnreadCount(0)
+
+        self.comment(first_post, self.actors[2])
+        self.assertUnreadCount(1)
+
+
+@override_settings(BACKGROUND_JOBS={"ALWAYS_EAGER": False})
+class NotificationOutboxTests(NotificationTestCase):
+    def event(self, actor):
+        return NotificationEvent(
+            recipient_id=self.recipient.pk,
+            actor_id=actor.pk,
+            type="comment",
+            content_type_id=ContentType.objects.get_for_model(PostComment).pk,
+            object_id=self.create_post().pk,
+        )
+
+    def run_jobs(self):
+        while (background_job := claim_next_job()) is not None:
+            self.assertTrue(run_job(background_job))
+
+    def test_failed_write_goes_to_job_queue(self):
+        with (
+            mock.patch("notifications.outbox.write_events", side_effect=DatabaseError("caída")),
+            self.assertLogs("notifications", "ERROR"),
+        ):
+            notification_outbox.put(self.event(self.actors[0]))
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(BackgroundJob.objects.filter(name=WRITE_EVENTS_JOB).count(), 1)
+        self.run_jobs()
+        self.assertEqual(Notification.objects.get().actor_id, self.actors[0].pk)
+
+    @override_settings(NOTIFICATION_OUTBOX={"DURABLE": True})
+    def test_durable_event_is_queued_with_the_comment(self):
+        post = self.create_post()
+        with self.captureOnCommitCallbacks(execute=True):
+            PostComment.objects.create(post=post, author=self.actors[0], content="Muy buena")
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(BackgroundJob.objects.filter(name=WRITE_EVENTS_JOB).count(), 1)
+        self.run_jobs()
+        self.assertEqual(Notification.objects.get().object_id, post.pk)
+
+    @override_settings(NOTIFICATION_OUTBOX={"QUEUE_SIZE": 1, "SHUTDOWN_TIMEOUT": 0})
+    def test_full_queue_and_shutdown_go_to_job_queue(self):
+        # Cola del proceso sin hilo escritor: el evento encolado sigue pendiente al terminar
+        outbox = NotificationOutbox()
+        outbox._queue, outbox._pid = queue.Queue(maxsize=1), os.getpid()
+
+        outbox.put(self.event(self.actors[0]))
+        with self.assertLogs("notifications", "WARNING"):
+            outbox.put(self.event(self.actors[1]))
+        self.assertEqual(BackgroundJob.objects.filter(name=WRITE_EVENTS_JOB).count(), 1)
+
+        outbox.shutdown()
+        self.assertEqual(BackgroundJob.objects.filter(name=WRITE_EVENTS_JOB).count(), 2)
+        self.run_jobs()
+        self.assertEqual(
+            set(Notification.objects.values_list("actor_id", flat=True)),
+            {self.actors[0].pk, self.actors[1].pk},
+        )
+
+
+class PruneNotificationsTests(NotificationTestCase):
+    def create_notification(self, actor, is_read=False, days_ago=0):
+        moment = timezone.now() - datetime.timedelta(days=days_ago)
+        notification = Notification.objects.create(
+            recipient=self.recipient, actor=actor, type="comment", is_read=is_read
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=moment, updated_at=moment)
+        return notification
+
+    def prune(self, **options):
+        call_command("prune_notifications", sleep=0, stdout=io.StringIO(), **options)
+        return set(Notification.objects.values_list("pk", flat=True))
+
+    def test_prunes_old_read_notifications(self):
+        old_read = self.create_notification(self.actors[0], is_read=True, days_ago=100)
+        old_unread = self.create_notification(self.actors[1], days_ago=100)
+        recent_read = self.create_notification(self.actors[2], is_read=True, days_ago=10)
+
+        remaining = self.prune(read_days=90, max_per_user=500, batch_size=1)
+        self.assertEqual(remaining, {old_unread.pk, recent_read.pk})
+        self.assertNotIn(old_read.pk, remaining)
+
+    def test_keeps_most_recent_per_user(self):
+        notifications = [
+            self.create_notification(actor, days_ago=days)
+            for days, actor in enumerate(self.actors[:5])
+        ]
+
+        remaining = self.prune(read_days=90, max_per_user=2, batch_size=2)
+        self.assertEqual(remaining, {notifications[0].pk, notifications[1].pk})
+
+    def test_notification_with_new_activity_is_kept(self):
+        # Una notificación recibe actividad nueva entre la lectura del lote y el borrado
+        reactivated = self.create_notification(self.actors[0], is_read=True, days_ago=100)
+        expired = self.create_notification(self.actors[1], is_read=True, days_ago=100)
+        delete_batch = PruneNotificationsCommand.delete_batch
+
+        def reactivate_then_delete(command, candidates):
+            Notification.objects.filter(pk=reactivated.pk).update(
+                is_read=False, updated_at=timezone.now()
+            )
+            return delete_batch(command, candidates)
+
+        with mock.patch.object(
+            PruneNotificationsCommand,
+            "delete_batch",
+            autospec=True,
+            side_effect=reactivate_then_delete,
+        ):
+            remaining = self.prune(read_days=90, max_per_user=500)
+        self.assertEqual(remaining, {reactivated.pk})
+        self.assertNotIn(expired.pk, remaining)
+
+    def test_over_limit_notification_with_new_activity_is_kept(self):
+        newest, _, oldest = [
+            self.create_notification(actor, days_ago=days)
+            for days, actor in enumerate(self.actors[:3])
+        ]
+        delete_batch = PruneNotificationsCommand.delete_batch
+
+        def reactivate_then_delete(command, candidates):
+            Notification.objects.filter(pk=oldest.pk).update(updated_at=timezone.now())
+            return delete_batch(command, candidates)
+
+        with mock.patch.object(
+            PruneNotificationsCommand,
+            "delete_batch",
+            autospec=True,
+            side_effect=reactivate_then_delete,
+        ):
+            remaining = self.prune(read_days=90, max_per_user=1, batch_size=2)
+        # La reactivada estaba en el lote pero pasa a ser la más reciente: es la que queda
+        self.assertEqual(remaining, {oldest.pk})
+        self.assertNotIn(newest.pk, remaining)
+
+
+class FakeRedisError(Exception):
+    pass
+
+
+class FakePubSub:
+    """PubSub de redis.asyncio que entrega `messages` y después pierde la conexión"""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        for data in self.messages:
+            yield {"type": "message", "data": data}
+        raise FakeRedisError("Connection closed by server.")
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedisClient:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self._pubsub
+
+    async def aclose(self):
+        pass
+
+
+def fake_redis_modules(pubsub):
+    """Módulos `redis` y `redis.asyncio` mínimos para probar RedisBroker sin servidor"""
+    module = types.ModuleType("redis")
+    module.RedisError = FakeRedisError
+    module.asyncio = types.ModuleType("redis.asyncio")
+    module.asyncio.Redis = types.SimpleNamespace(from_url=lambda url: FakeRedisClient(pubsub))
+    return {"redis": module, "redis.asyncio": module.asyncio}
+
+
+@override_settings(
+    NOTIFICATION_STREAM={
+        "BROKER": "notifications.broker.RedisBroker",
+        "REDIS_URL": "redis://localhost:6379/0",
+    }
+)
+class RedisBrokerTests(TestCase):
+    def receive(self, messages):
+        """Eventos recibidos hasta que la suscripción termina"""
+        pubsub = FakePubSub(messages)
+
+        async def consume():
+            received = []
+            async with get_broker().subscribe(7) as subscription:
+                while True:
+                    try:
+                        received.append(await asyncio.wait_for(subscription.get(), 5))
+                    except SubscriptionClosed:
+                        return received
+
+        with mock.patch.dict(sys.modules, fake_redis_modules(pubsub)):
+            received = asyncio.run(consume())
+        self.assertEqual(pubsub.channels, ["notifications:stream:7"])
+        return received
+
+    def test_invalid_message_is_skipped(self):
+        valid = json.dumps({"event": "unread_count", "data": {"unread_count": 3}})
+        with self.assertLogs("notifications", "WARNING") as logs:
+            received = self.receive([b"{no es json", b'{"data": {}}', valid.encode()])
+
+        self.assertEqual(received, [("unread_count", {"unread_count": 3})])
+        self.assertEqual(sum("inválido" in line for line in logs.output), 2)
+
+    def test_connection_error_ends_subscription(self):
+        with self.assertLogs("notifications", "WARNING") as logs:
+            self.assertEqual(self.receive([]), [])
+        self.assertTrue(any("Redis" in line for line in logs.output))
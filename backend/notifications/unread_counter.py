@@ -0,0 +1,95 @@
+"""
+Contador de notificaciones no leídas por usuario, guardado en la caché compartida.
+
+`UnreadNotificationCountView` y el stream SSE leen el contador en lugar de hacer un
+COUNT en cada consulta. Se mantiene con operaciones atómicas de la caché:
+
+- `increment`: al crearse una notificación (señal `comment_notification`).
+- `decrement`: al marcar una notificación como leída.
+- `reset`: al marcar todas como leídas.
+
+Si la clave no existe, `increment`/`decrement` no hacen nada: la próxima lectura
+recalcula el valor desde la tabla. Cada valor vence a los TTL segundos (las
+operaciones atómicas no renuevan el vencimiento), así que cualquier desvío se corrige
+solo. El comando `reconcile_unread_counts` recalcula todos los contadores por lotes.
+
+Los cambios se aplican al confirmarse la transacción que los origina.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Notification
+
+DEFAULT_SETTINGS = {
+    "TTL": 15 * 60,
+    "KEY_PREFIX": "notifications:unread",
+}
+
+
+def get_counter_setting(name):
+    return getattr(settings, "NOTIFICATION_UNREAD_COUNTER", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class UnreadCounter:
+    def _key(self, user_id):
+        return f"{get_counter_setting('KEY_PREFIX')}:{user_id}"
+
+    def count_from_db(self, user_id):
+        return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+    def get(self, user_id):
+        """Devuelve el contador; si no está cacheado lo calcula y lo guarda"""
+        count = cache.get(self._key(user_id))
+        if count is None:
+            count = self.count_from_db(user_id)
+            cache.set(self._key(user_id), count, get_counter_setting("TTL"))
+        return count
+
+    def _apply(self, user_id, delta):
+        try:
+            if cache.incr(self._key(user_id), delta) < 0:
+                # Desvío: se descarta y se recalcula en la próxima lectura
+                cache.delete(self._key(user_id))
+        except ValueError:
+            # No está cacheado
+            pass
+
+    def increment(self, user_id, delta=1):
+        transaction.on_commit(lambda: self._apply(user_id, delta))
+
+    def decrement(self, user_id, delta=1):
+        transaction.on_commit(lambda: self._apply(user_id, -delta))
+
+    def reset(self, user_id):
+        transaction.on_commit(lambda: cache.set(self._key(user_id), 0, get_counter_setting("TTL")))
+
+    def invalidate(self, user_ids):
+        keys = [self._key(user_id) for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def reconcile(self, user_ids):
+        """
+        Recalcula desde la tabla los contadores de varios usuarios con una sola
+        consulta agrupada y una sola escritura en la caché.
+
+        Returns:
+            dict: {user_id: cantidad de no leídas}
+        """
+        counts = dict.fromkeys(user_ids, 0)
+        counts.update(
+            Notification.objects.filter(recipient_id__in=user_ids, is_read=False)
+            .values("recipient_id")
+            .annotate(count=Count("id"))
+            .values_list("recipient_id", "count")
+        )
+        cache.set_many(
+            {self._key(user_id): count for user_id, count in counts.items()},
+            get_counter_setting("TTL"),
+        )
+        return counts
+
+
+unread_counter = UnreadCounter()
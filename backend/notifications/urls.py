@@ -5,12 +5,20 @@ from .views import (
     UnreadNotificationCountView,
     MarkAsReadView,
     MarkAllAsReadView,
+    NotificationStreamTicketView,
 )
+from .async_views import notification_stream
 
 urlpatterns = [
     path("", NotificationListView.as_view(), name="notifications-list"),
     path("unread/", UnreadNotificationView.as_view(), name="notifications-unread"),
     path("count/", UnreadNotificationCountView.as_view(), name="notifications-count"),
+    path("stream/", notification_stream, name="notifications-stream"),
+    path(
+        "stream/ticket/",
+        NotificationStreamTicketView.as_view(),
+        name="notifications-stream-ticket",
+    ),
     path(
         "mark-as-read/<int:pk>/",
         MarkAsReadView.as_view(),
@@ -8,6 +8,10 @@ import logging
 
 from .models import Notification
 from .serializers import NotificationSerializer
+from .broker import get_stream_setting
+from .events import publish_unread_count
+from .stream_tickets import issue_ticket
+from .unread_counter import unread_counter
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +21,7 @@ class NotificationListView(APIView):
 
     @extend_schema(
         summary="Obtener todas las notificaciones del usuario",
-        description="Retorna todas las notificaciones del usuario autenticado, ordenadas de más recientes a más antiguas. Requiere autenticación con token JWT.",
+        description="Retorna todas las notificaciones del usuario autenticado, ordenadas por última actividad, de más reciente a más antigua. Requiere autenticación con token JWT.",
         responses={
             200: OpenApiResponse(
                 response=NotificationSerializer(many=True),
@@ -37,8 +41,8 @@ class NotificationListView(APIView):
     )
     def get(self, request):
         try:
-            notifications = Notification.objects.filter(recipient=request.user).order_by(
-                "-created_at"
+            notifications = NotificationSerializer.setup_eager_loading(
+                Notification.objects.filter(recipient=request.user).order_by("-updated_at")
             )
             serializer = NotificationSerializer(notifications, many=True)
             return Response({"success": True, "data": serializer.data}, status=status.HTTP_200_OK)
@@ -58,7 +62,7 @@ class UnreadNotificationView(APIView):
 
     @extend_schema(
         summary="Obtener todas las notificaciones no leídas del usuario",
-        description="Retorna todas las notificaciones no leídas del usuario autenticado, ordenadas de más recientes a más antiguas. Requiere autenticación con token JWT.",
+        description="Retorna todas las notificaciones no leídas del usuario autenticado, ordenadas por última actividad, de más reciente a más antigua. Requiere autenticación con token JWT.",
         responses={
             200: OpenApiResponse(
                 response=NotificationSerializer(many=True),
@@ -78,9 +82,11 @@ class UnreadNotificationView(APIView):
     )
     def get(self, request):
         try:
-            notifications = Notification.objects.filter(
-                recipient=request.user, is_read=False
-            ).order_by("-created_at")
+            notifications = NotificationSerializer.setup_eager_loading(
+                Notification.objects.filter(recipient=request.user, is_read=False).order_by(
+                    "-updated_at"
+                )
+            )
             serializer = NotificationSerializer(notifications, many=True)
             return Response({"success": True, "data": serializer.data}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -123,7 +129,7 @@ class UnreadNotificationCountView(APIView):
     )
     def get(self, request):
         try:
-            count = Notification.objects.filter(recipient=request.user, is_read=False).count()
+            count = unread_counter.get(request.user.pk)
             return Response({"success": True, "unread_count": count}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error inesperado al contar notificaciones no leídas: {str(e)}")
@@ -212,8 +218,13 @@ class MarkAsReadView(APIView):
                 )
 
             notification = Notification.objects.get(pk=pk, recipient=request.user)
-            notification.is_read = True
-            notification.save()
+            # UPDATE condicionado: solo la petición que la marca descuenta el contador
+            updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(
+                is_read=True
+            )
+            if updated:
+                unread_counter.decrement(request.user.pk)
+                publish_unread_count(request.user.pk)
             return Response(
                 {"success": True, "message": "Notificación marcada como leída."},
                 status=status.HTTP_200_OK,
@@ -278,6 +289,9 @@ class MarkAllAsReadView(APIView):
         try:
             notifications = Notification.objects.filter(recipient=request.user, is_read=False)
             updated_count = notifications.update(is_read=True)
+            unread_counter.reset(request.user.pk)
+            if updated_count:
+                publish_unread_count(request.user.pk)
             return Response(
                 {
                     "success": True,
@@ -296,3 +310,41 @@ class MarkAllAsReadView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class NotificationStreamTicketView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Obtener un ticket para el stream de notificaciones",
+        description=(
+            "Emite un ticket de un solo uso para abrir el stream SSE de notificaciones con "
+            "`GET /api/notifications/stream/?ticket=...` (EventSource no permite enviar el "
+            "token en un encabezado). El ticket vence a los pocos segundos.\n"
+            "Requiere autenticación con token JWT."
+        ),
+        request=None,
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "ticket": {"type": "string", "example": "Jq3u0b1x..."},
+                    "expires_in": {"type": "integer", "example": 30},
+                },
+                "description": "Ticket emitido.",
+            },
+        },
+        tags=["Notificaciones"],
+        auth=[{"jwtAuth": []}],
+    )
+    def post(self, request):
+        ticket = issue_ticket(request.user.pk, request.auth["exp"])
+        return Response(
+            {
+                "success": True,
+                "ticket": ticket,
+                "expires_in": get_stream_setting("TICKET_TTL"),
+            },
+            status=status.HTTP_200_OK,
+        )
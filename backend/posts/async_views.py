@@ -0,0 +1,200 @@
+"""
+Variantes asíncronas de la sugerencia de descripciones.
+
+Son vistas async de Django (no de DRF): bajo ASGI la llamada a Gemini se espera sin
+ocupar un hilo del servidor. Por ejemplo, con gunicorn:
+    gunicorn api.asgi:application -k uvicorn.workers.UvicornWorker
+
+- POST description-suggestions/async/: misma respuesta que la vista síncrona.
+- POST description-suggestions/stream/: Server-Sent Events con eventos "chunk" (texto
+  parcial del modelo), "result" (las sugerencias finales) y "error".
+
+Un limitador de concurrencia por proceso (también bajo WSGI) y un timeout evitan que un upstream lento
+acumule peticiones sin límite (ver DESCRIPTION_ASYNC en settings).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import BlacklistCheckingJWTAuthentication
+from utils.image_validation import validate_post_image
+from .description_providers import get_description_provider
+from .descriptions import parse_suggestions
+
+logger = logging.getLogger("posts")
+
+DEFAULT_SETTINGS = {
+    "MAX_CONCURRENCY": 8,
+    "QUEUE_TIMEOUT": 2,
+    "TIMEOUT": 30,
+}
+
+
+def get_async_setting(name):
+    return getattr(settings, "DESCRIPTION_ASYNC", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class LimiterBusy(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """
+    Limita las llamadas simultáneas al modelo en todo el proceso. Usa un semáforo de
+    hilos y no uno de asyncio porque bajo WSGI cada llamada a una vista async corre en
+    un event loop propio (async_to_sync); así el límite vale con ASGI y con WSGI.
+    """
+
+    # Cada cuánto se reintenta tomar un lugar mientras se espera, en segundos
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _get_semaphore(self):
+        with self._lock:
+            if self._semaphore is None:
+                self._semaphore = threading.BoundedSemaphore(get_async_setting("MAX_CONCURRENCY"))
+            return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Espera un lugar como máximo QUEUE_TIMEOUT segundos, sin bloquear el event loop.
+
+        Raises:
+            LimiterBusy: Si no se liberó ningún lugar a tiempo
+        """
+        semaphore = self._get_semaphore()
+        deadline = time.monotonic() + get_async_setting("QUEUE_TIMEOUT")
+        while not semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise LimiterBusy()
+            await asyncio.sleep(self.POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+limiter = ConcurrencyLimiter()
+
+
+def error_response(message, status):
+    return JsonResponse({"success": False, "message": message}, status=status)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def prepare_request(request):
+    """
+    Autentica la petición y valida la imagen.
+
+    Returns:
+        tuple: (metadata, error_response); si hay error, metadata es None
+    """
+    try:
+        auth = await sync_to_async(BlacklistCheckingJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        auth = None
+    if auth is None:
+        return None, error_response("Credenciales de autenticación no válidas", 401)
+
+    files = await sync_to_async(lambda: request.FILES)()
+    image = files.get("image")
+    if not image:
+        return None, error_response("No se envió ninguna imagen", 400)
+
+    metadata, error_message = await sync_to_async(validate_post_image)(image)
+    if not metadata:
+        return None, error_response(error_message, 400)
+
+    return metadata, None
+
+
+@csrf_exempt
+@require_POST
+async def description_suggestions_async(request):
+    """
+    Sugerir descripciones para una publicación (versión asíncrona)
+    """
+    metadata, error = await prepare_request(request)
+    if error:
+        return error
+
+    try:
+        async with limiter.slot():
+            data = await asyncio.wait_for(
+                get_description_provider().asuggest(metadata),
+                get_async_setting("TIMEOUT"),
+            )
+        return JsonResponse({"success": True, "data": data})
+
+    except LimiterBusy:
+        return error_response("Servicio ocupado, intenta nuevamente en unos segundos.", 503)
+    except asyncio.TimeoutError:
+        return error_response("El modelo tardó demasiado en responder.", 504)
+    except json.JSONDecodeError:
+        return error_response("La respuesta de Gemini no fue un JSON válido.", 500)
+    except Exception as e:
+        logger.error(f"Error al sugerir descripciones: {str(e)}")
+        return error_response("No se pudo completar la petición.", 500)
+
+
+@csrf_exempt
+@require_POST
+async def description_suggestions_stream(request):
+    """
+    Sugerir descripciones para una publicación, enviando el texto parcial del modelo
+    como Server-Sent Events a medida que llega
+    """
+    metadata, error = await prepare_request(request)
+    if error:
+        return error
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + get_async_setting("TIMEOUT")
+        try:
+            async with limiter.slot():
+                text = []
+                chunks = get_description_provider().astream(metadata).__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    text.append(chunk)
+                    yield sse_event("chunk", {"text": chunk})
+
+            yield sse_event("result", parse_suggestions("".join(text)))
+
+        except LimiterBusy:
+            yield sse_event("error", {"message": "Servicio ocupado, intenta nuevamente."})
+        except asyncio.TimeoutError:
+            yield sse_event("error", {"message": "El modelo tardó demasiado en responder."})
+        except json.JSONDecodeError:
+            yield sse_event("error", {"message": "La respuesta de Gemini no fue un JSON válido."})
+        except Exception as e:
+            logger.error(f"Error al sugerir descripciones (streaming): {str(e)}")
+            yield sse_event("error", {"message": "No se pudo completar la petición."})
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Evitar que un proxy (p. ej. nginx) acumule los eventos
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,162 @@
+"""
+Caché de las sugerencias de descripción generadas por Gemini.
+
+La clave es el SHA-256 del proveedor que genera la respuesta (backend y modelo), de la
+configuración con que se recodifica la imagen (DESCRIPTION_MODEL_IMAGE), del prompt y
+del contenido de la imagen. La misma foto reenviada devuelve el resultado guardado sin
+llamar al modelo; cambiar de proveedor, de modelo, de codificación o
+`IMAGE_DESCRIPTION_PROMPT` usa entradas nuevas, sin servir las generadas antes.
+
+Niveles, del más rápido al más lento:
+1. LRU local al proceso + caché compartida de Django (`utils.two_tier_cache`).
+2. Tabla `DescriptionSuggestion`, que persiste entre reinicios y despliegues.
+Las entradas vencen a los `TTL` segundos de generadas; el comando
+`prune_description_suggestions` elimina de la tabla las vencidas.
+
+Para que varias requests simultáneas con la misma imagen no llamen todas al modelo,
+la primera toma un "vuelo" (`cache.add` en la caché compartida, que vence a los
+FLIGHT_TIMEOUT segundos) y las demás esperan su resultado hasta FLIGHT_WAIT segundos;
+pasado ese tiempo llaman al modelo igual para no retener el worker mientras dure la
+llamada del dueño (ver CachedDescriptionProvider).
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from utils.two_tier_cache import TwoTierCache
+from .models import DescriptionSuggestion
+
+DEFAULT_SETTINGS = {
+    "LOCAL_MAXSIZE": 500,
+    "LOCAL_TTL": 5 * 60,
+    "TTL": 30 * 24 * 60 * 60,
+    "KEY_PREFIX": "gemini:description",
+    "FLIGHT_TIMEOUT": 60,
+    "FLIGHT_WAIT": 3,
+    "FLIGHT_POLL_INTERVAL": 0.25,
+}
+
+
+def get_cache_setting(name):
+    return getattr(settings, "DESCRIPTION_CACHE", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class DescriptionCache:
+    def __init__(self):
+        self._cache = TwoTierCache(
+            key_prefix=get_cache_setting("KEY_PREFIX"),
+            local_maxsize=get_cache_setting("LOCAL_MAXSIZE"),
+            local_ttl=get_cache_setting("LOCAL_TTL"),
+        )
+        self.ttl = get_cache_setting("TTL")
+        self.flight_timeout = get_cache_setting("FLIGHT_TIMEOUT")
+        self.flight_wait = get_cache_setting("FLIGHT_WAIT")
+        self.flight_poll_interval = get_cache_setting("FLIGHT_POLL_INTERVAL")
+
+    @staticmethod
+    def make_key(image_data, prompt, variant=""):
+        """
+        Hash del prompt y de los bytes de la imagen.
+
+        Args:
+            variant (str): Identifica quién genera la respuesta y cómo (proveedor,
+                modelo y codificación de la imagen)
+        """
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(variant.encode("utf-8")).digest())
+        digest.update(hashlib.sha256(prompt.encode("utf-8")).digest())
+        digest.update(image_data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Devuelve las sugerencias guardadas para `key`, o None si no hay o vencieron"""
+        data = self._cache.get(key)
+        if data is not None:
+            return data
+
+        row = (
+            DescriptionSuggestion.objects.filter(
+                key=key, created_at__gte=timezone.now() - timedelta(seconds=self.ttl)
+            )
+            .values_list("data", "created_at")
+            .first()
+        )
+        if row is None:
+            return None
+
+        data, created_at = row
+        self._cache.set(key, data, created_at.timestamp() + self.ttl)
+        return data
+
+    def set(self, key, data):
+        now = timezone.now()
+        DescriptionSuggestion.objects.update_or_create(
+            key=key, defaults={"data": data, "created_at": now}
+        )
+        self._cache.set(key, data, now.timestamp() + self.ttl)
+
+    def expired(self):
+        """Filas de la tabla ya vencidas"""
+        return DescriptionSuggestion.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=self.ttl)
+        )
+
+    def _flight_key(self, key):
+        return f"{get_cache_setting('KEY_PREFIX')}:flight:{key}"
+
+    def try_begin_flight(self, key):
+        """
+        Intenta tomar el vuelo de `key`.
+
+        Returns:
+            tuple: (data, owner). `data` si otra request ya guardó el resultado; si no,
+                `owner` indica si esta request debe llamar al modelo y luego
+                `end_flight`. (None, False) significa esperar y volver a intentar.
+        """
+        if not cache.add(self._flight_key(key), 1, self.flight_timeout):
+            # El dueño del vuelo escribe el resultado en la caché compartida
+            return self._cache.get(key), False
+
+        # El vuelo anterior pudo terminar entre la consulta a la caché y el add
+        data = self._cache.get(key)
+        if data is not None:
+            self.end_flight(key)
+            return data, False
+        return None, True
+
+    def end_flight(self, key):
+        cache.delete(self._flight_key(key))
+
+    def wait_for_flight(self, key):
+        """
+        Espera el resultado de otra request con la misma clave o toma el vuelo.
+        Si el vuelo no termina en FLIGHT_WAIT segundos se llama al modelo igual.
+
+        Returns:
+            tuple: (data, owner) como `try_begin_flight`
+        """
+        deadline = time.monotonic() + self.flight_wait
+        while True:
+            data, owner = self.try_begin_flight(key)
+            if data is not None or owner or time.monotonic() >= deadline:
+                return data, owner
+            time.sleep(self.flight_poll_interval)
+
+    async def await_flight(self, key):
+        """Versión asíncrona de `wait_for_flight`"""
+        deadline = time.monotonic() + self.flight_wait
+        while True:
+            data, owner = await sync_to_async(self.try_begin_flight)(key)
+            if data is not None or owner or time.monotonic() >= deadline:
+                return data, owner
+            await asyncio.sleep(self.flight_poll_interval)
+
+
+description_cache = DescriptionCache()
@@ -0,0 +1,293 @@
+"""
+Proveedores de sugerencias de descripción.
+
+Las vistas piden las sugerencias a `get_description_provider()`, que construye el
+proveedor configurado en DESCRIPTION_PROVIDER:
+
+- GeminiDescriptionProvider: llama a Gemini.
+- StubDescriptionProvider: respuesta local y determinista, con latencia y tasa de
+  fallos configurables. Permite probar carga, timeouts y caché sin red.
+- CachedDescriptionProvider: envuelve a otro proveedor con la caché de
+  `posts.description_cache`.
+
+Ejemplo:
+    DESCRIPTION_PROVIDER = {
+        "BACKEND": "posts.description_providers.CachedDescriptionProvider",
+        "OPTIONS": {
+            "provider": {
+                "BACKEND": "posts.description_providers.StubDescriptionProvider",
+                "OPTIONS": {"latency": 0.5, "failure_rate": 0.05},
+            },
+        },
+    }
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .description_cache import description_cache
+from .descriptions import build_model_input, parse_suggestions
+from .prompts.description_prompt import IMAGE_DESCRIPTION_PROMPT
+from .services import get_model_image_setting
+
+
+class DescriptionProviderError(Exception):
+    pass
+
+
+class DescriptionProvider:
+    """
+    Interfaz de los proveedores. Todos reciben el ImageMetadata de la imagen validada
+    y devuelven las sugerencias como dict.
+    """
+
+    @property
+    def cache_identity(self):
+        """Identifica las respuestas del proveedor en la clave de la caché"""
+        return f"{type(self).__module__}.{type(self).__qualname__}"
+
+    def suggest(self, metadata):
+        raise NotImplementedError
+
+    async def asuggest(self, metadata):
+        return await sync_to_async(self.suggest, thread_sensitive=False)(metadata)
+
+    async def astream(self, metadata):
+        """
+        Devuelve el texto de la respuesta en fragmentos, a medida que se genera.
+        Al unir los fragmentos se obtiene un texto que `parse_suggestions` acepta.
+        """
+        data = await self.asuggest(metadata)
+        yield json.dumps(data, ensure_ascii=False)
+
+
+class GeminiDescriptionProvider(DescriptionProvider):
+    def __init__(self, model_name="gemini-2.5-flash"):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_identity(self):
+        return f"gemini:{self.model_name}"
+
+    @property
+    def model(self):
+        # El modelo se crea en el primer uso, no al importar el módulo
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    if settings.GEMINI_API_KEY:
+                        genai.configure(api_key=settings.GEMINI_API_KEY)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def suggest(self, metadata):
+        result = self.model.generate_content(build_model_input(metadata))
+        return parse_suggestions(result.text)
+
+    async def asuggest(self, metadata):
+        parts = await sync_to_async(build_model_input, thread_sensitive=False)(metadata)
+        result = await self.model.generate_content_async(parts)
+        return parse_suggestions(result.text)
+
+    async def astream(self, metadata):
+        parts = await sync_to_async(build_model_input, thread_sensitive=False)(metadata)
+        response = await self.model.generate_content_async(parts, stream=True)
+        async for chunk in response:
+            yield chunk.text
+
+
+class StubDescriptionProvider(DescriptionProvider):
+    """
+    Proveedor local sin red. Las sugerencias dependen solo del contenido de la imagen,
+    así que la misma imagen siempre produce la misma respuesta.
+
+    Args:
+        latency (float): Segundos que tarda cada respuesta
+        jitter (float): Variación aleatoria máxima (+/-) de la latencia, en segundos
+        failure_rate (float): Proporción de llamadas que fallan (0 a 1)
+        seed: Semilla del generador aleatorio, para ejecuciones reproducibles
+    """
+
+    STREAM_CHUNKS = 3
+
+    def __init__(self, latency=0.5, jitter=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next_call(self):
+        """Devuelve (latencia, falla) para la próxima llamada"""
+        with self._lock:
+            latency = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            fails = self._random.random() < self.failure_rate
+        return max(0.0, latency), fails
+
+    @staticmethod
+    def build_suggestions(metadata):
+        digest = hashlib.sha256(metadata.data).hexdigest()[:8]
+        size = f"{metadata.width}x{metadata.height}"
+        return {
+            "contenido_generado": {
+                "lenguaje_tecnico_imagen": (
+                    f"Fotografía {metadata.format.upper()} de {size}px (ref. {digest})."
+                ),
+                "lenguaje_natural_imagen": f"Una foto de {size} píxeles (ref. {digest}).",
+                "lenguaje_natural_ameno_imagen": f"¡Mirá esta foto! 📷 ({digest})",
+            }
+        }
+
+    def suggest(self, metadata):
+        latency, fails = self._next_call()
+        time.sleep(latency)
+        if fails:
+            raise DescriptionProviderError("Fallo simulado del proveedor de descripciones")
+        return self.build_suggestions(metadata)
+
+    async def asuggest(self, metadata):
+        latency, fails = self._next_call()
+        await asyncio.sleep(latency)
+        if fails:
+            raise DescriptionProviderError("Fallo simulado del proveedor de descripciones")
+        return self.build_suggestions(metadata)
+
+    async def astream(self, metadata):
+        latency, fails = self._next_call()
+        text = json.dumps(self.build_suggestions(metadata), ensure_ascii=False)
+        size = -(-len(text) // self.STREAM_CHUNKS)
+        for index in range(self.STREAM_CHUNKS):
+            await asyncio.sleep(latency / self.STREAM_CHUNKS)
+            if fails and index == self.STREAM_CHUNKS - 1:
+                raise DescriptionProviderError("Fallo simulado del proveedor de descripciones")
+            yield text[index * size : (index + 1) * size]
+
+
+class CachedDescriptionProvider(DescriptionProvider):
+    """
+    Consulta la caché de sugerencias antes de llamar al proveedor envuelto y guarda
+    sus respuestas válidas.
+
+    Args:
+        provider (dict): Configuración del proveedor envuelto ({"BACKEND", "OPTIONS"})
+    """
+
+    def __init__(self, provider):
+        self.provider = build_description_provider(provider)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_identity(self):
+        return self.provider.cache_identity
+
+    def cache_key(self, metadata):
+        # Las respuestas de otro proveedor, modelo o codificación no se reutilizan
+        encoding = ":".join(
+            str(get_model_image_setting(name)) for name in ("MAX_EDGE", "FORMAT", "QUALITY")
+        )
+        return description_cache.make_key(
+            metadata.data, IMAGE_DESCRIPTION_PROMPT, f"{self.cache_identity}|{encoding}"
+        )
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def suggest(self, metadata):
+        key = self.cache_key(metadata)
+        data = description_cache.get(key)
+        owner = False
+        if data is None:
+            data, owner = description_cache.wait_for_flight(key)
+        self._count(data is not None)
+        if data is not None:
+            return data
+
+        try:
+            data = self.provider.suggest(metadata)
+            description_cache.set(key, data)
+        finally:
+            if owner:
+                description_cache.end_flight(key)
+        return data
+
+    async def asuggest(self, metadata):
+        key = self.cache_key(metadata)
+        data = await sync_to_async(description_cache.get)(key)
+        owner = False
+        if data is None:
+            data, owner = await description_cache.await_flight(key)
+        self._count(data is not None)
+        if data is not None:
+            return data
+
+        try:
+            data = await self.provider.asuggest(metadata)
+            await sync_to_async(description_cache.set)(key, data)
+        finally:
+            if owner:
+                await sync_to_async(description_cache.end_flight)(key)
+        return data
+
+    async def astream(self, metadata):
+        key = self.cache_key(metadata)
+        data = await sync_to_async(description_cache.get)(key)
+        owner = False
+        if data is None:
+            data, owner = await description_cache.await_flight(key)
+        self._count(data is not None)
+        if data is not None:
+            yield json.dumps(data, ensure_ascii=False)
+            return
+
+        try:
+            text = []
+            async for chunk in self.provider.astream(metadata):
+                text.append(chunk)
+                yield chunk
+            # Solo se guarda si la respuesta completa es un JSON válido
+            await sync_to_async(description_cache.set)(key, parse_suggestions("".join(text)))
+        finally:
+            if owner:
+                await sync_to_async(description_cache.end_flight)(key)
+
+
+def build_description_provider(config):
+    """
+    Construye un proveedor a partir de su configuración.
+
+    Args:
+        config (dict): {"BACKEND": ruta de la clase, "OPTIONS": argumentos opcionales}
+    """
+    provider_class = import_string(config["BACKEND"])
+    return provider_class(**config.get("OPTIONS", {}))
+
+
+@lru_cache(maxsize=None)
+def get_description_provider():
+    """Proveedor configurado en DESCRIPTION_PROVIDER (una instancia por proceso)"""
+    return build_description_provider(settings.DESCRIPTION_PROVIDER)
+
+
+@receiver(setting_changed)
+def reset_description_provider(setting, **kwargs):
+    if setting == "DESCRIPTION_PROVIDER":
+        get_description_provider.cache_clear()
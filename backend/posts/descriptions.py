@@ -0,0 +1,38 @@
+"""
+Funciones compartidas por las vistas de sugerencias de descripción (síncrona,
+asíncrona y streaming).
+"""
+
+import json
+
+from .prompts.description_prompt import IMAGE_DESCRIPTION_PROMPT
+from .services import PostImageService
+
+
+def build_model_input(metadata):
+    """
+    Arma el contenido a enviar al modelo: la imagen reducida y el prompt.
+
+    Args:
+        metadata: ImageMetadata devuelto por la validación
+
+    Returns:
+        list: Partes del mensaje para `generate_content`
+    """
+    # Reducir y recodificar la imagen: el modelo no necesita la resolución original
+    mime_type, image_data = PostImageService.encode_for_model(metadata)
+    return [
+        {"mime_type": mime_type, "data": image_data},
+        IMAGE_DESCRIPTION_PROMPT,
+    ]
+
+
+def parse_suggestions(text):
+    """
+    Convierte la respuesta del modelo en un dict, quitando el bloque markdown si lo hay.
+
+    Raises:
+        json.JSONDecodeError: Si la respuesta no es un JSON válido
+    """
+    clean_response_text = text.replace("```json", "").replace("```", "").strip()
+    return json.loads(clean_response_text)
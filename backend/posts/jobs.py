@@ -0,0 +1,93 @@
+"""
+Tareas en segundo plano de la app posts (ver core/jobs.py).
+"""
+
+import logging
+import os
+
+from django.core.files import File
+
+from core.jobs import job
+from core.spool import remove_from_spool
+from .models import Post
+
+logger = logging.getLogger("posts")
+
+
+def mark_post_failed(post_id, spool_path, original_name, error):
+    Post.objects.filter(pk=post_id).update(status=Post.STATUS_FAILED)
+    remove_from_spool(spool_path)
+    logger.error(f"No se pudo procesar la imagen del post ID {post_id}: {str(error)}")
+
+
+@job("posts.process_post_image", on_failure=mark_post_failed)
+def process_post_image(post_id, spool_path, original_name):
+    """
+    Sube la imagen del post desde el spool al storage, genera sus derivadas y lo
+    publica. Es idempotente: si un intento anterior ya subió la imagen, no la repite.
+    Si falla la generación de derivadas, la tarea se reintenta.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        # El post se eliminó antes de procesarse
+        remove_from_spool(spool_path)
+        return
+
+    if not post.image:
+        with open(spool_path, "rb") as spooled:
+            post.image.save(os.path.basename(original_name), File(spooled), save=False)
+        # update() para no modificar updated_at
+        Post.objects.filter(pk=post_id).update(image=post.image.name)
+
+    # Importación diferida: Pillow solo se carga en el proceso que procesa imágenes
+    from .services import PostImageService
+
+    PostImageService.generate_derivatives(post)
+
+    Post.objects.filter(pk=post_id).update(status=Post.STATUS_READY)
+    remove_from_spool(spool_path)
+    logger.info(f"Imagen del post ID {post_id} procesada")
+
+
+def mark_uploaded_post_failed(post_id, error):
+    Post.objects.filter(pk=post_id).update(status=Post.STATUS_FAILED)
+    logger.error(f"No se pudieron generar las derivadas del post ID {post_id}: {str(error)}")
+
+
+@job("posts.generate_post_derivatives", on_failure=mark_uploaded_post_failed)
+def generate_post_derivatives(post_id):
+    """
+    Genera las derivadas de un post cuya imagen se subió directamente al storage
+    (ver posts/uploads.py) y lo publica.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+
+    from .services import PostImageService
+
+    PostImageService.generate_derivatives(post)
+
+    Post.objects.filter(pk=post_id).update(status=Post.STATUS_READY)
+    logger.info(f"Derivadas del post ID {post_id} generadas")
+
+
+def log_backfill_failed(post_id, error):
+    # El post sigue publicado con su imagen original
+    logger.error(f"No se pudieron generar las derivadas del post ID {post_id}: {str(error)}")
+
+
+@job("posts.backfill_post_derivatives", on_failure=log_backfill_failed)
+def backfill_post_derivatives(post_id):
+    """
+    Genera las derivadas de un post publicado antes de que existieran
+    (ver `python manage.py backfill_post_derivatives`). No cambia su estado.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or post.derivatives:
+        return
+
+    from .services import PostImageService
+
+    PostImageService.generate_derivatives(post)
+    logger.info(f"Derivadas del post ID {post_id} generadas")
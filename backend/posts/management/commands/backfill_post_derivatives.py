@@ -0,0 +1,87 @@
+"""
+Encola la generación de derivadas (ver PostImageService.generate_derivatives) para los
+posts publicados que todavía no las tienen, p. ej. los creados antes de que existieran.
+Los posts con imágenes demasiado chicas quedan marcados con NO_DERIVATIVES y no se
+vuelven a encolar. Las tareas las ejecuta `python manage.py run_jobs`. Se encola por lotes cortos con una
+pausa entre lotes:
+    python manage.py backfill_post_derivatives --batch-size 500 --sleep 0.1
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.jobs import enqueue
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Encola la generación de derivadas de los posts que no las tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Cantidad de posts encolados por lote (por defecto 500).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Segundos de pausa entre lotes (por defecto 0.1).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa cuántos posts se encolarían.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pending = (
+            Post.objects.filter(status=Post.STATUS_READY).exclude(image="").filter(derivatives={})
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"Se encolarían {pending.count()} posts sin derivadas")
+            return
+
+        started = time.monotonic()
+        total = 0
+        batches = 0
+        last_id = 0
+
+        while True:
+            ids = list(
+                pending.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            batch_started = time.monotonic()
+            with transaction.atomic():
+                for post_id in ids:
+                    enqueue("posts.backfill_post_derivatives", post_id=post_id)
+
+            total += len(ids)
+            batches += 1
+            last_id = ids[-1]
+            self.stdout.write(
+                f"Lote {batches}: {len(ids)} posts en {time.monotonic() - batch_started:.2f}s"
+            )
+
+            if len(ids) < batch_size:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Se encolaron {total} posts sin derivadas en {batches} lotes ({elapsed:.2f}s)"
+            )
+        )
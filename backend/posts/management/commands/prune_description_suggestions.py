@@ -0,0 +1,79 @@
+"""
+Elimina de la tabla DescriptionSuggestion las sugerencias vencidas (más antiguas que
+DESCRIPTION_CACHE["TTL"]), que ya no se reutilizan (ver posts/description_cache.py).
+El borrado se hace por lotes cortos (una transacción por lote) con una pausa entre
+lotes, para poder ejecutarlo con tráfico:
+    python manage.py prune_description_suggestions --batch-size 1000 --sleep 0.1
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.description_cache import description_cache
+
+
+class Command(BaseCommand):
+    help = "Elimina por lotes las sugerencias de descripción vencidas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de sugerencias eliminadas por lote (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Segundos de pausa entre lotes (por defecto 0.1).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa cuántas sugerencias se eliminarían.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        # Fijar el corte al inicio para que la ejecución termine aunque sigan venciendo
+        expired = description_cache.expired()
+
+        if options["dry_run"]:
+            self.stdout.write(f"Se eliminarían {expired.count()} sugerencias vencidas")
+            return
+
+        started = time.monotonic()
+        total = 0
+        batches = 0
+
+        while True:
+            ids = list(expired.order_by("created_at").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+
+            batch_started = time.monotonic()
+            with transaction.atomic():
+                # Se vuelve a aplicar el vencimiento: una fila regenerada después de
+                # leer el lote tiene created_at nuevo y no se borra
+                deleted, _ = expired.filter(id__in=ids).delete()
+
+            total += deleted
+            batches += 1
+            self.stdout.write(
+                f"Lote {batches}: {deleted} sugerencias en {time.monotonic() - batch_started:.2f}s"
+            )
+
+            if len(ids) < batch_size:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Se eliminaron {total} sugerencias vencidas en {batches} lotes ({elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,38 @@
+"""
+Elimina las subidas directas que expiraron sin confirmarse, junto con el objeto que el
+cliente haya llegado a subir al storage (ver posts/uploads.py). Los objetos se agregan
+a la cola de eliminación del storage (ver core/storage_deletions.py):
+    python manage.py prune_pending_uploads
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.storage_deletions import schedule_deletion
+from posts.models import PendingUpload
+
+
+class Command(BaseCommand):
+    help = "Elimina las subidas directas de imágenes expiradas y sus objetos en el storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa cuántas subidas se eliminarían.",
+        )
+
+    def handle(self, *args, **options):
+        expired = PendingUpload.objects.filter(expires_at__lte=timezone.now())
+
+        if options["dry_run"]:
+            self.stdout.write(f"Se eliminarían {expired.count()} subidas expiradas")
+            return
+
+        with transaction.atomic():
+            names = list(expired.values_list("object_name", flat=True))
+            schedule_deletion(*names)
+            deleted, _ = expired.delete()
+
+        self.stdout.write(self.style.SUCCESS(f"Se eliminaron {deleted} subidas expiradas"))
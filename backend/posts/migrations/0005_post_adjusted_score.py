@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0004_merge_20251024_0338"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="adjusted_score",
+            field=models.FloatField(
+                default=0.0, editable=False, verbose_name="Puntuación ajustada"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-adjusted_score", "-uploaded_at", "-id"], name="post_adjusted_score_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_post_adjusted_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="derivatives",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, verbose_name="Derivadas de la imagen"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0006_post_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "Procesando"),
+                    ("ready", "Publicada"),
+                    ("failed", "Error al procesar"),
+                ],
+                default="ready",
+                max_length=10,
+                verbose_name="Estado",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0007_post_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DescriptionSuggestion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Hash de imagen y prompt"
+                    ),
+                ),
+                ("data", models.JSONField(verbose_name="Sugerencias generadas")),
+                ("created_at", models.DateTimeField(verbose_name="Fecha de generación")),
+            ],
+            options={
+                "verbose_name": "Sugerencia de descripción",
+                "verbose_name_plural": "Sugerencias de descripción",
+            },
+        ),
+    ]
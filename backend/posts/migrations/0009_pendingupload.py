@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:15
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_descriptionsuggestion"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("object_name", models.CharField(max_length=255, verbose_name="Nombre del objeto")),
+                ("content_type", models.CharField(max_length=50, verbose_name="Tipo de contenido")),
+                ("max_size", models.PositiveIntegerField(verbose_name="Tamaño máximo en bytes")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación"),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="Fecha de expiración")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_uploads",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Autor",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Subida pendiente",
+                "verbose_name_plural": "Subidas pendientes",
+                "indexes": [models.Index(fields=["expires_at"], name="pending_upload_expires_idx")],
+            },
+        ),
+    ]
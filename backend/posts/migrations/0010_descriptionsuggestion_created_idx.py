@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0009_pendingupload"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="descriptionsuggestion",
+            index=models.Index(fields=["created_at"], name="description_created_idx"),
+        ),
+    ]
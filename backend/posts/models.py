@@ -1,13 +1,13 @@
-from django.core.files.storage import default_storage
 from django.db import models
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.utils.text import slugify
 
+from core.storage_deletions import schedule_deletion
 from users.models import AppUser
 
 
-import logging
+import uuid
 
 
 class Category(models.Model):
@@ -36,6 +36,15 @@ class Category(models.Model):
 
 
 class Post(models.Model):
+    STATUS_PROCESSING = "processing"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PROCESSING, "Procesando"),
+        (STATUS_READY, "Publicada"),
+        (STATUS_FAILED, "Error al procesar"),
+    ]
+
     author = models.ForeignKey(
         AppUser,
         on_delete=models.CASCADE,  # Si se elimina el usuario, se eliminan los posts
@@ -79,11 +88,51 @@ class Post(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
 
+    # Media bayesiana de las valoraciones, materializada para poder ordenar el feed
+    # por índice. La mantiene la app "ratings" en cada alta/edición/baja de valoración
+    # y 0 indica que el post todavía no tiene valoraciones.
+    adjusted_score = models.FloatField(
+        default=0.0,
+        editable=False,
+        verbose_name="Puntuación ajustada",
+    )
+
+    # La imagen se guarda en el storage en segundo plano (ver posts/jobs.py). Hasta
+    # entonces el post solo es visible para su autor.
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_READY,
+        verbose_name="Estado",
+    )
+
+    # Versiones redimensionadas de la imagen, generadas al subirla (ver posts/services.py).
+    # Formato: {"webp": {"320": "posts/foto_320w.webp", ...}, "jpeg": {...}}, o
+    # {"_none": true} si la imagen es demasiado chica para generar alguna
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Derivadas de la imagen",
+    )
+
     class Meta:
         ordering = ["-uploaded_at"]  # Más recientes a más antiguos
         # ordering = ['uploaded_at'] # Más antiguos a más recientes
         verbose_name = "Publicación"
         verbose_name_plural = "Publicaciones"
+        indexes = [
+            # Sirve el feed "sort=rating" (y su cursor) como un recorrido de rango
+            models.Index(
+                fields=["-adjusted_score", "-uploaded_at", "-id"],
+                name="post_adjusted_score_idx",
+            ),
+        ]
+
+    @classmethod
+    def visible_to(cls, user):
+        """Filtro de posts visibles: los publicados y los propios en cualquier estado"""
+        return models.Q(status=cls.STATUS_READY) | models.Q(author_id=user.pk)
 
     def can_be_rated_by(self, user):
         if user == self.author:
@@ -105,15 +154,13 @@ class Post(models.Model):
 
 @receiver(pre_delete, sender=Post)
 def delete_post_image(sender, instance, **kwargs):
-    logger = logging.getLogger("posts")
-    if instance.image:
-        try:
-            # Borrar usando el storage backend
-            if default_storage.exists(instance.image.name):
-                default_storage.delete(instance.image.name)
-                logger.info(f"Imagen eliminada del storage: {instance.image.name}")
-        except Exception as e:
-            logger.error(f"Error al eliminar la imagen {instance.image.path}: {str(e)}")
+    # Los archivos se eliminan del storage fuera de la request (ver core/storage_deletions.py)
+    from .services import PostImageService
+
+    schedule_deletion(
+        instance.image.name if instance.image else None,
+        *PostImageService.derivative_names(instance.derivatives),
+    )
 
 
 class PostComment(models.Model):
@@ -140,3 +187,51 @@ class PostComment(models.Model):
         verbose_name = "Comentario"
         verbose_name_plural = "Comentarios"
         ordering = ["-created_at"]
+
+
+class DescriptionSuggestion(models.Model):
+    """
+    Sugerencias de descripción generadas por Gemini, guardadas por hash de la imagen
+    y del prompt (ver posts/description_cache.py).
+    """
+
+    key = models.CharField(max_length=64, unique=True, verbose_name="Hash de imagen y prompt")
+    data = models.JSONField(verbose_name="Sugerencias generadas")
+    created_at = models.DateTimeField(verbose_name="Fecha de generación")
+
+    class Meta:
+        verbose_name = "Sugerencia de descripción"
+        verbose_name_plural = "Sugerencias de descripción"
+        # Borrado de las vencidas (ver `python manage.py prune_description_suggestions`)
+        indexes = [models.Index(fields=["created_at"], name="description_created_idx")]
+
+    def __str__(self):
+        return f"Sugerencias {self.key[:12]} ({self.created_at})"
+
+
+class PendingUpload(models.Model):
+    """
+    Subida directa de una imagen al storage, pendiente de confirmar.
+    Se crea al emitir la URL firmada y se elimina al crear el post (ver posts/uploads.py).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    author = models.ForeignKey(
+        AppUser,
+        on_delete=models.CASCADE,
+        related_name="pending_uploads",
+        verbose_name="Autor",
+    )
+    object_name = models.CharField(max_length=255, verbose_name="Nombre del objeto")
+    content_type = models.CharField(max_length=50, verbose_name="Tipo de contenido")
+    max_size = models.PositiveIntegerField(verbose_name="Tamaño máximo en bytes")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    expires_at = models.DateTimeField(verbose_name="Fecha de expiración")
+
+    class Meta:
+        verbose_name = "Subida pendiente"
+        verbose_name_plural = "Subidas pendientes"
+        indexes = [models.Index(fields=["expires_at"], name="pending_upload_expires_idx")]
+
+    def __str__(self):
+        return f"Subida {self.id} de {self.author}"
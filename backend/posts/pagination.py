@@ -0,0 +1,220 @@
+"""
+Paginación por cursor (keyset) para el feed de publicaciones.
+
+A diferencia de `PageNumberPagination`, no ejecuta `COUNT(*)` ni `OFFSET`: cada
+página se obtiene filtrando a partir de los valores de ordenamiento del último
+elemento de la página anterior, por lo que el costo es el mismo en la página 1
+que en la página 500.
+"""
+
+import base64
+import datetime
+import json
+import math
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def cursor_int(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError("Se esperaba un entero")
+    return int(value)
+
+
+def cursor_float(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError("Se esperaba un número")
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("Se esperaba un número finito")
+    return value
+
+
+def cursor_datetime(value):
+    if not isinstance(value, str):
+        raise TypeError("Se esperaba una fecha")
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError("Se esperaba una fecha ISO 8601")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación keyset genérica sobre una tupla de campos de ordenamiento.
+
+    `ordering` es una lista de tuplas `(campo, descendente)`. El último campo debe
+    ser único (normalmente `id`) para que el orden sea total y no se repitan ni se
+    pierdan elementos entre páginas.
+
+    `cursor_field_types` convierte cada valor del cursor al tipo de su campo (p. ej.
+    `{"id": cursor_int}`); un cursor con valores que no se pueden convertir es inválido.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 30
+    invalid_cursor_message = "Cursor inválido."
+    cursor_field_types = {}
+
+    def __init__(self, ordering):
+        self.ordering = list(ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, values, reverse):
+        # isoformat() completo: DjangoJSONEncoder trunca a milisegundos y el cursor
+        # dejaría de coincidir exactamente con el valor guardado en la base de datos.
+        values = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+        payload = json.dumps({"v": values, "r": reverse})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values = payload["v"]
+            reverse = bool(payload["r"])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            values = [
+                self.cursor_field_types.get(field, lambda value: value)(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, OverflowError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def _keyset_filter(self, values, reverse):
+        """
+        Construye la condición `(a, b, c) < (x, y, z)` expandida en Q:
+        a < x OR (a = x AND b < y) OR (a = x AND b = y AND c < z)
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            # Avanzar en el sentido del orden, o retroceder si el cursor es "previous"
+            use_lt = descending != reverse
+            lookup = f"{field}__lt" if use_lt else f"{field}__gt"
+            condition |= equal_prefix & Q(**{lookup: value})
+            equal_prefix &= Q(**{field: value})
+        return condition
+
+    def _order_by(self, reverse):
+        order = []
+        for field, descending in self.ordering:
+            expression = F(field)
+            order.append(expression.asc() if descending == reverse else expression.desc())
+        return order
+
+    def _row_values(self, obj):
+        return [getattr(obj, field) for field, _ in self.ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+
+        values, reverse = self.decode_cursor(request)
+        self.has_cursor = values is not None
+        self.reverse = reverse
+
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+
+        # Se pide un elemento extra para saber si hay más páginas, sin COUNT(*)
+        rows = list(queryset.order_by(*self._order_by(reverse))[: self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = self.has_cursor
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_cursor
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = self.encode_cursor(self._row_values(self.page[-1]), reverse=False)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        cursor = self.encode_cursor(self._row_values(self.page[0]), reverse=True)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class PostCursorPagination(KeysetPagination):
+    """
+    Cursores del feed: `(uploaded_at, id)` para el orden por defecto y
+    `(adjusted_score, uploaded_at, id)` cuando se ordena por valoración.
+    """
+
+    DEFAULT_ORDERING = [("uploaded_at", True), ("id", True)]
+    RATING_ORDERING = [("adjusted_score", True), ("uploaded_at", True), ("id", True)]
+    cursor_field_types = {
+        "adjusted_score": cursor_float,
+        "uploaded_at": cursor_datetime,
+        "id": cursor_int,
+    }
+
+    def __init__(self, sort_by_rating=False):
+        super().__init__(self.RATING_ORDERING if sort_by_rating else self.DEFAULT_ORDERING)
@@ -1,6 +1,21 @@
+from django.db import models, transaction
 from rest_framework import serializers
+from core.jobs import enqueue, get_jobs_setting
+from core.spool import remove_from_spool, save_to_spool
+from users.author_cards import get_author_cards
 from users.models import AppUser
+from utils.eager_loading import EagerLoadingMixin, related_fields
+from utils.media_urls import (
+    MediaURLListSerializer,
+    MediaURLSerializerMixin,
+    get_media_urls_memo,
+)
 from .models import Category, Post, PostComment
+from .services import PostImageService
+
+
+# Clave del contexto con las tarjetas de autor precargadas ({id: tarjeta})
+AUTHOR_CARDS_CONTEXT_KEY = "author_cards"
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -9,32 +24,94 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "slug", "description"]
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(MediaURLSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AppUser
         fields = ["id", "username", "profile_pic"]
 
+    @classmethod
+    def only_fields_for(cls, relation):
+        """Columnas del autor a cargar cuando se anida bajo `relation`"""
+        return related_fields(relation, cls.Meta.fields)
+
+    def to_representation(self, instance):
+        # Tarjeta cacheada (ver users/author_cards.py); los listados las precargan en
+        # el contexto con AuthorCardsListSerializer
+        card = self.context.get(AUTHOR_CARDS_CONTEXT_KEY, {}).get(instance.pk)
+        if card is None:
+            card = get_author_cards([instance])[instance.pk]
+
+        request = self.context.get("request")
+        if request is not None and card["profile_pic"]:
+            card = {**card, "profile_pic": request.build_absolute_uri(card["profile_pic"])}
+        return card
+
+
+class AuthorCardsListSerializer(MediaURLListSerializer):
+    """
+    Serializer de listas que obtiene con una sola lectura de caché las tarjetas de
+    todos los autores de la página (y las URLs de sus archivos), antes de serializar
+    cada elemento.
+
+    El serializer hijo indica las relaciones a precargar en `author_card_fields`.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        users = [getattr(item, field) for item in items for field in self.child.author_card_fields]
+        self.context.setdefault(AUTHOR_CARDS_CONTEXT_KEY, {}).update(get_author_cards(users))
+        return super().to_representation(items)
+
+
+class PostSerializer(EagerLoadingMixin, MediaURLSerializerMixin, serializers.ModelSerializer):
+    select_related_fields = ["author"]
+    author_card_fields = ["author"]
+    only_fields = [
+        "id",
+        "author",
+        "image",
+        "title",
+        "description",
+        "category",
+        "allows_ratings",
+        "uploaded_at",
+        "updated_at",
+        "adjusted_score",
+        "derivatives",
+        "status",
+        *AuthorSerializer.only_fields_for("author"),
+    ]
 
-class PostSerializer(serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
     ratings_count = serializers.IntegerField(read_only=True)
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
+        list_serializer_class = AuthorCardsListSerializer
         fields = [
             "id",
             "author",
             "image",
+            "image_srcset",
             "title",
             "description",
             "category",
             "allows_ratings",
             "ratings_count",
+            "status",
+            "uploaded_at",
+            "updated_at",
+        ]
+        read_only_fields = [
+            "author",
+            "image_srcset",
+            "ratings_count",
+            "status",
             "uploaded_at",
             "updated_at",
         ]
-        read_only_fields = ["author", "ratings_count", "uploaded_at", "updated_at"]
 
         extra_kwargs = {
             "image": {"required": True},
@@ -44,13 +121,25 @@ class PostSerializer(serializers.ModelSerializer):
             "description": {"required": False},
         }
 
+    def get_media_names(self, instance):
+        yield from super().get_media_names(instance)
+        yield from PostImageService.derivative_names(instance.derivatives)
+
+    def get_image_srcset(self, obj):
+        """`srcset` por formato ({"webp": "url 320w, url 640w", ...}); vacío si no hay derivadas"""
+        return PostImageService.build_srcset(
+            obj.derivatives, get_media_urls_memo(self.context), self.context.get("request")
+        )
+
     def validate_image(self, value):
         from utils.image_validation import validate_post_image
 
-        is_valid, error_message = validate_post_image(value)
-        if not is_valid:
+        metadata, error_message = validate_post_image(value)
+        if not metadata:
             raise serializers.ValidationError(error_message)
 
+        # Conservar el contenido ya leído para no volver a leer el archivo subido
+        value.image_metadata = metadata
         return value
 
     def validate_category(self, value):
@@ -68,9 +157,32 @@ class PostSerializer(serializers.ModelSerializer):
         # Asignar el usuario autenticado como author
         validated_data["author"] = authenticated_user
 
-        post = Post(**validated_data)
-
-        post.save()
+        # La imagen se guarda en el spool local y una tarea en segundo plano la sube
+        # al storage y genera sus derivadas; mientras tanto el post queda "processing"
+        image = validated_data.pop("image")
+        metadata = getattr(image, "image_metadata", None)
+        spool_path = save_to_spool(image, data=metadata.data if metadata else None)
+
+        post = Post(**validated_data, status=Post.STATUS_PROCESSING)
+
+        # El post y su tarea se guardan juntos; si algo falla no queda un post
+        # "processing" sin tarea ni un archivo huérfano en el spool
+        try:
+            with transaction.atomic():
+                post.save()
+                enqueue(
+                    "posts.process_post_image",
+                    post_id=post.pk,
+                    spool_path=spool_path,
+                    original_name=image.name,
+                )
+        except Exception:
+            remove_from_spool(spool_path)
+            raise
+
+        if get_jobs_setting("ALWAYS_EAGER"):
+            # La tarea ya se ejecutó (fuera de una transacción on_commit es inmediato)
+            post.refresh_from_db()
 
         return post
 
@@ -89,11 +201,47 @@ class PostSerializer(serializers.ModelSerializer):
         return instance
 
 
-class CommentListSerializer(serializers.ModelSerializer):
+class CommentListSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ["author"]
+    author_card_fields = ["author"]
+    only_fields = [
+        "id",
+        "post",
+        "author",
+        "content",
+        "created_at",
+        "updated_at",
+        *AuthorSerializer.only_fields_for("author"),
+    ]
+
     author = AuthorSerializer(read_only=True)
 
     class Meta:
         model = PostComment
+        list_serializer_class = AuthorCardsListSerializer
         fields = ["id", "author", "content", "created_at", "updated_at"]
         read_only_fields = ["id", "author", "created_at", "updated_at"]
         depth = 1  # Para incluir detalles del autor
+
+
+class PostUploadRequestSerializer(serializers.Serializer):
+    """Datos que declara el cliente al pedir una URL de subida directa"""
+
+    content_type = serializers.CharField(max_length=50)
+    size = serializers.IntegerField(min_value=1)
+
+
+class PostUploadFinalizeSerializer(serializers.ModelSerializer):
+    """Datos del post que se crea al confirmar una subida directa"""
+
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+
+    class Meta:
+        model = Post
+        fields = ["title", "description", "category", "allows_ratings"]
+        extra_kwargs = {
+            "category": {"required": True},
+            "allows_ratings": {"required": True},
+            "title": {"required": False},
+            "description": {"required": False},
+        }
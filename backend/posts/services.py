@@ -0,0 +1,270 @@
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.storage_deletions import schedule_deletion
+from utils.media_urls import resolve_media_urls
+
+logger = logging.getLogger("posts")
+
+DEFAULT_DERIVATIVE_SETTINGS = {
+    "WIDTHS": [320, 640, 1280],
+    "FORMATS": ["webp", "jpeg"],
+    "QUALITY": 80,
+}
+
+# Formato de Pillow y extensión de archivo de cada formato de derivada
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+# Valor de `Post.derivatives` cuando la imagen es demasiado chica para generar alguna:
+# marca el post como procesado para que el backfill no vuelva a encolarlo
+NO_DERIVATIVES = {"_none": True}
+
+
+DEFAULT_MODEL_IMAGE_SETTINGS = {
+    "MAX_EDGE": 1024,
+    "FORMAT": "jpeg",
+    "QUALITY": 85,
+}
+
+
+def get_derivative_setting(name):
+    return getattr(settings, "POST_IMAGE_DERIVATIVES", {}).get(
+        name, DEFAULT_DERIVATIVE_SETTINGS[name]
+    )
+
+
+def get_model_image_setting(name):
+    return getattr(settings, "DESCRIPTION_MODEL_IMAGE", {}).get(
+        name, DEFAULT_MODEL_IMAGE_SETTINGS[name]
+    )
+
+
+class PostImageService:
+    """
+    Servicio para generar y eliminar las versiones redimensionadas (derivadas) de la
+    imagen de un post.
+
+    Las derivadas se guardan junto al original (`posts/foto.jpg` ->
+    `posts/foto_320w.webp`, `posts/foto_320w.jpg`, ...) y sus rutas quedan en
+    `Post.derivatives` con la forma `{"webp": {"320": "posts/foto_320w.webp"}, ...}`.
+    """
+
+    @staticmethod
+    def derivative_name(original_name, width, extension):
+        base, _ = os.path.splitext(original_name)
+        return f"{base}_{width}w.{extension}"
+
+    @staticmethod
+    def render_derivatives(image_file, widths=None, formats=None, quality=None):
+        """
+        Genera las derivadas de una imagen en memoria.
+
+        Solo se generan anchos menores al de la imagen original (nunca se amplía).
+
+        Args:
+            image_file: Archivo de imagen abierto en modo binario
+            widths: Anchos a generar (por defecto POST_IMAGE_DERIVATIVES["WIDTHS"])
+            formats: Formatos a generar (por defecto POST_IMAGE_DERIVATIVES["FORMATS"])
+            quality: Calidad de compresión (por defecto POST_IMAGE_DERIVATIVES["QUALITY"])
+
+        Returns:
+            list: Tuplas (formato, ancho, bytes)
+        """
+        widths = sorted(widths or get_derivative_setting("WIDTHS"), reverse=True)
+        formats = formats or get_derivative_setting("FORMATS")
+        quality = quality or get_derivative_setting("QUALITY")
+
+        with Image.open(image_file) as image:
+            stored_width, stored_height = image.size
+            # Las orientaciones EXIF 5-8 rotan la imagen 90°: el ancho visible es el alto
+            rotated = image.getexif().get(EXIF_ORIENTATION_TAG) in (5, 6, 7, 8)
+            original_width = stored_height if rotated else stored_width
+            widths = [width for width in widths if width < original_width]
+            if not widths:
+                return []
+
+            # En JPEG, decodificar directamente a una escala reducida cuando alcanza
+            # para el ancho más grande (mucho más rápido que decodificar todo)
+            scale = widths[0] / original_width
+            image.draft("RGB", (round(stored_width * scale), round(stored_height * scale)))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+            rendered = []
+            current = image
+            # De mayor a menor, reutilizando cada resultado como origen del siguiente
+            for width in widths:
+                height = max(1, round(current.height * width / current.width))
+                current = current.resize((width, height), Image.Resampling.LANCZOS)
+
+                for format_key in formats:
+                    pillow_format, _ = DERIVATIVE_FORMATS[format_key]
+                    output = current
+                    if pillow_format == "JPEG":
+                        output = PostImageService.flatten_to_rgb(output)
+
+                    buffer = io.BytesIO()
+                    output.save(buffer, format=pillow_format, quality=quality, optimize=True)
+                    rendered.append((format_key, width, buffer.getvalue()))
+
+            return rendered
+
+    @staticmethod
+    def flatten_to_rgb(image, background=(255, 255, 255)):
+        """
+        Convierte una imagen a RGB pegándola sobre un fondo liso según su canal alfa,
+        para que las zonas transparentes no queden negras.
+        """
+        if image.mode == "RGB":
+            return image
+        if image.mode == "P" and "transparency" in image.info:
+            image = image.convert("RGBA")
+        if image.mode in ("RGBA", "LA", "PA"):
+            image = image.convert("RGBA")
+            flattened = Image.new("RGB", image.size, background)
+            flattened.paste(image, mask=image.getchannel("A"))
+            return flattened
+        return image.convert("RGB")
+
+    @staticmethod
+    def encode_for_model(metadata, max_edge=None, image_format=None, quality=None):
+        """
+        Prepara una imagen validada para enviarla al modelo de descripciones: la reduce
+        a un lado mayor de `max_edge` píxeles y la recodifica en un formato compacto.
+
+        Si la imagen ya cumple el tamaño y está en el formato de destino, se envía tal
+        cual.
+
+        Args:
+            metadata: ImageMetadata devuelto por la validación
+            max_edge: Lado mayor máximo (por defecto DESCRIPTION_MODEL_IMAGE["MAX_EDGE"])
+            image_format: "jpeg" o "webp" (por defecto DESCRIPTION_MODEL_IMAGE["FORMAT"])
+            quality: Calidad de compresión (por defecto DESCRIPTION_MODEL_IMAGE["QUALITY"])
+
+        Returns:
+            tuple: (mime_type: str, data: bytes)
+        """
+        max_edge = max_edge or get_model_image_setting("MAX_EDGE")
+        image_format = image_format or get_model_image_setting("FORMAT")
+        quality = quality or get_model_image_setting("QUALITY")
+        pillow_format, _ = DERIVATIVE_FORMATS[image_format]
+
+        if max(metadata.width, metadata.height) <= max_edge and metadata.format == image_format:
+            return metadata.mime_type, metadata.data
+
+        with Image.open(metadata.open()) as image:
+            scale = min(1.0, max_edge / max(image.size))
+            # En JPEG, decodificar directamente a escala reducida
+            image.draft("RGB", (round(image.width * scale), round(image.height * scale)))
+            image = ImageOps.exif_transpose(image)
+            image = PostImageService.flatten_to_rgb(image)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format=pillow_format, quality=quality)
+
+        return f"image/{image_format}", buffer.getvalue()
+
+    @staticmethod
+    def generate_derivatives(post):
+        """
+        Genera las derivadas de la imagen del post, las guarda en el storage y
+        actualiza `Post.derivatives`. Si la imagen es más chica que todos los anchos
+        guarda NO_DERIVATIVES.
+
+        Si falla, las derivadas ya guardadas pasan a la cola de eliminación y la
+        excepción se propaga para que la tarea se reintente.
+
+        Args:
+            post: Instancia del modelo Post con la imagen ya guardada
+
+        Returns:
+            dict: El mapa de derivadas guardado
+        """
+        from .models import Post
+
+        if not post.image:
+            return {}
+
+        saved_names = []
+        try:
+            post.image.open("rb")
+            try:
+                rendered = PostImageService.render_derivatives(post.image)
+            finally:
+                post.image.close()
+
+            derivatives = {}
+            for format_key, width, content in rendered:
+                _, extension = DERIVATIVE_FORMATS[format_key]
+                name = PostImageService.derivative_name(post.image.name, width, extension)
+                saved_name = default_storage.save(name, ContentFile(content))
+                saved_names.append(saved_name)
+                derivatives.setdefault(format_key, {})[str(width)] = saved_name
+
+            derivatives = derivatives or NO_DERIVATIVES
+            # update() para no modificar updated_at
+            Post.objects.filter(pk=post.pk).update(derivatives=derivatives)
+        except Exception as e:
+            logger.error(f"Error al generar derivadas del post ID {post.pk}: {str(e)}")
+            schedule_deletion(*saved_names)
+            raise
+
+        post.derivatives = derivatives
+        logger.info(f"{len(rendered)} derivadas generadas para el post ID {post.pk}")
+        return derivatives
+
+    @staticmethod
+    def derivative_names(derivatives):
+        """
+        Nombres de los archivos de un mapa de derivadas.
+
+        Args:
+            derivatives (dict): Mapa guardado en `Post.derivatives`
+        """
+        return [
+            name
+            for _, sizes in PostImageService.derivative_sizes(derivatives)
+            for name in sizes.values()
+        ]
+
+    @staticmethod
+    def derivative_sizes(derivatives):
+        """Pares (formato, {ancho: nombre}) del mapa de derivadas, sin marcas como NO_DERIVATIVES"""
+        return [
+            (format_key, sizes)
+            for format_key, sizes in (derivatives or {}).items()
+            if isinstance(sizes, dict)
+        ]
+
+    @staticmethod
+    def build_srcset(derivatives, memo=None, request=None):
+        """
+        Convierte el mapa de derivadas en un `srcset` por formato.
+        Ejemplo: {"webp": "https://.../foto_320w.webp 320w, https://.../foto_640w.webp 640w"}
+
+        Args:
+            memo (dict): URLs ya resueltas en la respuesta (ver utils/media_urls.py)
+            request: Si se indica, las URLs se devuelven absolutas (como `image`)
+        """
+        urls = resolve_media_urls(PostImageService.derivative_names(derivatives), memo)
+        if request is not None:
+            urls = {name: request.build_absolute_uri(url) for name, url in urls.items()}
+        srcset = {}
+        for format_key, sizes in PostImageService.derivative_sizes(derivatives):
+            entries = sorted(sizes.items(), key=lambda item: int(item[0]))
+            srcset[format_key] = ", ".join(f"{urls[name]} {width}w" for width, name in entries)
+        return srcset
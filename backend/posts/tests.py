@@ -1,3 +1,544 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+import struct
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core.jobs import claim_next_job, enqueue, run_job
+from core.models import BackgroundJob, StorageDeletion
+from ratings.models import Rating
+from users.author_cards import author_card_cache
+from users.models import AppUser
+from utils.image_validation import ImageMetadata, validate_image_file, validate_post_image
+from utils.media_urls import media_url_cache
+from utils.testing import QueryBudgetMixin
+
+from .description_cache import description_cache
+from .description_providers import CachedDescriptionProvider
+from .models import Category, DescriptionSuggestion, PendingUpload, Post, PostComment
+from .services import NO_DERIVATIVES, PostImageService
+
+# Hasher rápido para no demorar la creación de usuarios
+TEST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+TEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Consultas por request, iguales para page_size 1, 10 y 30: el listado por página
+# agrega el COUNT y el de comentarios además carga el post
+POST_LIST_BUDGET = 2
+POST_CURSOR_BUDGET = 1
+COMMENT_LIST_BUDGET = 3
+
+
+def create_user(username):
+    return AppUser.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password4567",
+        date_of_birth=datetime.date(2000, 1, 1),
+    )
+
+
+@override_settings(
+    PASSWORD_HASHERS=TEST_PASSWORD_HASHERS,
+    STORAGES=TEST_STORAGES,
+    MEDIA_ROOT=tempfile.gettempdir(),
+    MEDIA_URL="/media/",
+)
+class PostQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    La cantidad de consultas de los listados no depende del tamaño de la página.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = create_user("viewer")
+        category = Category.objects.create(name="Paisaje", slug="paisaje")
+        authors = [create_user(f"autor{i}") for i in range(5)]
+        raters = [create_user(f"valorador{i}") for i in range(3)]
+
+        cls.posts = []
+        for i in range(35):
+            post = Post.objects.create(
+                author=authors[i % len(authors)],
+                image=f"posts/foto{i}.jpg",
+                category=category,
+                title=f"Foto {i}",
+                allows_ratings=True,
+            )
+            cls.posts.append(post)
+            for rater in raters[: i % (len(raters) + 1)]:
+                Rating.objects.create(
+                    post=post,
+                    rater=rater,
+                    composition=4,
+                    clarity_focus=3,
+                    lighting=5,
+                    creativity=4,
+                    technical_adaptation=3,
+                )
+
+        cls.commented_post = cls.posts[0]
+        for i in range(35):
+            PostComment.objects.create(
+                post=cls.commented_post,
+                author=authors[i % len(authors)],
+                content=f"Comentario {i}",
+            )
+
+    def setUp(self):
+        cache.clear()
+        media_url_cache.clear_local()
+        author_card_cache.clear_local()
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_post_list_page_mode(self):
+        responses = self.assertEndpointQueryBudget(self.client, "/api/posts/", POST_LIST_BUDGET)
+        self.assertEqual([len(response.data["results"]) for response in responses], [1, 10, 30])
+
+    def test_post_list_cursor_mode(self):
+        responses = self.assertEndpointQueryBudget(
+            self.client, "/api/posts/?pagination=cursor", POST_CURSOR_BUDGET
+        )
+        self.assertEqual([len(response.data["results"]) for response in responses], [1, 10, 30])
+
+    def test_post_list_sorted_by_rating(self):
+        self.assertEndpointQueryBudget(self.client, "/api/posts/?sort=rating", POST_LIST_BUDGET)
+        self.assertEndpointQueryBudget(
+            self.client, "/api/posts/?sort=rating&pagination=cursor", POST_CURSOR_BUDGET
+        )
+
+    def test_comment_list(self):
+        url = f"/api/posts/{self.commented_post.pk}/comments/"
+        responses = self.assertEndpointQueryBudget(self.client, url, COMMENT_LIST_BUDGET)
+        self.assertEqual([len(response.data["results"]) for response in responses], [1, 10, 30])
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": values, "r": reverse}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+@override_settings(
+    PASSWORD_HASHERS=TEST_PASSWORD_HASHERS,
+    STORAGES=TEST_STORAGES,
+    MEDIA_ROOT=tempfile.gettempdir(),
+    MEDIA_URL="/media/",
+)
+class PostCursorPaginationTests(TestCase):
+    """
+    El modo cursor recorre el feed completo sin repetir ni saltear posts, también
+    cuando varios comparten fecha o puntuación.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = create_user("viewer")
+        author = create_user("autor")
+        category = Category.objects.create(name="Paisaje", slug="paisaje")
+        posts = [
+            Post.objects.create(
+                author=author, image=f"posts/foto{i}.jpg", category=category, title=f"Foto {i}"
+            )
+            for i in range(11)
+        ]
+        # Grupos de posts con la misma fecha y la misma puntuación
+        base = timezone.now() - datetime.timedelta(days=1)
+        for i, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(
+                uploaded_at=base + datetime.timedelta(minutes=i // 3),
+                adjusted_score=float(i % 2),
+            )
+
+    def setUp(self):
+        cache.clear()
+        media_url_cache.clear_local()
+        author_card_cache.clear_local()
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def walk(self, url):
+        """Recorre las páginas hacia adelante y devuelve los ids y las respuestas"""
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response)
+            ids.extend(post["id"] for post in response.data["results"])
+            url = response.data["next"]
+        return ids, pages
+
+    def test_walks_feed_in_order_with_ties(self):
+        expected = list(Post.objects.order_by("-uploaded_at", "-id").values_list("id", flat=True))
+        ids, pages = self.walk("/api/posts/?pagination=cursor&page_size=4")
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0].data["previous"])
+
+    def test_walks_rating_feed_in_order_with_ties(self):
+        expected = list(
+            Post.objects.order_by("-adjusted_score", "-uploaded_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        ids, _ = self.walk("/api/posts/?pagination=cursor&sort=rating&page_size=4")
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        _, pages = self.walk("/api/posts/?pagination=cursor&page_size=4")
+        response = self.client.get(pages[2].data["previous"])
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            [post["id"] for post in pages[1].data["results"]],
+        )
+
+    def test_invalid_cursor_returns_404(self):
+        now = timezone.now().isoformat()
+        cursors = [
+            "no-es-un-cursor",
+            encode_cursor([now]),
+            encode_cursor(["x", 1]),
+            encode_cursor([now, "abc"]),
+            encode_cursor([now, True]),
+            encode_cursor([now, None]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f"/api/posts/?cursor={cursor}")
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data["message"], "Cursor inválido.")
+
+        response = self.client.get(
+            f"/api/posts/?sort=rating&cursor={encode_cursor(['nan', now, 1])}"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+def image_file(width, height, image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buffer, format=image_format)
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(
+    PASSWORD_HASHERS=TEST_PASSWORD_HASHERS,
+    STORAGES=TEST_STORAGES,
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    MEDIA_URL="/media/",
+    POST_IMAGE_DERIVATIVES={"WIDTHS": [320, 640], "FORMATS": ["webp", "jpeg"], "QUALITY": 80},
+    BACKGROUND_JOBS={"ALWAYS_EAGER": False, "MAX_ATTEMPTS": 3, "RETRY_BACKOFF": 10},
+)
+class PostDerivativeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("autor")
+        cls.category = Category.objects.create(name="Paisaje", slug="paisaje")
+
+    def create_post(self, width, height, **fields):
+        post = Post(author=self.author, category=self.category, **fields)
+        post.image.save("foto.png", image_file(width, height), save=False)
+        post.save()
+        return post
+
+    def test_generates_each_smaller_width_and_format(self):
+        post = self.create_post(800, 600)
+        derivatives = PostImageService.generate_derivatives(post)
+
+        self.assertEqual(sorted(derivatives), ["jpeg", "webp"])
+        self.assertEqual(sorted(derivatives["webp"], key=int), ["320", "640"])
+        post.refresh_from_db()
+        self.assertEqual(post.derivatives, derivatives)
+        srcset = PostImageService.build_srcset(post.derivatives)
+        self.assertTrue(srcset["webp"].endswith("640w"))
+
+    def test_small_image_is_marked_and_not_backfilled_again(self):
+        post = self.create_post(200, 150)
+        self.assertEqual(PostImageService.generate_derivatives(post), NO_DERIVATIVES)
+        post.refresh_from_db()
+        self.assertEqual(post.derivatives, NO_DERIVATIVES)
+        self.assertEqual(PostImageService.derivative_names(post.derivatives), [])
+        self.assertEqual(PostImageService.build_srcset(post.derivatives), {})
+
+        call_command("backfill_post_derivatives", sleep=0, stdout=io.StringIO())
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_backfill_enqueues_posts_without_derivatives(self):
+        post = self.create_post(800, 600)
+        call_command("backfill_post_derivatives", sleep=0, stdout=io.StringIO())
+        self.assertEqual(
+            list(BackgroundJob.objects.values_list("name", "payload")),
+            [("posts.backfill_post_derivatives", {"post_id": post.pk})],
+        )
+
+    def test_failure_schedules_saved_derivatives_for_deletion(self):
+        post = self.create_post(800, 600)
+        storage = mock.Mock()
+        storage.save.side_effect = ["posts/foto_640w.webp", OSError("storage no disponible")]
+
+        with mock.patch("posts.services.default_storage", storage):
+            with self.assertRaises(OSError):
+                PostImageService.generate_derivatives(post)
+
+        self.assertEqual(
+            list(StorageDeletion.objects.values_list("name", flat=True)),
+            ["posts/foto_640w.webp"],
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.derivatives, {})
+
+    def test_failed_derivatives_retry_the_job(self):
+        post = self.create_post(800, 600, status=Post.STATUS_PROCESSING)
+        enqueue("posts.generate_post_derivatives", post_id=post.pk)
+
+        with mock.patch.object(
+            PostImageService, "render_derivatives", side_effect=OSError("imagen dañada")
+        ):
+            self.assertFalse(run_job(claim_next_job()))
+
+        background_job = BackgroundJob.objects.get()
+        self.assertEqual(background_job.status, BackgroundJob.STATUS_PENDING)
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.STATUS_PROCESSING)
+
+
+@override_settings(
+    PASSWORD_HASHERS=TEST_PASSWORD_HASHERS,
+    STORAGES=TEST_STORAGES,
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    MEDIA_URL="/media/",
+    BACKGROUND_JOBS={"ALWAYS_EAGER": False},
+)
+class DirectUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("autor")
+        cls.category = Category.objects.create(name="Paisaje", slug="paisaje")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def issue(self, content_type="image/png", size=1024):
+        return self.client.post(
+            "/api/posts/uploads/", {"content_type": content_type, "size": size}, format="json"
+        )
+
+    def upload(self, content, content_type="image/png"):
+        data = self.issue(content_type, len(content)).data["data"]
+        response = self.client.generic(
+            "PUT", data["upload_url"], content, content_type=data["headers"]["Content-Type"]
+        )
+        self.assertEqual(response.status_code, 204)
+        return data["upload_id"]
+
+    def finalize(self, upload_id):
+        return self.client.post(
+            f"/api/posts/uploads/{upload_id}/finalize/",
+            {"category": self.category.pk, "allows_ratings": True},
+            format="json",
+        )
+
+    def test_issue_rejects_type_and_size(self):
+        self.assertEqual(self.issue("image/gif").status_code, 400)
+        self.assertEqual(self.issue(size=50 * 1024 * 1024).status_code, 400)
+        self.assertFalse(PendingUpload.objects.exists())
+
+    def test_finalize_creates_processing_post_once(self):
+        upload_id = self.upload(image_file(400, 300).read())
+
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["data"]["status"], Post.STATUS_PROCESSING)
+        self.assertFalse(PendingUpload.objects.exists())
+        self.assertEqual(
+            list(BackgroundJob.objects.values_list("name", flat=True)),
+            ["posts.generate_post_derivatives"],
+        )
+
+        self.assertEqual(self.finalize(upload_id).status_code, 404)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_finalize_rejects_invalid_image(self):
+        upload_id = self.upload(b"esto no es una imagen" * 10)
+
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(PendingUpload.objects.exists())
+        self.assertTrue(StorageDeletion.objects.exists())
+
+    def test_finalize_storage_error_keeps_upload(self):
+        upload_id = self.upload(image_file(400, 300).read())
+
+        with mock.patch("posts.uploads.read_object_header", side_effect=OSError("GCS caído")):
+            response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.data["success"])
+        self.assertNotIn("GCS", response.data["message"])
+        self.assertTrue(PendingUpload.objects.filter(pk=upload_id).exists())
+
+        self.assertEqual(self.finalize(upload_id).status_code, 201)
+
+
+class DescriptionCacheKeyTests(TestCase):
+    """
+    Las sugerencias cacheadas solo se reutilizan con el mismo proveedor, modelo y
+    codificación de la imagen.
+    """
+
+    metadata = ImageMetadata(format="jpeg", width=10, height=10, data=b"imagen")
+
+    def cached_provider(self, backend, **options):
+        return CachedDescriptionProvider({"BACKEND": backend, "OPTIONS": options})
+
+    def test_key_depends_on_provider_and_model(self):
+        stub = self.cached_provider("posts.description_providers.StubDescriptionProvider")
+        flash = self.cached_provider(
+            "posts.description_providers.GeminiDescriptionProvider", model_name="gemini-2.5-flash"
+        )
+        pro = self.cached_provider(
+            "posts.description_providers.GeminiDescriptionProvider", model_name="gemini-2.5-pro"
+        )
+        keys = {provider.cache_key(self.metadata) for provider in (stub, flash, pro)}
+        self.assertEqual(len(keys), 3)
+        self.assertEqual(stub.cache_key(self.metadata), stub.cache_key(self.metadata))
+
+    def test_key_depends_on_model_image_encoding(self):
+        provider = self.cached_provider("posts.description_providers.StubDescriptionProvider")
+        key = provider.cache_key(self.metadata)
+        with override_settings(
+            DESCRIPTION_MODEL_IMAGE={"MAX_EDGE": 512, "FORMAT": "jpeg", "QUALITY": 85}
+        ):
+            self.assertNotEqual(provider.cache_key(self.metadata), key)
+
+
+class DescriptionSingleFlightTests(TestCase):
+    metadata = ImageMetadata(format="jpeg", width=10, height=10, data=b"imagen")
+
+    def setUp(self):
+        cache.clear()
+        description_cache._cache.clear_local()
+        self.provider = CachedDescriptionProvider(
+            {
+                "BACKEND": "posts.description_providers.StubDescriptionProvider",
+                "OPTIONS": {"latency": 0},
+            }
+        )
+        self.key = self.provider.cache_key(self.metadata)
+
+    def test_cached_result_skips_provider(self):
+        first = self.provider.suggest(self.metadata)
+        with mock.patch.object(self.provider.provider, "suggest") as suggest:
+            self.assertEqual(self.provider.suggest(self.metadata), first)
+        suggest.assert_not_called()
+        self.assertEqual(self.provider.hits, 1)
+
+    def test_wait_for_held_flight_is_capped(self):
+        # Otra request tomó el vuelo y no termina: esta espera FLIGHT_WAIT y llama al
+        # modelo sin quedarse hasta que venza el vuelo
+        self.assertEqual(description_cache.try_begin_flight(self.key), (None, True))
+        with (
+            mock.patch.object(description_cache, "flight_wait", 0.2),
+            mock.patch.object(description_cache, "flight_poll_interval", 0.05),
+        ):
+            started = time.monotonic()
+            data = self.provider.suggest(self.metadata)
+        self.assertLess(time.monotonic() - started, description_cache.flight_timeout / 10)
+        self.assertIn("contenido_generado", data)
+        self.assertEqual(self.provider.misses, 1)
+        # El vuelo sigue siendo de la otra request
+        self.assertEqual(description_cache.try_begin_flight(self.key), (data, False))
+
+    def test_prune_keeps_fresh_suggestions(self):
+        now = timezone.now()
+        old = now - datetime.timedelta(seconds=description_cache.ttl + 60)
+        DescriptionSuggestion.objects.create(key="vieja", data={}, created_at=old)
+        DescriptionSuggestion.objects.create(key="nueva", data={}, created_at=now)
+
+        call_command("prune_description_suggestions", sleep=0, stdout=io.StringIO())
+
+        self.assertEqual(
+            list(DescriptionSuggestion.objects.values_list("key", flat=True)), ["nueva"]
+        )
+
+
+class ImageValidationTests(SimpleTestCase):
+    """El formato y las dimensiones se leen de las cabeceras, sin decodificar la imagen"""
+
+    def encode(self, image_format, width=321, height=123, **params):
+        buffer = io.BytesIO()
+        Image.new("RGB", (width, height), (200, 120, 40)).save(
+            buffer, format=image_format, **params
+        )
+        return buffer.getvalue()
+
+    def exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Cámara de prueba"
+        return exif.tobytes()
+
+    def validate(self, data):
+        # Pillow no debe abrir la imagen durante la validación
+        with mock.patch("PIL.Image.open", side_effect=AssertionError("Imagen decodificada")):
+            return validate_post_image(ContentFile(data))
+
+    def test_reads_dimensions_from_headers(self):
+        cases = [
+            ("jpeg", self.encode("JPEG")),
+            ("jpeg", self.encode("JPEG", progressive=True)),
+            ("jpeg", self.encode("JPEG", exif=self.exif())),
+            ("png", self.encode("PNG")),
+            ("webp", self.encode("WEBP", quality=80)),
+            ("webp", self.encode("WEBP", lossless=True)),
+            ("webp", self.encode("WEBP", exif=self.exif())),
+        ]
+        for image_format, data in cases:
+            with self.subTest(image_format=image_format, header=data[:16]):
+                metadata, error = self.validate(data)
+                self.assertIsNone(error)
+                self.assertEqual(
+                    (metadata.format, metadata.width, metadata.height), (image_format, 321, 123)
+                )
+                self.assertEqual(metadata.data, data)
+
+    def test_pixel_bomb_is_rejected_from_header(self):
+        # Solo la cabecera de un PNG de 60000x60000: se rechaza sin decodificar
+        ihdr = struct.pack(">IIBBBBB", 60000, 60000, 8, 2, 0, 0, 0)
+        data = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\x00" * 4
+        metadata, error = self.validate(data)
+        self.assertIsNone(metadata)
+        self.assertEqual(error, "La imagen tiene demasiados píxeles")
+
+        metadata, error = validate_image_file(
+            ContentFile(self.encode("PNG", 400, 300)), max_pixels=100_000
+        )
+        self.assertEqual(error, "La imagen tiene demasiados píxeles")
+
+    def test_rejects_unsupported_or_truncated_content(self):
+        gif = self.encode("GIF")
+        cases = [
+            (gif, "La imagen debe ser una foto válida (JPEG, PNG o WebP)"),
+            (
+                b"<html>no es una imagen</html>",
+                "La imagen debe ser una foto válida (JPEG, PNG o WebP)",
+            ),
+            (self.encode("JPEG")[:20], "Error al validar las dimensiones de la imagen"),
+            (self.encode("PNG", 50, 400), "La imagen debe tener al menos 100x100px"),
+        ]
+        for data, expected in cases:
+            with self.subTest(header=data[:16]):
+                self.assertEqual(self.validate(data), (None, expected))
@@ -0,0 +1,161 @@
+"""
+Subida directa de imágenes de posts al storage.
+
+1. `issue_upload` crea un `PendingUpload` y devuelve una URL firmada de corta
+   duración. Con GCS es una URL V4 para hacer PUT directo al bucket, por lo que los
+   bytes de la imagen no pasan por los workers web. Con otros storages (p. ej.
+   FileSystemStorage en desarrollo y tests) es una URL firmada de este mismo backend
+   (`LocalUploadView`).
+2. El cliente sube la imagen con PUT a esa URL.
+3. `finalize_upload` lee solo las cabeceras del objeto subido, las valida y crea el
+   post. Las derivadas se generan en segundo plano.
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from core.storage_deletions import schedule_deletion
+from utils.image_validation import IMAGE_FORMATS, POST_IMAGE_LIMITS, validate_post_image_header
+from .models import PendingUpload
+
+DEFAULT_SETTINGS = {
+    "URL_EXPIRATION": 10 * 60,
+    "HEADER_BYTES": 256 * 1024,
+}
+
+LOCAL_UPLOAD_SALT = "posts.uploads.local"
+
+# Extensión de archivo de cada tipo de contenido permitido
+UPLOAD_EXTENSIONS = {
+    mime_type: f".{image_format}" for image_format, mime_type in IMAGE_FORMATS.items()
+}
+UPLOAD_EXTENSIONS["image/jpeg"] = ".jpg"
+
+
+class UploadError(Exception):
+    pass
+
+
+def get_upload_setting(name):
+    return getattr(settings, "POST_UPLOADS", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_max_upload_size():
+    return POST_IMAGE_LIMITS["max_size_mb"] * 1024 * 1024
+
+
+def issue_upload(request, content_type, size):
+    """
+    Crea una subida pendiente para el usuario autenticado.
+
+    Args:
+        content_type (str): Tipo de contenido que declara el cliente
+        size (int): Tamaño en bytes que declara el cliente
+
+    Returns:
+        tuple: (PendingUpload, dict con url, method y headers para subir la imagen)
+
+    Raises:
+        UploadError: Si el tipo o el tamaño no están permitidos
+    """
+    if content_type == "image/jpg":
+        content_type = "image/jpeg"
+    if content_type not in UPLOAD_EXTENSIONS:
+        raise UploadError("La imagen debe ser una foto válida (JPEG, PNG o WebP)")
+
+    max_size = get_max_upload_size()
+    if size <= 0 or size > max_size:
+        raise UploadError(
+            f"El tamaño de la imagen no debe exceder los {POST_IMAGE_LIMITS['max_size_mb']}MB"
+        )
+
+    upload_id = uuid.uuid4()
+    expiration = timedelta(seconds=get_upload_setting("URL_EXPIRATION"))
+    pending = PendingUpload.objects.create(
+        id=upload_id,
+        author=request.user,
+        object_name=f"posts/{upload_id.hex}{UPLOAD_EXTENSIONS[content_type]}",
+        content_type=content_type,
+        max_size=max_size,
+        expires_at=timezone.now() + expiration,
+    )
+
+    if hasattr(default_storage, "generate_upload_url"):
+        url = default_storage.generate_upload_url(
+            pending.object_name, content_type, max_size, expiration
+        )
+        headers = default_storage.upload_headers(content_type, max_size)
+    else:
+        token = signing.dumps(str(pending.id), salt=LOCAL_UPLOAD_SALT)
+        url = request.build_absolute_uri(reverse("post-upload-local", args=[token]))
+        headers = {"Content-Type": content_type}
+
+    return pending, {"url": url, "method": "PUT", "headers": headers}
+
+
+def get_local_upload(token):
+    """
+    Devuelve la subida pendiente de una URL firmada local, o None si la firma no es
+    válida o la subida expiró.
+    """
+    try:
+        upload_id = signing.loads(
+            token, salt=LOCAL_UPLOAD_SALT, max_age=get_upload_setting("URL_EXPIRATION")
+        )
+    except signing.BadSignature:
+        return None
+    return PendingUpload.objects.filter(id=upload_id, expires_at__gt=timezone.now()).first()
+
+
+def read_object_header(name, nbytes):
+    """Lee los primeros `nbytes` bytes de un objeto del storage"""
+    if hasattr(default_storage, "read_header"):
+        return default_storage.read_header(name, nbytes)
+    with default_storage.open(name, "rb") as stored:
+        return stored.read(nbytes)
+
+
+def finalize_upload(pending):
+    """
+    Valida el objeto subido a partir de sus cabeceras, sin descargarlo completo.
+
+    Returns:
+        tuple: (formato, ancho, alto)
+
+    Raises:
+        UploadError: Si el objeto no existe o no es una imagen válida. En ese caso el
+            objeto y la subida pendiente se eliminan.
+    """
+    if not default_storage.exists(pending.object_name):
+        raise UploadError("No se encontró la imagen subida")
+
+    size = default_storage.size(pending.object_name)
+    header = read_object_header(pending.object_name, get_upload_setting("HEADER_BYTES"))
+    info, error_message = validate_post_image_header(header, size)
+
+    if info and IMAGE_FORMATS[info[0]] != pending.content_type:
+        info, error_message = None, "El contenido de la imagen no coincide con su tipo"
+
+    if not info:
+        schedule_deletion(pending.object_name)
+        pending.delete()
+        raise UploadError(error_message)
+
+    return info
+
+
+def save_local_upload(pending, content):
+    """Guarda en el storage el contenido recibido por la URL firmada local"""
+    if default_storage.exists(pending.object_name):
+        default_storage.delete(pending.object_name)
+    saved_name = default_storage.save(pending.object_name, ContentFile(content))
+    if saved_name != pending.object_name:
+        pending.object_name = saved_name
+        pending.save(update_fields=["object_name"])
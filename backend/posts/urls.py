@@ -5,7 +5,11 @@ from .views import (
     PostDetailView,
     DescriptionSuggestionView,
     PostCommentView,
+    PostUploadView,
+    PostUploadFinalizeView,
+    LocalUploadView,
 )
+from .async_views import description_suggestions_async, description_suggestions_stream
 from ratings.views import PostRatingsView
 from .views import PostCommentDetailView
 
@@ -13,6 +17,14 @@ urlpatterns = [
     path("categories/", CategoryListView.as_view(), name="categories-list"),
     path("", PostListCreateView.as_view(), name="post-list"),
     path("<int:pk>/", PostDetailView.as_view(), name="post-detail"),
+    # URLs de subida directa de imágenes
+    path("uploads/", PostUploadView.as_view(), name="post-upload"),
+    path(
+        "uploads/<uuid:upload_id>/finalize/",
+        PostUploadFinalizeView.as_view(),
+        name="post-upload-finalize",
+    ),
+    path("uploads/local/<str:token>/", LocalUploadView.as_view(), name="post-upload-local"),
     # URLs relacionadas a ratings
     path(
         "<int:post_id>/ratings/averages/",
@@ -25,6 +37,16 @@ urlpatterns = [
         DescriptionSuggestionView.as_view(),
         name="suggest-post-descriptions",
     ),
+    path(
+        "description-suggestions/async/",
+        description_suggestions_async,
+        name="suggest-post-descriptions-async",
+    ),
+    path(
+        "description-suggestions/stream/",
+        description_suggestions_stream,
+        name="suggest-post-descriptions-stream",
+    ),
     # URLs relacionadas a comentarios
     path("<int:post_id>/comments/", PostCommentView.as_view(), name="post-comments"),
     path(
@@ -1,6 +1,6 @@
 from django.db import transaction
-from django.db.models import Count
-from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiResponse,
@@ -10,11 +10,29 @@ from drf_spectacular.utils import (
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Category, Post, PostComment
+from django.utils import timezone
+from core.jobs import enqueue, get_jobs_setting
+from .models import Category, Post, PostComment, PendingUpload
 from users.models import AppUser
-from .serializers import CategorySerializer, PostSerializer, CommentListSerializer
+from .serializers import (
+    CategorySerializer,
+    PostSerializer,
+    CommentListSerializer,
+    PostUploadRequestSerializer,
+    PostUploadFinalizeSerializer,
+)
+from .uploads import (
+    UploadError,
+    finalize_upload,
+    get_local_upload,
+    issue_upload,
+    save_local_upload,
+)
+from .pagination import PostCursorPagination
+from .description_providers import get_description_provider
 import logging
 import json
 
@@ -88,8 +106,22 @@ class PostListCreateView(APIView):
 
         return queryset
 
-    def _get_posts_queryset(self):
-        return Post.objects.annotate(ratings_count=Count("ratings")).order_by("-uploaded_at")
+    def _use_cursor_pagination(self, request):
+        return (
+            request.query_params.get("pagination") == "cursor"
+            or PostCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def _get_posts_queryset(self, user):
+        # El conteo se lee del agregado PostRatingStats (una fila por post) en lugar de
+        # agrupar todas las valoraciones en cada petición.
+        # Los posts cuya imagen aún se procesa solo los ve su autor.
+        posts = (
+            Post.objects.filter(Post.visible_to(user))
+            .annotate(ratings_count=Coalesce(F("rating_stats__ratings_count"), Value(0)))
+            .order_by("-uploaded_at")
+        )
+        return PostSerializer.setup_eager_loading(posts)
 
     def _sort_by_bayesian_rating(self, queryset):
         """
@@ -97,54 +129,13 @@ class PostListCreateView(APIView):
         Ajusta la puntuación de los posts para priorizar los que tienen más votos.
         Esto soluciona el problema de que los posts con pocas valoraciones aparezcan
         por encima de los posts con muchas valoraciones y un buen promedio.
-        \nFórmula aplicada:
-            adjusted_score = ((V * R) + (M * C)) / (V + M)
-            \nDonde:
-            \n- V (ratings_count): Número de valoraciones del post.
-            \n- R (post_average): Promedio simple de valoración del post.
-            \n- M (MIN_VOTES, default: 10): Mínimo de valoraciones requeridas para "confiar" en el promedio.
-            \n- C (C_OVERALL_AVG, default: 3.5): Promedio general asumido de la plataforma.
-        """
-        from django.db.models import Avg, F, ExpressionWrapper, FloatField, Value, Case, When
-
-        # M: Mínimo de valoraciones requeridas
-        MIN_VOTES = 10
-
-        # C: Promedio general de la plataforma.
-        C_OVERALL_AVG = 3.5
-
-        queryset = queryset.annotate(
-            # R: post_average
-            post_average=Avg(
-                (
-                    F("ratings__composition")
-                    + F("ratings__clarity_focus")
-                    + F("ratings__lighting")
-                    + F("ratings__creativity")
-                    + F("ratings__technical_adaptation")
-                )
-                / 5.0
-            )
-        )
-
-        # Valoración normalizada: ((V * R) + (M * C)) / (V + M)
-        queryset = queryset.annotate(
-            adjusted_score=ExpressionWrapper(
-                (
-                    F("ratings_count") * F("post_average")  # V * R
-                    + Value(MIN_VOTES, output_field=FloatField())
-                    * Value(C_OVERALL_AVG, output_field=FloatField())  # M * C
-                )
-                / (F("ratings_count") + Value(MIN_VOTES, output_field=FloatField())),  # (V + M)
-                output_field=FloatField(),
-            )
-        ).order_by(
-            # Ordenar por la puntuación ajustada (la que prioriza posts con más votos)
-            F("adjusted_score").desc(nulls_last=True),
-            "-uploaded_at",
-        )
 
-        return queryset
+        La puntuación se guarda en `Post.adjusted_score` al escribir valoraciones
+        (ver `PostRatingStats.adjusted_score_expression`), por lo que el orden se
+        resuelve con el índice `post_adjusted_score_idx`. Los posts sin valoraciones
+        tienen 0 y se ubican al final.
+        """
+        return queryset.order_by("-adjusted_score", "-uploaded_at", "-id")
 
     @extend_schema(
         operation_id="api_posts_list",
@@ -193,6 +184,24 @@ class PostListCreateView(APIView):
                 type=int,
                 examples=[OpenApiExample("Número de página", value=1)],
             ),
+            OpenApiParameter(
+                name="pagination",
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Modo de paginación: 'cursor' para paginación por cursor sin conteo total "
+                    "(recomendado para scroll infinito). Por defecto se pagina por número de página."
+                ),
+                required=False,
+                type=str,
+                examples=[OpenApiExample("Paginación por cursor", value="cursor")],
+            ),
+            OpenApiParameter(
+                name="cursor",
+                location=OpenApiParameter.QUERY,
+                description="Cursor opaco devuelto en los enlaces 'next'/'previous' (modo cursor)",
+                required=False,
+                type=str,
+            ),
         ],
         responses={
             200: OpenApiResponse(
@@ -220,16 +229,22 @@ class PostListCreateView(APIView):
         - author: Filtrar por ID de autor (opcional)
         - page_size: Tamaño de la página (opcional, por defecto 10)
         - page: Número de página (opcional, por defecto 1)
+        - pagination: 'cursor' para paginar por cursor (opcional)
+        - cursor: Cursor opaco de la página a obtener (opcional, modo cursor)
         """
         try:
-            posts = self._get_posts_queryset()
+            posts = self._get_posts_queryset(request.user)
 
             posts = self._apply_filters(posts, request)
 
-            if request.query_params.get("sort") == "rating":
+            sort_by_rating = request.query_params.get("sort") == "rating"
+            if sort_by_rating:
                 posts = self._sort_by_bayesian_rating(posts)
 
-            paginator = PostPagination()
+            if self._use_cursor_pagination(request):
+                paginator = PostCursorPagination(sort_by_rating=sort_by_rating)
+            else:
+                paginator = PostPagination()
             result_page = paginator.paginate_queryset(posts, request)
             serializer = PostSerializer(result_page, many=True)
             return paginator.get_paginated_response(serializer.data)
@@ -237,6 +252,11 @@ class PostListCreateView(APIView):
             return Response({"success": False, "message": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except Category.DoesNotExist as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except NotFound as e:
+            # Cursor inválido o página inexistente
+            return Response(
+                {"success": False, "message": str(e.detail)}, status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             return Response(
                 {
@@ -364,7 +384,9 @@ class PostDetailView(APIView):
         Obtener una publicación por ID
         """
         try:
-            post = Post.objects.get(id=pk)
+            post = PostSerializer.setup_eager_loading(
+                Post.objects.filter(Post.visible_to(request.user))
+            ).get(id=pk)
             serializer = PostSerializer(post)
             return Response({"success": True, "data": serializer.data}, status=status.HTTP_200_OK)
         except Post.DoesNotExist:
@@ -701,32 +723,16 @@ class DescriptionSuggestionView(APIView):
         # Validar formato y tamaño de la imagen antes de enviar a la IA
         from utils.image_validation import validate_post_image
 
-        is_valid, error_message = validate_post_image(image)
-        if not is_valid:
+        metadata, error_message = validate_post_image(image)
+        if not metadata:
             return Response(
                 {"success": False, "message": error_message},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        image.seek(0)
-
         try:
-            image_bytes = image.read()
-
-            from .prompts.description_prompt import IMAGE_DESCRIPTION_PROMPT
-
-            # Llamada a Gemini
-            result = settings.GEMINI_MODEL.generate_content(
-                [
-                    {"mime_type": "image/jpeg", "data": image_bytes},
-                    IMAGE_DESCRIPTION_PROMPT,
-                ]
-            )
-
-            # Obtener el texto devuelto y parsear JSON
-            clean_response_text = result.text.replace("```json", "").replace("```", "").strip()
-
-            data = json.loads(clean_response_text)
+            # El proveedor configurado (Gemini por defecto) con caché por contenido
+            data = get_description_provider().suggest(metadata)
 
             return Response({"success": True, "data": data}, status=status.HTTP_200_OK)
 
@@ -895,7 +901,9 @@ class PostCommentView(APIView):
             )
 
         try:
-            comments = PostComment.objects.filter(post=post).order_by("-created_at")
+            comments = CommentListSerializer.setup_eager_loading(
+                PostComment.objects.filter(post=post).order_by("-created_at")
+            )
             paginator = PostPagination()
             result_page = paginator.paginate_queryset(comments, request)
             # SERIALIZAR la lista de comentarios
@@ -1159,3 +1167,234 @@ class PostCommentDetailView(APIView):
                 {"success": False, "message": "Error del servidor.", "detalle": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+# Vistas de subida directa de imágenes al storage (ver posts/uploads.py)
+class PostUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Pedir una URL de subida directa",
+        description=(
+            "Devuelve una URL firmada de corta duración para subir la imagen de una "
+            "publicación directamente al storage con PUT, usando los headers indicados. "
+            "Luego la publicación se crea con `uploads/{upload_id}/finalize/`.\n"
+            "Requiere autenticación con token JWT."
+        ),
+        request=PostUploadRequestSerializer,
+        responses={
+            201: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "data": {
+                        "type": "object",
+                        "properties": {
+                            "upload_id": {"type": "string", "format": "uuid"},
+                            "upload_url": {"type": "string"},
+                            "method": {"type": "string", "example": "PUT"},
+                            "headers": {"type": "object"},
+                            "expires_at": {"type": "string", "format": "date-time"},
+                        },
+                    },
+                },
+                "description": "URL de subida generada",
+            },
+            400: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": False},
+                    "message": {"type": "string", "example": "Error de validación"},
+                },
+                "description": "Tipo o tamaño de imagen no permitido",
+            },
+        },
+        tags=["Publicaciones"],
+        auth=[{"jwtAuth": []}],
+    )
+    def post(self, request):
+        serializer = PostUploadRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    "success": False,
+                    "message": "Error de validación",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            pending, target = issue_upload(
+                request,
+                serializer.validated_data["content_type"],
+                serializer.validated_data["size"],
+            )
+        except UploadError as e:
+            return Response(
+                {"success": False, "message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "success": True,
+                "data": {
+                    "upload_id": pending.id,
+                    "upload_url": target["url"],
+                    "method": target["method"],
+                    "headers": target["headers"],
+                    "expires_at": pending.expires_at,
+                },
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class PostUploadFinalizeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Crear una publicación a partir de una subida directa",
+        description=(
+            "Valida la imagen subida con la URL firmada leyendo solo sus cabeceras y crea "
+            "la publicación. Las versiones redimensionadas se generan en segundo plano, "
+            "por lo que la publicación se devuelve con estado `processing`.\n"
+            "Requiere autenticación con token JWT."
+        ),
+        request=PostUploadFinalizeSerializer,
+        responses={
+            201: OpenApiResponse(
+                response=PostSerializer, description="Publicación creada exitosamente"
+            ),
+            400: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": False},
+                    "message": {"type": "string", "example": "Error de validación"},
+                    "errors": {"type": "object"},
+                },
+                "description": "Datos inválidos o imagen subida no válida",
+            },
+            404: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": False},
+                    "message": {"type": "string", "example": "Subida no encontrada"},
+                },
+                "description": "La subida no existe, no es del usuario o expiró",
+            },
+            500: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": False},
+                    "message": {
+                        "type": "string",
+                        "example": "No se pudo verificar la imagen subida.",
+                    },
+                },
+                "description": "Error del storage al leer la imagen subida",
+            },
+        },
+        tags=["Publicaciones"],
+        auth=[{"jwtAuth": []}],
+    )
+    def post(self, request, upload_id):
+        serializer = PostUploadFinalizeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    "success": False,
+                    "message": "Error de validación",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            # Bloquear la subida: de dos finalizaciones simultáneas solo una crea el post,
+            # la otra la encuentra eliminada
+            pending = (
+                PendingUpload.objects.select_for_update()
+                .filter(id=upload_id, author=request.user, expires_at__gt=timezone.now())
+                .first()
+            )
+            if pending is None:
+                return Response(
+                    {"success": False, "message": "Subida no encontrada"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+            try:
+                finalize_upload(pending)
+            except UploadError as e:
+                # La eliminación de la subida inválida se confirma al salir del bloque
+                return Response(
+                    {"success": False, "message": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            except Exception as e:
+                logger.error(f"Error del storage al verificar la subida {upload_id}: {str(e)}")
+                return Response(
+                    {
+                        "success": False,
+                        "message": "No se pudo verificar la imagen subida.",
+                    },
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+            post = serializer.save(
+                author=request.user,
+                image=pending.object_name,
+                status=Post.STATUS_PROCESSING,
+            )
+            pending.delete()
+            enqueue("posts.generate_post_derivatives", post_id=post.pk)
+
+        if get_jobs_setting("ALWAYS_EAGER"):
+            post.refresh_from_db()
+
+        logger.info(
+            f"Post creado por subida directa: Usuario {request.user.username} - Post ID: {post.pk}"
+        )
+
+        return Response(
+            {"success": True, "data": PostSerializer(post, context={"request": request}).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class LocalUploadView(APIView):
+    """
+    Destino de las URLs firmadas cuando el storage no las genera (FileSystemStorage en
+    desarrollo y tests). La autorización la da la firma de la URL.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @extend_schema(exclude=True)
+    def put(self, request, token):
+        pending = get_local_upload(token)
+        if pending is None:
+            return Response(
+                {"success": False, "message": "URL de subida inválida o expirada"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if request.content_type != pending.content_type:
+            return Response(
+                {"success": False, "message": "El tipo de contenido no coincide"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Lectura directa del cuerpo (request.body aplica DATA_UPLOAD_MAX_MEMORY_SIZE)
+        content = request._request.read(pending.max_size + 1)
+        if not content or len(content) > pending.max_size:
+            return Response(
+                {"success": False, "message": "El tamaño de la imagen no es válido"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        save_local_upload(pending, content)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,61 @@
+"""
+Recalcula el promedio general de la plataforma (C) y la puntuación bayesiana de
+todos los posts.
+
+Pensado para ejecutarse periódicamente (p. ej. con cron cada hora):
+    python manage.py recompute_rating_scores
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from ratings.models import PlatformRatingStats, PostRatingStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el promedio general de valoraciones de la plataforma y actualiza "
+        "la puntuación ajustada de todos los posts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de posts actualizados por UPDATE (por defecto 1000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started = time.monotonic()
+
+        stats = PlatformRatingStats.recompute()
+        self.stdout.write(
+            f"Promedio general: {stats.overall_average:.4f} ({stats.ratings_count} valoraciones)"
+        )
+
+        # Actualizar por rangos de ID para no bloquear toda la tabla en un solo UPDATE
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Post.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            updated += PostRatingStats.refresh_adjusted_scores(
+                Post.objects.filter(id__gte=ids[0], id__lte=ids[-1]),
+                overall_average=stats.overall_average,
+            )
+            last_id = ids[-1]
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"{updated} puntuaciones actualizadas en {elapsed:.2f}s")
+        )
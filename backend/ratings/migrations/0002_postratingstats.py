@@ -0,0 +1,104 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SCORE_FIELDS = [
+    "composition",
+    "clarity_focus",
+    "lighting",
+    "creativity",
+    "technical_adaptation",
+]
+
+
+def backfill_post_rating_stats(apps, schema_editor):
+    Rating = apps.get_model("ratings", "Rating")
+    PostRatingStats = apps.get_model("ratings", "PostRatingStats")
+
+    aggregates = Rating.objects.values("post_id").annotate(
+        ratings_count=models.Count("id"),
+        **{f"{field}_sum": models.Sum(field) for field in SCORE_FIELDS},
+    )
+
+    stats = []
+    for row in aggregates.iterator():
+        total = sum(row[f"{field}_sum"] for field in SCORE_FIELDS)
+        stats.append(
+            PostRatingStats(
+                post_id=row["post_id"],
+                ratings_count=row["ratings_count"],
+                overall_average=total / (len(SCORE_FIELDS) * row["ratings_count"]),
+                **{f"{field}_sum": row[f"{field}_sum"] for field in SCORE_FIELDS},
+            )
+        )
+
+    PostRatingStats.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0004_merge_20251024_0338"),
+        ("ratings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostRatingStats",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_stats",
+                        serialize=False,
+                        to="posts.post",
+                        verbose_name="Publicación",
+                    ),
+                ),
+                (
+                    "ratings_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Cantidad de valoraciones"),
+                ),
+                (
+                    "composition_sum",
+                    models.PositiveIntegerField(default=0, verbose_name="Suma de composición"),
+                ),
+                (
+                    "clarity_focus_sum",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Suma de claridad y enfoque"
+                    ),
+                ),
+                (
+                    "lighting_sum",
+                    models.PositiveIntegerField(default=0, verbose_name="Suma de iluminación"),
+                ),
+                (
+                    "creativity_sum",
+                    models.PositiveIntegerField(default=0, verbose_name="Suma de creatividad"),
+                ),
+                (
+                    "technical_adaptation_sum",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Suma de adaptación técnica"
+                    ),
+                ),
+                (
+                    "overall_average",
+                    models.FloatField(blank=True, null=True, verbose_name="Promedio general"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización"),
+                ),
+            ],
+            options={
+                "verbose_name": "Estadística de valoraciones",
+                "verbose_name_plural": "Estadísticas de valoraciones",
+            },
+        ),
+        migrations.RunPython(backfill_post_rating_stats, migrations.RunPython.noop),
+    ]
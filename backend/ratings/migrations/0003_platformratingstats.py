@@ -0,0 +1,90 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:55
+
+from django.db import migrations, models
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+
+SCORE_FIELDS = [
+    "composition",
+    "clarity_focus",
+    "lighting",
+    "creativity",
+    "technical_adaptation",
+]
+MIN_VOTES = 10
+DEFAULT_OVERALL_AVERAGE = 3.5
+
+
+def compute_adjusted_scores(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    PostRatingStats = apps.get_model("ratings", "PostRatingStats")
+    PlatformRatingStats = apps.get_model("ratings", "PlatformRatingStats")
+
+    totals = PostRatingStats.objects.aggregate(
+        ratings_count=Sum("ratings_count"),
+        **{f"{field}_sum": Sum(f"{field}_sum") for field in SCORE_FIELDS},
+    )
+    ratings_count = totals.pop("ratings_count") or 0
+    overall_average = (
+        sum(totals.values()) / (len(SCORE_FIELDS) * ratings_count)
+        if ratings_count
+        else DEFAULT_OVERALL_AVERAGE
+    )
+    PlatformRatingStats.objects.create(
+        pk=1, overall_average=overall_average, ratings_count=ratings_count
+    )
+
+    total = sum((F(f"{field}_sum") for field in SCORE_FIELDS), Value(0))
+    score = (
+        PostRatingStats.objects.filter(post_id=OuterRef("pk"), ratings_count__gt=0)
+        .annotate(
+            score=(
+                Cast(total, FloatField()) / len(SCORE_FIELDS)
+                + Value(MIN_VOTES * overall_average, output_field=FloatField())
+            )
+            / Cast(F("ratings_count") + MIN_VOTES, FloatField())
+        )
+        .values("score")[:1]
+    )
+    Post.objects.update(
+        adjusted_score=Coalesce(Subquery(score), Value(0.0), output_field=FloatField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_post_adjusted_score"),
+        ("ratings", "0002_postratingstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlatformRatingStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "overall_average",
+                    models.FloatField(default=3.5, verbose_name="Promedio general"),
+                ),
+                (
+                    "ratings_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Cantidad de valoraciones"),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Fecha de cálculo"),
+                ),
+            ],
+            options={
+                "verbose_name": "Estadística general de valoraciones",
+                "verbose_name_plural": "Estadísticas generales de valoraciones",
+            },
+        ),
+        migrations.RunPython(compute_adjusted_scores, migrations.RunPython.noop),
+    ]
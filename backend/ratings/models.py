@@ -1,4 +1,9 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 from django.utils import timezone
@@ -11,6 +16,15 @@ from users.models import AppUser
 
 
 class Rating(models.Model):
+    # Criterios evaluados en cada valoración (1-5 estrellas cada uno)
+    SCORE_FIELDS = [
+        "composition",
+        "clarity_focus",
+        "lighting",
+        "creativity",
+        "technical_adaptation",
+    ]
+
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -78,9 +92,51 @@ class Rating(models.Model):
         if not self.post.allows_ratings:
             raise ValidationError("Esta publicación no permite valoraciones.")
 
+    def _get_scores(self):
+        return {field: getattr(self, field) for field in self.SCORE_FIELDS}
+
+    def _lock_stored_scores(self):
+        """
+        Lee las puntuaciones guardadas bloqueando la fila hasta el fin de la transacción,
+        para que dos cambios simultáneos sobre la misma valoración no calculen su delta
+        contra los mismos valores anteriores.
+        """
+        return Rating.objects.select_for_update().values(*self.SCORE_FIELDS).get(pk=self.pk)
+
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            creating = self._state.adding
+
+            if creating:
+                previous_scores = {field: 0 for field in self.SCORE_FIELDS}
+            else:
+                previous_scores = self._lock_stored_scores()
+
+            super().save(*args, **kwargs)
+
+            current_scores = self._get_scores()
+            PostRatingStats.apply_change(
+                self.post_id,
+                {
+                    field: current_scores[field] - previous_scores[field]
+                    for field in self.SCORE_FIELDS
+                },
+                count_delta=1 if creating else 0,
+            )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Descontar lo guardado, no lo que se leyó antes de otro cambio simultáneo
+            try:
+                stored_scores = self._lock_stored_scores()
+            except Rating.DoesNotExist:
+                # Otra petición ya la eliminó y descontó
+                return 0, {}
+            for field, value in stored_scores.items():
+                setattr(self, field, value)
+            return super().delete(*args, **kwargs)
 
     def get_average_score(self):
         """Calcula la puntuación promedio de esta valoración individual"""
@@ -95,46 +151,247 @@ class Rating(models.Model):
 
     @classmethod
     def get_post_averages(cls, post):
-        """Calcula los promedios de todos los ratings de un post"""
+        """
+        Devuelve los promedios de todos los ratings de un post.
+        Se leen de la fila agregada `PostRatingStats` (una sola consulta) en lugar de
+        recorrer la tabla de valoraciones.
+        """
+        stats = PostRatingStats.objects.filter(post=post).first()
 
-        # Obtener todas las valoraciones de la foto
-        ratings = cls.objects.filter(post=post)
-
-        if not ratings.exists():
+        if stats is None or stats.ratings_count == 0:
             return None  # No hay valoraciones
 
-        # Calcula promedios eficientemente
-        averages = ratings.aggregate(
-            avg_composition=models.Avg("composition"),
-            avg_clarity_focus=models.Avg("clarity_focus"),
-            avg_lighting=models.Avg("lighting"),
-            avg_creativity=models.Avg("creativity"),
-            avg_technical_adaptation=models.Avg("technical_adaptation"),
+        return stats.as_averages()
+
+    def __str__(self):
+        return f"{self.rater.username} - {self.post} - Valoración"
+
+
+class PostRatingStats(models.Model):
+    """
+    Agregado desnormalizado de las valoraciones de un post.
+
+    Guarda la suma de cada criterio, la cantidad de votos y el promedio general, y
+    se mantiene al día en cada alta, edición o baja de `Rating`, de forma que los
+    promedios y el feed ordenado por valoración leen una sola fila por post.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rating_stats",
+        verbose_name="Publicación",
+    )
+
+    ratings_count = models.PositiveIntegerField(default=0, verbose_name="Cantidad de valoraciones")
+
+    composition_sum = models.PositiveIntegerField(default=0, verbose_name="Suma de composición")
+    clarity_focus_sum = models.PositiveIntegerField(
+        default=0, verbose_name="Suma de claridad y enfoque"
+    )
+    lighting_sum = models.PositiveIntegerField(default=0, verbose_name="Suma de iluminación")
+    creativity_sum = models.PositiveIntegerField(default=0, verbose_name="Suma de creatividad")
+    technical_adaptation_sum = models.PositiveIntegerField(
+        default=0, verbose_name="Suma de adaptación técnica"
+    )
+
+    # Promedio general de todos los criterios. Nulo si el post no tiene valoraciones.
+    overall_average = models.FloatField(null=True, blank=True, verbose_name="Promedio general")
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
+
+    # M: Mínimo de valoraciones requeridas para "confiar" en el promedio de un post
+    MIN_VOTES = 10
+
+    class Meta:
+        verbose_name = "Estadística de valoraciones"
+        verbose_name_plural = "Estadísticas de valoraciones"
+
+    @staticmethod
+    def sum_field(score_field):
+        return f"{score_field}_sum"
+
+    @classmethod
+    def apply_change(cls, post_id, score_deltas, count_delta):
+        """
+        Aplica de forma atómica un cambio sobre el agregado de un post.
+
+        Args:
+            post_id: ID del post valorado.
+            score_deltas (dict): Diferencia a sumar para cada criterio.
+            count_delta (int): +1 al crear, -1 al eliminar, 0 al editar.
+        """
+        with transaction.atomic():
+            updated = cls._update_with_delta(post_id, score_deltas, count_delta)
+
+            if updated or count_delta <= 0:
+                # Si no existe la fila en una baja (p. ej. borrado en cascada del
+                # post), no hay nada que descontar.
+                if updated:
+                    cls.refresh_adjusted_scores(Post.objects.filter(pk=post_id))
+                return
+
+            values = {cls.sum_field(field): delta for field, delta in score_deltas.items()}
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        post_id=post_id,
+                        ratings_count=count_delta,
+                        overall_average=sum(score_deltas.values())
+                        / (len(Rating.SCORE_FIELDS) * count_delta),
+                        **values,
+                    )
+            except IntegrityError:
+                # Otra petición creó la fila en paralelo: aplicar el delta sobre ella
+                cls._update_with_delta(post_id, score_deltas, count_delta)
+
+            cls.refresh_adjusted_scores(Post.objects.filter(pk=post_id))
+
+    @classmethod
+    def adjusted_score_expression(cls, overall_average):
+        """
+        Media Ponderada Regularizada (Bayesiana) calculada sobre las columnas del agregado.
+        Prioriza los posts con más votos, evitando que los posts con pocas valoraciones
+        aparezcan por encima de los posts con muchas valoraciones y un buen promedio.
+
+        Fórmula: adjusted_score = ((V * R) + (M * C)) / (V + M)
+            - V (ratings_count): Número de valoraciones del post.
+            - R: Promedio simple del post. V * R equivale a la suma total / 5.
+            - M (MIN_VOTES): Mínimo de valoraciones requeridas para "confiar" en el promedio.
+            - C: Promedio general de la plataforma (ver PlatformRatingStats).
+        """
+        total = sum((F(cls.sum_field(field)) for field in Rating.SCORE_FIELDS), Value(0))
+        weighted_votes = Cast(total, FloatField()) / len(Rating.SCORE_FIELDS)  # V * R
+        prior = Value(cls.MIN_VOTES * overall_average, output_field=FloatField())  # M * C
+        return (weighted_votes + prior) / Cast(F("ratings_count") + cls.MIN_VOTES, FloatField())
+
+    @classmethod
+    def refresh_adjusted_scores(cls, posts, overall_average=None):
+        """
+        Recalcula `Post.adjusted_score` para los posts indicados con un único UPDATE.
+        Los posts sin valoraciones quedan en 0 para ubicarse al final del feed.
+        """
+        if overall_average is None:
+            overall_average = PlatformRatingStats.get_overall_average()
+
+        score = (
+            cls.objects.filter(post_id=OuterRef("pk"), ratings_count__gt=0)
+            .annotate(score=cls.adjusted_score_expression(overall_average))
+            .values("score")[:1]
+        )
+        return posts.update(
+            adjusted_score=Coalesce(Subquery(score), Value(0.0), output_field=FloatField())
         )
 
-        # Calcular promedio general de todos los aspectos
-        overall = (
-            sum(
-                [
-                    averages["avg_composition"],
-                    averages["avg_clarity_focus"],
-                    averages["avg_lighting"],
-                    averages["avg_creativity"],
-                    averages["avg_technical_adaptation"],
-                ]
-            )
-            / 5
+    @classmethod
+    def _update_with_delta(cls, post_id, score_deltas, count_delta):
+        new_count = F("ratings_count") + count_delta
+        new_total = sum((F(cls.sum_field(field)) for field in Rating.SCORE_FIELDS), Value(0)) + sum(
+            score_deltas.values()
         )
 
-        return {
-            "composition": round(averages["avg_composition"], 2),
-            "clarity_focus": round(averages["avg_clarity_focus"], 2),
-            "lighting": round(averages["avg_lighting"], 2),
-            "creativity": round(averages["avg_creativity"], 2),
-            "technical_adaptation": round(averages["avg_technical_adaptation"], 2),
-            "overall": round(overall, 2),
-            "total_ratings": ratings.count(),
+        updates = {
+            cls.sum_field(field): F(cls.sum_field(field)) + delta
+            for field, delta in score_deltas.items()
+        }
+        # En un UPDATE, las referencias F() leen los valores previos de la fila, por
+        # eso el promedio se calcula con los deltas ya incluidos.
+        updates["overall_average"] = Case(
+            When(ratings_count__lte=-count_delta, then=Value(None)),
+            default=Cast(new_total, FloatField())
+            / Cast(new_count * len(Rating.SCORE_FIELDS), FloatField()),
+            output_field=FloatField(),
+        )
+        updates["ratings_count"] = new_count
+        updates["updated_at"] = timezone.now()
+
+        return cls.objects.filter(post_id=post_id).update(**updates)
+
+    def as_averages(self):
+        """Devuelve los promedios por criterio con el formato del endpoint de promedios"""
+        averages = {
+            field: round(getattr(self, self.sum_field(field)) / self.ratings_count, 2)
+            for field in Rating.SCORE_FIELDS
         }
+        averages["overall"] = round(self.overall_average, 2)
+        averages["total_ratings"] = self.ratings_count
+        return averages
 
     def __str__(self):
-        return f"{self.rater.username} - {self.post} - Valoración"
+        return f"Estadísticas de valoración de {self.post}"
+
+
+class PlatformRatingStats(models.Model):
+    """
+    Promedio general de valoraciones de la plataforma (C en la media bayesiana).
+
+    Es una fila única que recalcula periódicamente el comando
+    `manage.py recompute_rating_scores` a partir de los agregados de cada post.
+    """
+
+    # C por defecto mientras no se haya calculado el promedio real
+    DEFAULT_OVERALL_AVERAGE = 3.5
+    CACHE_KEY = "ratings:platform_overall_average"
+    CACHE_TIMEOUT = 60 * 60
+
+    overall_average = models.FloatField(
+        default=DEFAULT_OVERALL_AVERAGE, verbose_name="Promedio general"
+    )
+    ratings_count = models.PositiveIntegerField(default=0, verbose_name="Cantidad de valoraciones")
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de cálculo")
+
+    class Meta:
+        verbose_name = "Estadística general de valoraciones"
+        verbose_name_plural = "Estadísticas generales de valoraciones"
+
+    @classmethod
+    def get_overall_average(cls):
+        """Devuelve C desde la caché, o desde la base de datos si no está cacheado"""
+        overall_average = cache.get(cls.CACHE_KEY)
+        if overall_average is None:
+            stats = cls.objects.filter(pk=1).first()
+            overall_average = stats.overall_average if stats else cls.DEFAULT_OVERALL_AVERAGE
+            cache.set(cls.CACHE_KEY, overall_average, cls.CACHE_TIMEOUT)
+        return overall_average
+
+    @classmethod
+    def recompute(cls):
+        """Recalcula el promedio real de la plataforma y lo guarda en la fila única"""
+        totals = PostRatingStats.objects.aggregate(
+            ratings_count=Sum("ratings_count"),
+            **{
+                PostRatingStats.sum_field(field): Sum(PostRatingStats.sum_field(field))
+                for field in Rating.SCORE_FIELDS
+            },
+        )
+        ratings_count = totals.pop("ratings_count") or 0
+
+        if ratings_count:
+            overall_average = sum(totals.values()) / (len(Rating.SCORE_FIELDS) * ratings_count)
+        else:
+            overall_average = cls.DEFAULT_OVERALL_AVERAGE
+
+        stats, _ = cls.objects.update_or_create(
+            pk=1,
+            defaults={"overall_average": overall_average, "ratings_count": ratings_count},
+        )
+        cache.set(cls.CACHE_KEY, stats.overall_average, cls.CACHE_TIMEOUT)
+        return stats
+
+    def __str__(self):
+        return f"Promedio general: {self.overall_average:.2f} ({self.ratings_count} valoraciones)"
+
+
+@receiver(post_delete, sender=Rating)
+def discount_deleted_rating(sender, instance, **kwargs):
+    """
+    Descuenta la valoración eliminada del agregado del post.
+    Se usa una señal para cubrir también los borrados en cascada (p. ej. al eliminar
+    un usuario).
+    """
+    PostRatingStats.apply_change(
+        instance.post_id,
+        {field: -getattr(instance, field) for field in Rating.SCORE_FIELDS},
+        count_delta=-1,
+    )
@@ -1,3 +1,176 @@
-from django.test import TestCase
+import datetime
+import io
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts.models import Category, Post
+from users.models import AppUser
+
+from .models import PlatformRatingStats, PostRatingStats, Rating
+
+# Hasher rápido para no demorar la creación de usuarios
+TEST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+TEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def create_user(username):
+    return AppUser.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password4567",
+        date_of_birth=datetime.date(2000, 1, 1),
+    )
+
+
+def scores(value):
+    return {field: value for field in Rating.SCORE_FIELDS}
+
+
+@override_settings(PASSWORD_HASHERS=TEST_PASSWORD_HASHERS)
+class RatingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("autor")
+        cls.raters = [create_user(f"valorador{i}") for i in range(3)]
+        cls.category = Category.objects.create(name="Paisaje", slug="paisaje")
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.author, image="posts/foto.jpg", category=self.category
+        )
+
+    def rate(self, rater, value):
+        return Rating.objects.create(post=self.post, rater=rater, **scores(value))
+
+    def assertStatsMatchRatings(self):
+        """El agregado coincide con lo que se obtiene sumando la tabla de valoraciones"""
+        ratings = list(Rating.objects.filter(post=self.post).values(*Rating.SCORE_FIELDS))
+        stats = PostRatingStats.objects.get(post=self.post)
+        self.assertEqual(stats.ratings_count, len(ratings))
+        for field in Rating.SCORE_FIELDS:
+            self.assertEqual(
+                getattr(stats, PostRatingStats.sum_field(field)),
+                sum(rating[field] for rating in ratings),
+            )
+        if ratings:
+            total = sum(sum(rating.values()) for rating in ratings)
+            self.assertAlmostEqual(
+                stats.overall_average, total / (len(Rating.SCORE_FIELDS) * len(ratings))
+            )
+        else:
+            self.assertIsNone(stats.overall_average)
+        return stats
+
+
+class PostRatingStatsTests(RatingTestCase):
+    def test_create_update_and_delete_keep_aggregate(self):
+        first = self.rate(self.raters[0], 4)
+        self.rate(self.raters[1], 2)
+        self.assertEqual(self.assertStatsMatchRatings().ratings_count, 2)
+
+        first.lighting = 1
+        first.save()
+        self.assertStatsMatchRatings()
+
+        first.delete()
+        self.assertEqual(self.assertStatsMatchRatings().ratings_count, 1)
+
+    def test_update_from_stale_instance(self):
+        # Dos instancias leídas antes de que cualquiera de las dos guarde
+        rating = self.rate(self.raters[0], 3)
+        stale, fresh = Rating.objects.get(pk=rating.pk), Rating.objects.get(pk=rating.pk)
+
+        for field in Rating.SCORE_FIELDS:
+            setattr(fresh, field, 5)
+        fresh.save()
+        for field in Rating.SCORE_FIELDS:
+            setattr(stale, field, 1)
+        stale.save()
+
+        stats = self.assertStatsMatchRatings()
+        self.assertEqual(stats.composition_sum, 1)
+
+    def test_delete_from_stale_instance(self):
+        rating = self.rate(self.raters[0], 3)
+        stale = Rating.objects.get(pk=rating.pk)
+        rating.composition = 5
+        rating.save()
+
+        stale.delete()
+        self.assertStatsMatchRatings()
+        # Eliminarla otra vez no descuenta dos veces
+        rating.delete()
+        self.assertStatsMatchRatings()
+
+    def test_cascade_delete_discounts_rating(self):
+        self.rate(self.raters[0], 4)
+        self.rate(self.raters[1], 2)
+
+        self.raters[1].delete()
+        stats = self.assertStatsMatchRatings()
+        self.assertEqual(stats.composition_sum, 4)
+
+
+class AdjustedScoreTests(RatingTestCase):
+    def expected_score(self, values, overall_average):
+        """Media bayesiana: ((V * R) + (M * C)) / (V + M)"""
+        votes = len(values)
+        prior = PostRatingStats.MIN_VOTES
+        return (sum(values) + prior * overall_average) / (votes + prior)
+
+    def adjusted_score(self):
+        return Post.objects.values_list("adjusted_score", flat=True).get(pk=self.post.pk)
+
+    def test_adjusted_score_follows_ratings(self):
+        overall_average = PlatformRatingStats.get_overall_average()
+        self.assertEqual(self.adjusted_score(), 0)
+
+        first = self.rate(self.raters[0], 5)
+        self.rate(self.raters[1], 3)
+        self.assertAlmostEqual(self.adjusted_score(), self.expected_score([5, 3], overall_average))
+
+        for field in Rating.SCORE_FIELDS:
+            setattr(first, field, 1)
+        first.save()
+        self.assertAlmostEqual(self.adjusted_score(), self.expected_score([1, 3], overall_average))
+
+        Rating.objects.filter(post=self.post).delete()
+        self.assertEqual(self.adjusted_score(), 0)
+
+    def test_recompute_updates_platform_average_and_scores(self):
+        self.rate(self.raters[0], 5)
+        self.rate(self.raters[1], 4)
+        other = Post.objects.create(
+            author=self.author, image="posts/otra.jpg", category=self.category
+        )
+
+        call_command("recompute_rating_scores", batch_size=1, stdout=io.StringIO())
+
+        self.assertAlmostEqual(PlatformRatingStats.get_overall_average(), 4.5)
+        self.assertAlmostEqual(self.adjusted_score(), self.expected_score([5, 4], 4.5))
+        self.assertEqual(Post.objects.get(pk=other.pk).adjusted_score, 0)
+
+    def test_sort_by_rating_uses_adjusted_score(self):
+        other = Post.objects.create(
+            author=self.author, image="posts/otra.jpg", category=self.category
+        )
+        for rater in self.raters:
+            self.rate(rater, 5)
+        Rating.objects.create(post=other, rater=self.raters[0], **scores(5))
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with override_settings(STORAGES=TEST_STORAGES):
+            response = client.get("/api/posts/?sort=rating")
+        # Con más votos del mismo promedio la media bayesiana es mayor: el post más
+        # antiguo queda primero
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]], [self.post.pk, other.pk]
+        )
@@ -0,0 +1,92 @@
+"""
+Benchmark del preprocesamiento de imágenes antes de enviarlas al modelo de
+descripciones (PostImageService.encode_for_model).
+
+Compara el envío de los bytes originales con el envío de la imagen reducida y
+recodificada, usando un modelo local simulado cuya latencia es una base fija más el
+tiempo de subir el payload con un ancho de banda dado.
+
+Uso (desde backend/):
+    python scripts/bench_description_payload.py [--base-ms 300] [--uplink-mbps 20]
+"""
+
+import argparse
+import io
+import time
+
+from bench_utils import measure, print_row, setup_django
+
+
+class StubModel:
+    """Modelo simulado: latencia = base + bytes / ancho de banda de subida"""
+
+    def __init__(self, base_ms, uplink_mbps):
+        self.base = base_ms / 1000
+        self.bytes_per_second = uplink_mbps * 1_000_000 / 8
+
+    def generate_content(self, parts):
+        payload = parts[0]["data"]
+        time.sleep(self.base + len(payload) / self.bytes_per_second)
+        return '{"contenido_generado": {}}'
+
+
+def build_photo(width, height, image_format, quality=95):
+    """Genera una imagen con ruido y degradado, que comprime como una foto real"""
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    image = Image.blend(noise, gradient, 0.5)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+def run(base_ms, uplink_mbps, repeat):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    from posts.services import PostImageService
+    from utils.image_validation import validate_image_file
+
+    model = StubModel(base_ms, uplink_mbps)
+    cases = [
+        ("JPEG 4000x3000", build_photo(4000, 3000, "JPEG")),
+        ("JPEG 2048x1536", build_photo(2048, 1536, "JPEG")),
+        ("PNG 1600x1200", build_photo(1600, 1200, "PNG")),
+        ("WebP 3000x2000", build_photo(3000, 2000, "WEBP")),
+    ]
+
+    for label, content in cases:
+        metadata, error = validate_image_file(SimpleUploadedFile("foto", content), max_size_mb=50)
+        assert metadata, error
+
+        def send_original():
+            model.generate_content([{"mime_type": metadata.mime_type, "data": metadata.data}])
+
+        def send_prepared():
+            mime_type, data = PostImageService.encode_for_model(metadata)
+            model.generate_content([{"mime_type": mime_type, "data": data}])
+
+        _, prepared = PostImageService.encode_for_model(metadata)
+        started = time.perf_counter()
+        PostImageService.encode_for_model(metadata)
+        encode_ms = (time.perf_counter() - started) * 1000
+
+        print(
+            f"{label}: {len(content) / 1024:.0f} KiB -> {len(prepared) / 1024:.0f} KiB "
+            f"({len(content) / len(prepared):.1f}x menos), preprocesado {encode_ms:.1f}ms"
+        )
+        print_row("  original", measure(send_original, repeat=repeat))
+        print_row("  reducida", measure(send_prepared, repeat=repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-ms", type=float, default=300)
+    parser.add_argument("--uplink-mbps", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.base_ms, args.uplink_mbps, args.repeat)
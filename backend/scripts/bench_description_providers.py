@@ -0,0 +1,144 @@
+"""
+Benchmark de carga de las sugerencias de descripción sin red.
+
+Ejecuta peticiones concurrentes contra un proveedor StubDescriptionProvider envuelto
+en CachedDescriptionProvider, pasando por el mismo limitador de concurrencia y
+timeout que la vista asíncrona (posts/async_views.py). Las imágenes se repiten con
+una distribución sesgada, como cuando los usuarios reintentan con la misma foto.
+
+Uso (desde backend/):
+    python scripts/bench_description_providers.py --requests 500 --concurrency 32 \\
+        --distinct 100 --latency 0.3 --jitter 0.2 --failure-rate 0.05 --timeout 0.45
+
+Informa throughput, latencias, timeouts, rechazos del limitador, fallos y tasa de
+aciertos de la caché.
+"""
+
+import argparse
+import asyncio
+import io
+import random
+import statistics
+import time
+
+from bench_utils import setup_django, test_database
+
+
+def build_images(count):
+    """Genera `count` imágenes PNG distintas ya validadas"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    from utils.image_validation import validate_post_image
+
+    images = []
+    for index in range(count):
+        buffer = io.BytesIO()
+        Image.new("RGB", (320, 240), (index % 256, index // 256, 128)).save(buffer, "PNG")
+        metadata, error = validate_post_image(SimpleUploadedFile("foto.png", buffer.getvalue()))
+        assert metadata, error
+        images.append(metadata)
+    return images
+
+
+async def run_load(provider, images, total, concurrency, seed):
+    from posts.async_views import LimiterBusy, get_async_setting, limiter
+
+    rng = random.Random(seed)
+    # Distribución sesgada: pocas imágenes concentran la mayoría de las peticiones
+    weights = [1 / (rank + 1) for rank in range(len(images))]
+    queue = asyncio.Queue()
+    for image in rng.choices(images, weights=weights, k=total):
+        queue.put_nowait(image)
+
+    results = {"ok": 0, "timeout": 0, "busy": 0, "failed": 0}
+    latencies = []
+
+    async def client():
+        while not queue.empty():
+            metadata = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with limiter.slot():
+                    await asyncio.wait_for(
+                        provider.asuggest(metadata), get_async_setting("TIMEOUT")
+                    )
+                results["ok"] += 1
+                latencies.append(time.perf_counter() - started)
+            except LimiterBusy:
+                results["busy"] += 1
+            except asyncio.TimeoutError:
+                results["timeout"] += 1
+            except Exception:
+                results["failed"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, latencies, time.perf_counter() - started
+
+
+def main(args):
+    from django.conf import settings
+
+    from posts.description_providers import build_description_provider
+
+    settings.DESCRIPTION_ASYNC = {
+        "MAX_CONCURRENCY": args.max_concurrency,
+        "QUEUE_TIMEOUT": args.queue_timeout,
+        "TIMEOUT": args.timeout,
+    }
+    provider = build_description_provider(
+        {
+            "BACKEND": "posts.description_providers.CachedDescriptionProvider",
+            "OPTIONS": {
+                "provider": {
+                    "BACKEND": "posts.description_providers.StubDescriptionProvider",
+                    "OPTIONS": {
+                        "latency": args.latency,
+                        "jitter": args.jitter,
+                        "failure_rate": args.failure_rate,
+                        "seed": args.seed,
+                    },
+                }
+            },
+        }
+    )
+
+    images = build_images(args.distinct)
+    results, latencies, elapsed = asyncio.run(
+        run_load(provider, images, args.requests, args.concurrency, args.seed)
+    )
+
+    lookups = provider.hits + provider.misses
+    print(f"{args.requests} peticiones en {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(
+        f"ok={results['ok']} timeout={results['timeout']} "
+        f"ocupado={results['busy']} fallidas={results['failed']}"
+    )
+    if latencies:
+        latencies.sort()
+        print(
+            f"latencia ok: mediana={statistics.median(latencies) * 1000:.1f}ms "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms"
+        )
+    if lookups:
+        print(f"caché: {provider.hits}/{lookups} aciertos ({provider.hits / lookups:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=0.45)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--queue-timeout", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        main(args)
@@ -0,0 +1,102 @@
+"""
+Benchmark del inicio de sesión (SingleSessionTokenObtainPairView) según el tamaño del
+historial de tokens del usuario.
+
+Uso (desde backend/):
+    python scripts/bench_login.py [--history 0 100 1000 10000] [--repeat 20]
+
+La latencia y la cantidad de consultas por login deberían mantenerse planas al
+crecer el historial: los tokens expirados o ya revocados no se vuelven a procesar.
+"""
+
+import argparse
+import datetime
+import uuid
+
+from bench_utils import measure, print_row, setup_django, test_database
+
+PASSWORD = "bench-password-123"
+
+
+def create_history(user, size):
+    """Crea `size` tokens históricos del usuario, ya expirados o revocados"""
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import (
+        BlacklistedToken,
+        OutstandingToken,
+    )
+
+    now = timezone.now()
+    tokens = OutstandingToken.objects.bulk_create(
+        [
+            OutstandingToken(
+                user=user,
+                jti=uuid.uuid4().hex,
+                token="historial",
+                created_at=now - datetime.timedelta(days=2),
+                # La mitad expirados y la otra mitad vigentes pero revocados
+                expires_at=now + datetime.timedelta(days=1 if i % 2 else -1),
+            )
+            for i in range(size)
+        ],
+        batch_size=1000,
+    )
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token=token) for token in tokens[1::2]], batch_size=1000
+    )
+
+
+def run(history_sizes, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    from users.models import AppUser
+
+    client = APIClient()
+
+    for size in history_sizes:
+        username = f"bench_{size}"
+        user = AppUser.objects.create_user(
+            username=username,
+            email=f"{username}@example.com",
+            password=PASSWORD,
+            date_of_birth=datetime.date(1990, 1, 1),
+        )
+        create_history(user, size)
+
+        def login():
+            response = client.post(
+                "/api/users/token/",
+                {"username": username, "password": PASSWORD},
+                format="json",
+            )
+            assert response.status_code == 200, response.content
+
+        login()
+        with CaptureQueriesContext(connection) as queries:
+            login()
+
+        result = measure(login, repeat=repeat)
+        total = OutstandingToken.objects.filter(user=user).count()
+        print_row(f"historial={size} ({total} filas)", result)
+        print(f"{'':<28} consultas por login={len(queries.captured_queries)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    # El hashing de contraseñas domina el tiempo de login; se usa uno rápido para
+    # medir solo el trabajo sobre los tokens.
+    from django.conf import settings
+
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+    with test_database():
+        run(args.history, args.repeat)
@@ -0,0 +1,165 @@
+"""
+Benchmark del costo por post de serializar una página del feed con URLs firmadas de
+GCS (imagen, derivadas y foto del autor).
+
+Las URLs se firman de verdad (V4, RSA-SHA256) con una cuenta de servicio generada
+localmente, sin acceso a la red. Compara:
+
+- "sin caché": como antes, un `url()` del storage por archivo y por objeto.
+- "caché fría": con utils/media_urls.py y las cachés vacías (primera request).
+- "caché caliente": con las URLs ya cacheadas (requests siguientes).
+
+Uso (desde backend/):
+    python scripts/bench_media_urls.py [--posts 20] [--authors 5] [--repeat 20]
+"""
+
+import argparse
+
+from bench_utils import measure, print_row, setup_django, test_database
+
+
+def build_signing_storage():
+    """LazyCredentialsGoogleCloudStorage con credenciales generadas en el momento"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from google.oauth2 import service_account
+
+    from utils.storage import LazyCredentialsGoogleCloudStorage
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    credentials = service_account.Credentials.from_service_account_info(
+        {
+            "type": "service_account",
+            "client_email": "bench@bench.iam.gserviceaccount.com",
+            "private_key": key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ).decode(),
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }
+    )
+    return LazyCredentialsGoogleCloudStorage(
+        bucket_name="bench", project_id="bench", credentials=credentials
+    )
+
+
+def build_legacy_serializer():
+    """PostSerializer con la resolución de URLs anterior: `url()` por archivo"""
+    from django.core.files.storage import default_storage
+    from rest_framework import serializers
+
+    from posts.serializers import AuthorSerializer, PostSerializer
+
+    class LegacyAuthorSerializer(serializers.ModelSerializer):
+        class Meta(AuthorSerializer.Meta):
+            pass
+
+    class LegacyPostSerializer(PostSerializer):
+        serializer_field_mapping = serializers.ModelSerializer.serializer_field_mapping
+        author = LegacyAuthorSerializer(read_only=True)
+
+        class Meta(PostSerializer.Meta):
+            list_serializer_class = serializers.ListSerializer
+
+        def get_image_srcset(self, obj):
+            return {
+                format_key: ", ".join(
+                    f"{default_storage.url(name)} {width}w" for width, name in sizes.items()
+                )
+                for format_key, sizes in (obj.derivatives or {}).items()
+            }
+
+    return LegacyPostSerializer
+
+
+def create_posts(count, authors):
+    from posts.models import Category, Post
+    from users.models import AppUser
+
+    category = Category.objects.create(name="Bench", slug="bench")
+    users = [
+        AppUser.objects.create(
+            username=f"bench{index}",
+            email=f"bench{index}@example.com",
+            date_of_birth="1990-01-01",
+            profile_pic=f"profiles/bench{index}.jpg",
+        )
+        for index in range(authors)
+    ]
+    Post.objects.bulk_create(
+        Post(
+            author=users[index % authors],
+            image=f"posts/bench{index}.jpg",
+            category=category,
+            allows_ratings=True,
+            derivatives={
+                image_format: {
+                    str(width): f"posts/bench{index}_{width}w.{extension}"
+                    for width in (320, 640, 1280)
+                }
+                for image_format, extension in (("webp", "webp"), ("jpeg", "jpg"))
+            },
+        )
+        for index in range(count)
+    )
+
+
+def clear_caches():
+    from django.core.cache import cache
+
+    from users.author_cards import author_card_cache
+    from utils.media_urls import media_url_cache
+
+    cache.clear()
+    media_url_cache.clear_local()
+    author_card_cache.clear_local()
+
+
+def run(posts, authors, repeat):
+    from django.core.files import storage
+
+    from posts.models import Post
+    from posts.serializers import PostSerializer
+
+    # Reemplazar el storage por defecto por uno que firma las URLs
+    storage.default_storage._wrapped = build_signing_storage()
+
+    create_posts(posts, authors)
+    page = list(PostSerializer.setup_eager_loading(Post.objects.all()))
+    legacy_serializer = build_legacy_serializer()
+
+    def serialize(serializer_class):
+        return serializer_class(page, many=True).data
+
+    assert len(serialize(legacy_serializer)) == len(serialize(PostSerializer)) == posts
+
+    def cold():
+        clear_caches()
+        serialize(PostSerializer)
+
+    results = [
+        ("sin caché", measure(lambda: serialize(legacy_serializer), repeat)),
+        ("caché fría", measure(cold, repeat)),
+        ("caché caliente", measure(lambda: serialize(PostSerializer), repeat)),
+    ]
+
+    print(f"Página de {posts} posts de {authors} autores (imagen + 6 derivadas + foto)")
+    for label, result in results:
+        print_row(f"{label} (página)", result)
+        print_row(
+            f"{label} (por post)",
+            {name: value / posts for name, value in result.items()},
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--authors", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.posts, args.authors, args.repeat)
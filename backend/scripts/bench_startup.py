@@ -0,0 +1,72 @@
+"""
+Benchmark del arranque: tiempo de importar la configuración y ejecutar
+`django.setup()`, y memoria residual (RSS) del proceso al terminar.
+
+Cada medición se hace en un proceso nuevo, como el arranque de un worker de gunicorn
+o de un comando de manage.py.
+
+Uso (desde backend/):
+    python scripts/bench_startup.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from bench_utils import BACKEND_DIR
+
+# Módulos pesados que no deberían cargarse durante el arranque
+HEAVY_MODULES = [
+    "google.generativeai",
+    "google.cloud.storage",
+    "google.oauth2.service_account",
+    "PIL.Image",
+]
+
+CHILD_SCRIPT = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+import django
+django.setup()
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    # ru_maxrss está en KiB en Linux
+    "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in %(modules)r if name in sys.modules],
+}))
+"""
+
+
+def measure_once():
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT % {"modules": HEAVY_MODULES}],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    # Una ejecución previa para que los .pyc ya existan y no se midan
+    measure_once()
+    results = [measure_once() for _ in range(args.runs)]
+
+    seconds = sorted(result["seconds"] * 1000 for result in results)
+    rss = sorted(result["rss_mib"] for result in results)
+    print(
+        f"django.setup(): mediana={statistics.median(seconds):.1f}ms "
+        f"min={seconds[0]:.1f}ms max={seconds[-1]:.1f}ms"
+    )
+    print(f"RSS máximo: mediana={statistics.median(rss):.1f}MiB")
+    print(f"Módulos pesados cargados: {', '.join(results[-1]['loaded']) or 'ninguno'}")
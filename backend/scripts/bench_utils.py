@@ -0,0 +1,72 @@
+"""
+Utilidades compartidas por los benchmarks de `scripts/`.
+
+Los benchmarks se ejecutan desde `backend/`, por ejemplo:
+    python scripts/bench_login.py
+
+Cada benchmark usa una base de datos de test creada a partir de la configuración
+actual (igual que `manage.py test`) y la destruye al terminar.
+"""
+
+import math
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    """Configura Django para poder usar los modelos desde un script"""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Crea una base de datos de test, la deja activa durante el bloque y la destruye"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=20):
+    """
+    Ejecuta `func` `repeat` veces y devuelve los tiempos en milisegundos.
+
+    Returns:
+        dict: mediana, p95 y máximo
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        "median": statistics.median(timings),
+        "p95": timings[max(0, math.ceil(len(timings) * 0.95) - 1)],
+        "max": timings[-1],
+    }
+
+
+def print_row(label, result):
+    print(
+        f"{label:<28} mediana={result['median']:8.2f}ms "
+        f"p95={result['p95']:8.2f}ms max={result['max']:8.2f}ms"
+    )
@@ -4,15 +4,19 @@ Autenticación personalizada que verifica la blacklist de tokens.
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.token_blacklist.models import (
-    BlacklistedToken,
-    OutstandingToken,
-)
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from .token_cache import TOKEN_MISSING, TOKEN_REVOKED, TOKEN_VALID, revocation_cache
+from .tokens import is_current_token_version, token_versions_enabled
 
 
 class BlacklistCheckingJWTAuthentication(JWTAuthentication):
     """
     Autenticación JWT personalizada que verifica si el token está en la blacklist.
+    El estado de cada token se cachea por `jti` (ver `users.token_cache`), por lo que
+    en régimen estable la verificación no consulta la base de datos.
+    Con JWT_REVOCATION_MODE = "version" se compara en cambio la versión de tokens del
+    usuario (ver `users.tokens`).
     """
 
     def get_validated_token(self, raw_token):
@@ -22,17 +26,38 @@ class BlacklistCheckingJWTAuthentication(JWTAuthentication):
         # Primero validar el token normalmente
         validated_token = super().get_validated_token(raw_token)
 
-        # Verificar si el token está en la blacklist usando el método correcto
+        if token_versions_enabled():
+            # Modo "version": el token es válido si su versión es la vigente del usuario
+            if not is_current_token_version(validated_token):
+                raise InvalidToken("Token has been revoked")
+            return validated_token
+
         jti = validated_token.get("jti")
         if jti:
-            try:
-                # Buscar el token en OutstandingToken
-                outstanding_token = OutstandingToken.objects.get(jti=jti)
-                # Verificar si está en la blacklist
-                if BlacklistedToken.objects.filter(token=outstanding_token).exists():
-                    raise InvalidToken("Token has been revoked")
-            except OutstandingToken.DoesNotExist:
+            token_state = revocation_cache.get(jti)
+
+            if token_state is None:
+                token_state = self._get_token_state(jti)
+                revocation_cache.set_state(jti, token_state, validated_token["exp"])
+
+            if token_state == TOKEN_REVOKED:
+                raise InvalidToken("Token has been revoked")
+            if token_state == TOKEN_MISSING:
                 # Si no existe en OutstandingToken, también es inválido
                 raise InvalidToken("Token not found")
 
         return validated_token
+
+    def _get_token_state(self, jti):
+        """
+        Obtiene el estado del token desde la base de datos con una sola consulta
+        (OutstandingToken + LEFT JOIN a BlacklistedToken).
+        """
+        rows = list(
+            OutstandingToken.objects.filter(jti=jti).values_list("blacklistedtoken__id", flat=True)
+        )
+        if not rows:
+            return TOKEN_MISSING
+        if rows[0] is not None:
+            return TOKEN_REVOKED
+        return TOKEN_VALID
@@ -0,0 +1,98 @@
+"""
+Caché de las "tarjetas de autor" ({id, username, profile_pic}) que se anidan en posts,
+comentarios y notificaciones.
+
+Resolver la URL de la foto de perfil en GCS implica firmarla, así que la tarjeta se
+guarda ya armada (con la URL resuelta) en una `TwoTierCache` indexada por ID de
+usuario. Los listados piden todas las tarjetas de la página con una sola lectura
+(`get_author_cards`) y solo arman las que faltan.
+
+La clave incluye `CARD_VERSION`: al cambiar el formato de la tarjeta se sube la
+versión y las entradas anteriores dejan de leerse. Al editar el usuario o su foto de
+perfil se invalida su tarjeta con `invalidate_author_card`.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.media_urls import media_url_ttl, resolve_media_url
+from utils.two_tier_cache import TwoTierCache
+
+CARD_VERSION = 1
+
+DEFAULT_SETTINGS = {
+    "TTL": 60 * 60,
+    "LOCAL_TTL": 60,
+    "LOCAL_MAXSIZE": 10000,
+    "KEY_PREFIX": "author_card",
+}
+
+
+def get_author_cards_setting(name):
+    return getattr(settings, "AUTHOR_CARDS", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def card_ttl():
+    """
+    Vida de una tarjeta en segundos. Nunca supera la de las URLs cacheadas, así que la
+    URL firmada que contiene la tarjeta sigue vigente mientras ésta se usa.
+    """
+    return min(get_author_cards_setting("TTL"), media_url_ttl())
+
+
+def render_author_card(user):
+    """Arma la tarjeta de un usuario (mismos campos que AuthorSerializer)"""
+    return {
+        "id": user.pk,
+        "username": user.username,
+        "profile_pic": resolve_media_url(user.profile_pic.name),
+    }
+
+
+class AuthorCardCache(TwoTierCache):
+    """
+    Tarjetas de autor ya armadas, indexadas por ID de usuario.
+    """
+
+    def __init__(self):
+        super().__init__(
+            key_prefix=f"{get_author_cards_setting('KEY_PREFIX')}:v{CARD_VERSION}",
+            local_maxsize=get_author_cards_setting("LOCAL_MAXSIZE"),
+            local_ttl=get_author_cards_setting("LOCAL_TTL"),
+        )
+
+    def get_cards(self, users):
+        """
+        Devuelve {id: tarjeta} de los usuarios recibidos. Las tarjetas que no están en
+        caché se arman a partir de las instancias y se guardan con una sola escritura.
+
+        Args:
+            users: Instancias de AppUser (con id, username y profile_pic cargados)
+        """
+        users = {user.pk: user for user in users if user is not None}
+        cards = self.get_many(users)
+
+        missing = {user_id: user for user_id, user in users.items() if user_id not in cards}
+        if missing:
+            expires_at = time.time() + card_ttl()
+            rendered = {user_id: render_author_card(user) for user_id, user in missing.items()}
+            self.set_many({user_id: (card, expires_at) for user_id, card in rendered.items()})
+            cards.update(rendered)
+        return cards
+
+
+author_card_cache = AuthorCardCache()
+
+
+def get_author_cards(users):
+    return author_card_cache.get_cards(users)
+
+
+def invalidate_author_card(user_id):
+    """
+    Invalida la tarjeta de un usuario al confirmarse la transacción, para que una
+    lectura concurrente no vuelva a guardar los datos anteriores.
+    """
+    transaction.on_commit(lambda: author_card_cache.delete(user_id))
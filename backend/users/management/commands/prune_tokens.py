@@ -0,0 +1,96 @@
+"""
+Elimina los tokens JWT expirados de OutstandingToken y BlacklistedToken.
+
+Un token expirado ya no pasa la validación de "exp", por lo que sus filas no se
+necesitan. El borrado se hace por lotes cortos (una transacción por lote) con una
+pausa entre lotes, para poder ejecutarlo con tráfico:
+    python manage.py prune_tokens --batch-size 1000 --sleep 0.1
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Elimina por lotes los tokens JWT expirados y sus entradas en la blacklist."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de tokens eliminados por lote (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Segundos de pausa entre lotes (por defecto 0.1).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Cantidad máxima de lotes a procesar (por defecto, todos).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa cuántos tokens se eliminarían.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        # Fijar el corte al inicio para que la ejecución termine aunque sigan expirando tokens
+        cutoff = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Se eliminarían {expired.count()} tokens expirados")
+            return
+
+        started = time.monotonic()
+        total_outstanding = 0
+        total_blacklisted = 0
+        batches = 0
+        last_id = 0
+
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            batch_started = time.monotonic()
+            ids = list(
+                expired.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                blacklisted, _ = BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                outstanding, _ = OutstandingToken.objects.filter(id__in=ids).delete()
+
+            batches += 1
+            last_id = ids[-1]
+            total_blacklisted += blacklisted
+            total_outstanding += outstanding
+            self.stdout.write(
+                f"Lote {batches}: {outstanding} tokens y {blacklisted} entradas de blacklist "
+                f"en {time.monotonic() - batch_started:.2f}s"
+            )
+
+            if len(ids) < batch_size:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_outstanding} tokens y {total_blacklisted} entradas de blacklist "
+                f"eliminados en {batches} lotes ({elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_alter_appuser_bio"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appuser",
+            name="token_version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Versión de tokens"
+            ),
+        ),
+    ]
@@ -2,9 +2,10 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
-from django.core.files.storage import default_storage
 import logging
 
+from core.storage_deletions import schedule_deletion
+
 logger = logging.getLogger("users")
 
 
@@ -66,6 +67,14 @@ class AppUser(AbstractUser):
         help_text="Opcional. Biografía del usuario.",
     )
 
+    # Versión de los tokens JWT del usuario. Con JWT_REVOCATION_MODE = "version",
+    # incrementarla revoca de una sola vez todas las sesiones emitidas antes.
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Versión de tokens",
+    )
+
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email", "date_of_birth"]
 
@@ -92,15 +101,8 @@ class AppUser(AbstractUser):
 @receiver(pre_delete, sender=AppUser)
 def delete_user_profile_pic(sender, instance, **kwargs):
     """
-    Signal para eliminar la foto de perfil del usuario cuando se elimina el usuario
+    Signal para eliminar la foto de perfil del usuario cuando se elimina el usuario.
+    La foto se agrega a la cola de eliminación del storage (ver core/storage_deletions.py)
     """
     if instance.profile_pic:
-        try:
-            # Borrar usando el storage backend
-            if default_storage.exists(instance.profile_pic.name):
-                default_storage.delete(instance.profile_pic.name)
-                logger.info(f"Foto de perfil eliminada del storage: {instance.profile_pic.name}")
-        except Exception as e:
-            logger.error(
-                f"Error al eliminar la foto de perfil {instance.profile_pic.name}: {str(e)}"
-            )
+        schedule_deletion(instance.profile_pic.name)
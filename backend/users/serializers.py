@@ -5,10 +5,21 @@ from datetime import date
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 from email_validator import validate_email, EmailNotValidError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from api.settings import AUTH_PASSWORD_VALIDATORS
-
-
-class UserSerializer(serializers.ModelSerializer):
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .tokens import (
+    TOKEN_VERSION_CLAIM,
+    VersionedRefreshToken,
+    rotate_token_version,
+    token_versions_enabled,
+)
+from utils.media_urls import MediaURLSerializerMixin
+
+
+class UserSerializer(MediaURLSerializerMixin, serializers.ModelSerializer):
     # Campo "password" para escritura, pero no para lectura
     # write_only=True -> el campo solo se usa para la entrada (crear/actualizar)
     # no se incluye en la respuesta JSON al leer un usuario
@@ -115,7 +126,7 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(MediaURLSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AppUser
         fields = ["id", "username", "profile_pic", "first_name", "last_name", "bio"]
@@ -162,3 +173,33 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
         instance.save()
         return instance
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh de tokens que respeta JWT_REVOCATION_MODE (ver users/tokens.py).
+    """
+
+    token_class = VersionedRefreshToken
+
+    def validate(self, attrs):
+        if not (token_versions_enabled() and api_settings.ROTATE_REFRESH_TOKENS):
+            return super().validate(attrs)
+
+        # Verifica firma, expiración y que la versión del token sea la vigente
+        refresh = self.token_class(attrs["refresh"])
+
+        user = AppUser.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+
+        # Rotación: el refresh token usado (y su access token) dejan de ser válidos
+        version = rotate_token_version(user.pk, refresh[TOKEN_VERSION_CLAIM])
+        if version is None:
+            raise InvalidToken("Token has been revoked")
+        user.token_version = version
+
+        new_refresh = self.token_class.for_user(user)
+        return {"access": str(new_refresh.access_token), "refresh": str(new_refresh)}
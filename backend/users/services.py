@@ -1,5 +1,6 @@
 import logging
-from django.core.files.storage import default_storage
+from core.storage_deletions import schedule_deletion
+from .author_cards import invalidate_author_card
 
 logger = logging.getLogger("users")
 
@@ -12,28 +13,24 @@ class ProfilePhotoService:
     @staticmethod
     def delete_old_profile_photo(photo_field):
         """
-        Elimina la foto de perfil anterior del storage si existe.
+        Agrega la foto de perfil anterior a la cola de eliminación del storage
+        (ver core/storage_deletions.py). El archivo se elimina fuera de la request.
 
         Args:
             photo_field: El campo ImageField del modelo AppUser.
 
         Returns:
-            bool: True si se eliminó correctamente, False en caso contrario.
+            bool: True si se encoló correctamente, False en caso contrario.
         """
         if not photo_field:
             return True
 
         try:
-            # Verificar si el archivo existe en el storage
-            if default_storage.exists(photo_field.name):
-                default_storage.delete(photo_field.name)
-                logger.info(f"Foto de perfil anterior eliminada del storage: {photo_field.name}")
-                return True
-            else:
-                logger.warning(f"Foto de perfil no encontrada en storage: {photo_field.name}")
-                return True
+            schedule_deletion(photo_field.name)
+            logger.info(f"Foto de perfil anterior encolada para eliminar: {photo_field.name}")
+            return True
         except Exception as e:
-            logger.error(f"Error al eliminar la foto de perfil {photo_field.name}: {str(e)}")
+            logger.error(f"Error al encolar la foto de perfil {photo_field.name}: {str(e)}")
             return False
 
     @staticmethod
@@ -59,6 +56,7 @@ class ProfilePhotoService:
             # Actualizar el campo con la nueva foto
             user_instance.profile_pic = new_photo
             user_instance.save()
+            invalidate_author_card(user_instance.pk)
 
             logger.info(f"Foto de perfil actualizada para usuario {user_instance.username}")
             return True
@@ -91,6 +89,7 @@ class ProfilePhotoService:
             # Establecer el campo como None/Null
             user_instance.profile_pic = None
             user_instance.save()
+            invalidate_author_card(user_instance.pk)
 
             logger.info(f"Foto de perfil eliminada para usuario {user_instance.username}")
             return True
@@ -1,3 +1,223 @@
-from django.test import TestCase
+import datetime
+import io
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import AppUser
+from .token_cache import TOKEN_VALID, revocation_cache
+
+# Hasher rápido para no demorar la creación de usuarios
+TEST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+PASSWORD = "password4567"
+
+
+@override_settings(PASSWORD_HASHERS=TEST_PASSWORD_HASHERS)
+class TokenRevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = AppUser.objects.create_user(
+            username="ana",
+            email="ana@example.com",
+            password=PASSWORD,
+            date_of_birth=datetime.date(2000, 1, 1),
+        )
+
+    def setUp(self):
+        cache.clear()
+        revocation_cache.clear_local()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            "/api/users/token/", {"username": "ana", "password": PASSWORD}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_me(self, access):
+        return self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_login_revokes_previous_tokens(self):
+        first = self.login()
+        self.assertEqual(self.get_me(first["access"]).status_code, 200)
+
+        second = self.login()
+        self.assertEqual(self.get_me(first["access"]).status_code, 401)
+        self.assertEqual(self.get_me(second["access"]).status_code, 200)
+
+    def test_logout_revokes_refresh_token(self):
+        tokens = self.login()
+        response = self.client.post(
+            "/api/users/logout/",
+            {"refresh": tokens["refresh"]},
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+        )
+        self.assertEqual(response.status_code, 205)
+
+        response = self.client.post(
+            "/api/users/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_revocation_by_another_process_with_process_local_cache(self):
+        # Con LocMemCache la revocación de otro proceso no llega a esta caché: el
+        # estado válido cacheado tiene que vencer a los LOCAL_TTL segundos
+        tokens = self.login()
+        self.assertEqual(self.get_me(tokens["access"]).status_code, 200)
+
+        jti = AccessToken(tokens["access"])["jti"]
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        revocation_cache.clear_local()
+
+        later = time.time() + revocation_cache.local_ttl + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(self.get_me(tokens["access"]).status_code, 401)
+
+    def test_valid_state_lives_until_expiry_with_shared_cache(self):
+        caches = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": tempfile.mkdtemp(),
+            }
+        }
+        with override_settings(CACHES=caches):
+            tokens = self.login()
+            self.assertEqual(self.get_me(tokens["access"]).status_code, 200)
+
+            token = AccessToken(tokens["access"])
+            state, expires_at = cache.get(revocation_cache._shared_key(token["jti"]))
+            self.assertEqual(state, TOKEN_VALID)
+            self.assertEqual(expires_at, token["exp"])
+
+
+@override_settings(PASSWORD_HASHERS=TEST_PASSWORD_HASHERS, JWT_REVOCATION_MODE="version")
+class TokenVersionRefreshTests(TestCase):
+    def setUp(self):
+        AppUser.objects.create_user(
+            username="ana",
+            email="ana@example.com",
+            password=PASSWORD,
+            date_of_birth=datetime.date(2000, 1, 1),
+        )
+        cache.clear()
+        self.client = APIClient()
+
+    def test_refresh_token_cannot_be_reused(self):
+        tokens = self.client.post(
+            "/api/users/token/", {"username": "ana", "password": PASSWORD}, format="json"
+        ).data
+
+        response = self.client.post(
+            "/api/users/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("refresh", response.data)
+
+        response = self.client.post(
+            "/api/users/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=TEST_PASSWORD_HASHERS)
+class LoginTokenWriteTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create_user(
+            username="ana",
+            email="ana@example.com",
+            password=PASSWORD,
+            date_of_birth=datetime.date(2000, 1, 1),
+        )
+        cache.clear()
+        revocation_cache.clear_local()
+        self.client = APIClient()
+
+    def login(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/api/users/token/", {"username": "ana", "password": PASSWORD}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query["sql"] for query in context.captured_queries]
+
+    def count_inserts(self, queries, table):
+        # SQLite escribe los bulk_create con ignore_conflicts como INSERT OR IGNORE
+        return sum(query.startswith("INSERT") and f'INTO "{table}"' in query for query in queries)
+
+    def test_login_registers_both_tokens_with_one_insert(self):
+        tokens, queries = self.login()
+
+        self.assertEqual(self.count_inserts(queries, "token_blacklist_outstandingtoken"), 1)
+        self.assertEqual(
+            set(OutstandingToken.objects.filter(user=self.user).values_list("jti", flat=True)),
+            {AccessToken(tokens["access"])["jti"], RefreshToken(tokens["refresh"])["jti"]},
+        )
+
+    def test_login_blacklists_previous_tokens_with_one_insert(self):
+        self.login()
+        _, queries = self.login()
+
+        self.assertEqual(self.count_inserts(queries, "token_blacklist_outstandingtoken"), 1)
+        self.assertEqual(self.count_inserts(queries, "token_blacklist_blacklistedtoken"), 1)
+        self.assertEqual(OutstandingToken.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.user).count(), 2)
+
+
+@override_settings(PASSWORD_HASHERS=TEST_PASSWORD_HASHERS)
+class PruneTokensTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = AppUser.objects.create_user(
+            username="ana",
+            email="ana@example.com",
+            password=PASSWORD,
+            date_of_birth=datetime.date(2000, 1, 1),
+        )
+
+    def create_token(self, jti, hours):
+        return OutstandingToken.objects.create(
+            user=self.user,
+            jti=jti,
+            token=jti,
+            expires_at=timezone.now() + datetime.timedelta(hours=hours),
+        )
+
+    def prune(self, **options):
+        call_command("prune_tokens", sleep=0, stdout=io.StringIO(), **options)
+        return set(OutstandingToken.objects.values_list("jti", flat=True))
+
+    def test_prunes_expired_tokens_and_blacklist_entries(self):
+        expired = [self.create_token(f"vencido{i}", -1) for i in range(3)]
+        BlacklistedToken.objects.create(token=expired[0])
+        valid = self.create_token("vigente", 1)
+        BlacklistedToken.objects.create(token=valid)
+
+        self.assertEqual(self.prune(batch_size=2), {"vigente"})
+        self.assertEqual(list(BlacklistedToken.objects.values_list("token", flat=True)), [valid.pk])
+
+    def test_max_batches_limits_the_run(self):
+        for i in range(3):
+            self.create_token(f"vencido{i}", -1)
+
+        self.assertEqual(self.prune(batch_size=1, max_batches=2), {"vencido2"})
+
+    def test_dry_run_deletes_nothing(self):
+        self.create_token("vencido", -1)
+        stdout = io.StringIO()
+
+        call_command("prune_tokens", dry_run=True, stdout=stdout)
+
+        self.assertIn("Se eliminarían 1 tokens expirados", stdout.getvalue())
+        self.assertTrue(OutstandingToken.objects.filter(jti="vencido").exists())
@@ -0,0 +1,108 @@
+"""
+Caché del estado de revocación de los tokens JWT.
+
+`BlacklistCheckingJWTAuthentication` consulta el estado de cada token en cada
+petición autenticada. Para no ir a la base de datos cada vez, el estado se guarda en
+dos niveles:
+
+1. Un LRU local al proceso, con TTL corto (`LOCAL_TTL`), que nunca supera la vida
+   restante del token.
+2. La caché compartida de Django (`CACHES`), válida hasta que el token expira.
+
+Las revocaciones (logout, inicio de sesión único) escriben el nuevo estado en ambos
+niveles. Otros procesos lo ven como máximo `LOCAL_TTL` segundos más tarde.
+
+Si la caché de Django es local a cada proceso (LocMemCache en desarrollo), un token
+válido se cachea como máximo `LOCAL_TTL` segundos, porque la revocación escrita por
+otro proceso nunca llegaría.
+"""
+
+import time
+
+from django.conf import settings
+
+from utils.two_tier_cache import TwoTierCache, shared_cache_is_process_local
+
+# Estados posibles de un token
+TOKEN_VALID = "valid"
+TOKEN_REVOKED = "revoked"
+TOKEN_MISSING = "missing"
+
+DEFAULT_SETTINGS = {
+    "LOCAL_MAXSIZE": 10000,
+    "LOCAL_TTL": 30,
+    "KEY_PREFIX": "jwt:revocation",
+    "VERSION_KEY_PREFIX": "jwt:token_version",
+    "VERSION_TTL": 60 * 60,
+}
+
+
+def get_cache_setting(name):
+    return getattr(settings, "JWT_REVOCATION_CACHE", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class TokenRevocationCache(TwoTierCache):
+    """
+    Estado de revocación de los tokens, indexado por `jti`.
+    """
+
+    def __init__(self):
+        super().__init__(
+            key_prefix=get_cache_setting("KEY_PREFIX"),
+            local_maxsize=get_cache_setting("LOCAL_MAXSIZE"),
+            local_ttl=get_cache_setting("LOCAL_TTL"),
+        )
+
+    def set_state(self, jti, state, expires_at):
+        """Cachea el estado de un token leído de la base, como máximo hasta que expire"""
+        if state == TOKEN_VALID and shared_cache_is_process_local():
+            expires_at = min(expires_at, time.time() + self.local_ttl)
+        self.set(jti, state, expires_at)
+
+    def revoke(self, jti, expires_at):
+        """Marca un token como revocado hasta que expire"""
+        self.set(jti, TOKEN_REVOKED, expires_at)
+
+    def revoke_many(self, tokens):
+        """
+        Marca varios tokens como revocados.
+
+        Args:
+            tokens: Iterable de tuplas (jti, expires_at) con expires_at en epoch
+        """
+        self.set_many({jti: (TOKEN_REVOKED, expires_at) for jti, expires_at in tokens})
+
+
+class TokenVersionCache(TwoTierCache):
+    """
+    Versión de tokens vigente de cada usuario (`AppUser.token_version`), indexada por ID.
+    Se usa con JWT_REVOCATION_MODE = "version".
+    """
+
+    def __init__(self):
+        super().__init__(
+            key_prefix=get_cache_setting("VERSION_KEY_PREFIX"),
+            local_maxsize=get_cache_setting("LOCAL_MAXSIZE"),
+            local_ttl=get_cache_setting("LOCAL_TTL"),
+        )
+        self.version_ttl = get_cache_setting("VERSION_TTL")
+
+    def get_version(self, user_id):
+        """Devuelve la versión vigente, o None si el usuario no existe"""
+        version = self.get(user_id)
+        if version is None:
+            from .models import AppUser
+
+            version = (
+                AppUser.objects.filter(pk=user_id).values_list("token_version", flat=True).first()
+            )
+            if version is not None:
+                self.set_version(user_id, version)
+        return version
+
+    def set_version(self, user_id, version):
+        self.set(user_id, version, time.time() + self.version_ttl)
+
+
+revocation_cache = TokenRevocationCache()
+token_version_cache = TokenVersionCache()
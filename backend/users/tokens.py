@@ -0,0 +1,102 @@
+"""
+Tokens JWT con versión por usuario.
+
+Con `JWT_REVOCATION_MODE = "version"` cada token lleva el claim `token_version` y es
+válido solo mientras coincida con `AppUser.token_version`. Revocar todas las sesiones
+de un usuario es un único UPDATE, y ni la autenticación ni el refresh usan las tablas
+OutstandingToken/BlacklistedToken.
+
+En ese modo cada usuario tiene una única sesión, y la rotación del refresh token
+(ROTATE_REFRESH_TOKENS) también incrementa la versión: el refresh token usado deja de
+ser válido en lugar de pasar a la blacklist (ver `rotate_token_version`).
+"""
+
+from django.conf import settings
+from django.db.models import F
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from .token_cache import token_version_cache
+
+TOKEN_VERSION_CLAIM = "token_version"
+
+
+def token_versions_enabled():
+    return getattr(settings, "JWT_REVOCATION_MODE", "blacklist") == "version"
+
+
+def is_current_token_version(token):
+    """Indica si el claim de versión del token coincide con la versión vigente del usuario"""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    version = token.get(TOKEN_VERSION_CLAIM)
+    return version is not None and version == token_version_cache.get_version(user_id)
+
+
+def revoke_all_sessions(user):
+    """
+    Revoca todas las sesiones del usuario incrementando su versión de tokens.
+
+    Returns:
+        int: La nueva versión de tokens del usuario
+    """
+    from .models import AppUser
+
+    AppUser.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    user.refresh_from_db(fields=["token_version"])
+    token_version_cache.set_version(user.pk, user.token_version)
+    return user.token_version
+
+
+def rotate_token_version(user_id, version):
+    """
+    Incrementa la versión de tokens del usuario solo si sigue siendo `version`, con un
+    UPDATE condicionado: de dos refresh simultáneos con el mismo token gana uno solo.
+
+    Returns:
+        int: La nueva versión, o None si `version` ya no era la vigente
+    """
+    from .models import AppUser
+
+    updated = AppUser.objects.filter(pk=user_id, token_version=version).update(
+        token_version=F("token_version") + 1
+    )
+    if not updated:
+        return None
+    token_version_cache.set_version(user_id, version + 1)
+    return version + 1
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    RefreshToken que incluye la versión de tokens del usuario.
+    En modo "version" reemplaza la blacklist por la comparación de versiones.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        # Saltear BlacklistMixin.for_user, que registra el token en OutstandingToken con
+        # un INSERT propio: en modo "blacklist" el login registra refresh y access en un
+        # único bulk_create (ver SingleSessionTokenObtainPairView)
+        token = super(BlacklistMixin, cls).for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+    def check_blacklist(self):
+        if not token_versions_enabled():
+            return super().check_blacklist()
+
+        if not is_current_token_version(self):
+            raise TokenError("Token has been revoked")
+
+    def blacklist(self):
+        if not token_versions_enabled():
+            return super().blacklist()
+        # En modo "version" la rotación revoca el token incrementando la versión
+        # (ver VersionedTokenRefreshSerializer)
+        return None
+
+    def outstand(self):
+        if not token_versions_enabled():
+            return super().outstand()
+        return None
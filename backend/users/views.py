@@ -3,17 +3,21 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.token_blacklist.models import (
     OutstandingToken,
     BlacklistedToken,
 )
 from django.contrib.auth import authenticate
+from django.utils import timezone
 from .serializers import UserSerializer, UserProfileSerializer
+from .author_cards import invalidate_author_card
 from .models import AppUser
+from .token_cache import revocation_cache
+from .tokens import VersionedRefreshToken, revoke_all_sessions, token_versions_enabled
 
 import logging
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -109,15 +113,21 @@ class SingleSessionTokenObtainPairView(TokenObtainPairView):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
-        # Invalidar todos los tokens anteriores del usuario
-        self._invalidate_user_tokens(user)
+        if token_versions_enabled():
+            # Invalidar todas las sesiones anteriores con un único UPDATE
+            revoke_all_sessions(user)
+            refresh = VersionedRefreshToken.for_user(user)
+            access = refresh.access_token
+        else:
+            # Invalidar todos los tokens anteriores del usuario
+            self._invalidate_user_tokens(user)
 
-        # Generar nuevos tokens
-        refresh = RefreshToken.for_user(user)
-        access = refresh.access_token
+            # Generar nuevos tokens
+            refresh = VersionedRefreshToken.for_user(user)
+            access = refresh.access_token
 
-        # Guardar tokens en OutstandingToken manualmente
-        self._save_tokens_to_outstanding(user, refresh, access)
+            # Guardar tokens en OutstandingToken manualmente
+            self._save_tokens_to_outstanding(user, refresh, access)
 
         return Response(
             {
@@ -130,14 +140,31 @@ class SingleSessionTokenObtainPairView(TokenObtainPairView):
     def _invalidate_user_tokens(self, user):
         """
         Invalida todos los tokens activos del usuario agregándolos a la blacklist.
+        Solo considera tokens sin expirar y aún no revocados, y los revoca con un único
+        INSERT, de forma que el costo no crece con el historial de sesiones del usuario.
         """
         try:
-            # Obtener todos los tokens pendientes del usuario
-            outstanding_tokens = OutstandingToken.objects.filter(user=user)
+            # Obtener los tokens del usuario que todavía pueden usarse
+            outstanding_tokens = list(
+                OutstandingToken.objects.filter(
+                    user=user,
+                    expires_at__gt=timezone.now(),
+                    blacklistedtoken__isnull=True,
+                ).only("id", "jti", "expires_at")
+            )
+            if not outstanding_tokens:
+                return
+
+            # Agregar todos los tokens a la blacklist en una sola consulta
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token=token) for token in outstanding_tokens],
+                ignore_conflicts=True,
+            )
 
-            # Agregar cada token a la blacklist
-            for token in outstanding_tokens:
-                BlacklistedToken.objects.get_or_create(token=token)
+            # Reflejar la revocación en la caché de autenticación
+            revocation_cache.revoke_many(
+                (token.jti, token.expires_at.timestamp()) for token in outstanding_tokens
+            )
 
         except Exception as e:
             logger.warning(f"Error al invalidar tokens del usuario {user.username}: {str(e)}")
@@ -145,39 +172,28 @@ class SingleSessionTokenObtainPairView(TokenObtainPairView):
     def _save_tokens_to_outstanding(self, user, refresh_token, access_token):
         """
         Guarda los tokens en OutstandingToken para poder hacer blacklist después.
+        Ambos se insertan en una sola consulta (`VersionedRefreshToken.for_user` no
+        registra el refresh token por su cuenta).
         """
         try:
-            from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
-            from django.utils import timezone
-
             # Convertir timestamps a datetime con zona horaria
             def timestamp_to_datetime(timestamp):
                 if timestamp:
-                    from datetime import datetime
-
                     return datetime.fromtimestamp(timestamp, tz=timezone.get_current_timezone())
                 return None
 
-            # Guardar refresh token
-            OutstandingToken.objects.get_or_create(
-                jti=refresh_token.get("jti"),
-                defaults={
-                    "user": user,
-                    "token": str(refresh_token),
-                    "created_at": timestamp_to_datetime(refresh_token.get("iat")),
-                    "expires_at": timestamp_to_datetime(refresh_token.get("exp")),
-                },
-            )
-
-            # Guardar access token
-            OutstandingToken.objects.get_or_create(
-                jti=access_token.get("jti"),
-                defaults={
-                    "user": user,
-                    "token": str(access_token),
-                    "created_at": timestamp_to_datetime(access_token.get("iat")),
-                    "expires_at": timestamp_to_datetime(access_token.get("exp")),
-                },
+            OutstandingToken.objects.bulk_create(
+                [
+                    OutstandingToken(
+                        user=user,
+                        jti=token.get("jti"),
+                        token=str(token),
+                        created_at=timestamp_to_datetime(token.get("iat")),
+                        expires_at=timestamp_to_datetime(token.get("exp")),
+                    )
+                    for token in (refresh_token, access_token)
+                ],
+                ignore_conflicts=True,
             )
 
         except Exception as e:
@@ -302,8 +318,12 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            token = VersionedRefreshToken(refresh_token)
+            if token_versions_enabled():
+                revoke_all_sessions(request.user)
+            else:
+                token.blacklist()
+                revocation_cache.revoke(token["jti"], token["exp"])
             return Response(
                 {"detail": "Sesión cerrada correctamente."},
                 status=status.HTTP_205_RESET_CONTENT,
@@ -523,6 +543,8 @@ class UpdateUserView(APIView):
             )
             if serializer.is_valid():
                 serializer.save()
+                # El nombre o la foto pueden haber cambiado (ver users/author_cards.py)
+                invalidate_author_card(user.pk)
                 return Response(
                     {"success": True, "data": serializer.data},
                     status=status.HTTP_200_OK,
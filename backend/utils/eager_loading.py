@@ -0,0 +1,47 @@
+"""
+Módulo de utilidades para preparar querysets antes de serializarlos.
+Cada serializer declara qué relaciones necesita y las vistas aplican esa declaración,
+evitando consultas N+1 al anidar serializers (autor, actor, content type, etc).
+"""
+
+
+class EagerLoadingMixin:
+    """
+    Mixin para serializers que declaran cómo debe prepararse su queryset.
+
+    Atributos:
+        select_related_fields: Relaciones ForeignKey/OneToOne a resolver con JOIN.
+        prefetch_related_fields: Relaciones inversas o ManyToMany a precargar.
+        only_fields: Columnas a cargar (vacío para cargar todas).
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    only_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Aplica select_related/prefetch_related/only al queryset según lo declarado.
+
+        Args:
+            queryset: QuerySet a preparar
+
+        Returns:
+            QuerySet: El queryset listo para ser serializado
+        """
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        if cls.only_fields:
+            queryset = queryset.only(*cls.only_fields)
+        return queryset
+
+
+def related_fields(relation, fields):
+    """
+    Devuelve los nombres de columnas de una relación para usar en `only_fields`.
+    Ejemplo: related_fields("author", ["id", "username"]) -> ["author__id", "author__username"]
+    """
+    return [f"{relation}__{field}" for field in fields]
@@ -1,13 +1,225 @@
 """
 Módulo de utilidades para validación de imágenes.
 Contiene funciones reutilizables para validar archivos de imagen en toda la aplicación.
+
+El formato se detecta por los bytes iniciales del archivo (no por el `content_type`
+que declara el cliente) y las dimensiones se leen solo de las cabeceras, sin
+decodificar la imagen. La validación devuelve un `ImageMetadata` con el contenido ya
+leído, para que las etapas siguientes (Gemini, derivadas, storage) no vuelvan a leer
+el archivo subido.
 """
 
-from PIL import Image
+import io
+import struct
+from dataclasses import dataclass
+
+# Límite de píxeles para rechazar "bombas de descompresión" antes de decodificar
+DEFAULT_MAX_PIXELS = 50_000_000
+
+# Formatos soportados: clave -> tipo MIME
+IMAGE_FORMATS = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+# Marcadores JPEG "Start Of Frame", que contienen las dimensiones de la imagen
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+@dataclass(frozen=True)
+class ImageMetadata:
+    """
+    Datos de una imagen validada.
+
+    Atributos:
+        format: Clave del formato ("jpeg", "png" o "webp")
+        width: Ancho en píxeles
+        height: Alto en píxeles
+        data: Contenido completo del archivo
+    """
+
+    format: str
+    width: int
+    height: int
+    data: bytes
+
+    @property
+    def mime_type(self):
+        return IMAGE_FORMATS[self.format]
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    @property
+    def pixels(self):
+        return self.width * self.height
+
+    def open(self):
+        """Devuelve el contenido como archivo en memoria (p. ej. para Pillow)"""
+        return io.BytesIO(self.data)
+
+
+def sniff_image_format(header):
+    """
+    Detecta el formato de la imagen por sus bytes iniciales.
+
+    Returns:
+        str: "jpeg", "png" o "webp", o None si no es un formato soportado
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _png_dimensions(data):
+    # Firma (8 bytes) + longitud y tipo del chunk IHDR (8 bytes) + ancho + alto
+    if data[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", data[16:24])
+
+
+def _jpeg_dimensions(data):
+    offset = 2
+    length = len(data)
+    while offset + 4 <= length:
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        # Relleno entre marcadores
+        if marker == 0xFF:
+            offset += 1
+            continue
+        # Marcadores sin segmento (RSTn, TEM)
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            offset += 2
+            continue
+        # Fin de imagen o inicio de datos comprimidos sin haber encontrado un SOF
+        if marker in (0xD9, 0xDA):
+            return None
+
+        (segment_length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > length:
+                return None
+            height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+            return width, height
+        offset += 2 + segment_length
+    return None
+
+
+def _webp_dimensions(data):
+    chunk = data[12:16]
+    if chunk == b"VP8X":
+        # Ancho y alto - 1 en 24 bits little-endian
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    if chunk == b"VP8 ":
+        # Con pérdida: código de inicio 9d 01 2a y dimensiones en 14 bits
+        if data[23:26] != b"\x9d\x01\x2a":
+            return None
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        # Sin pérdida: firma 0x2f y ancho/alto - 1 en 14 bits cada uno
+        if data[20] != 0x2F:
+            return None
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def read_image_dimensions(data, image_format):
+    """
+    Lee las dimensiones de la imagen desde sus cabeceras, sin decodificarla.
+
+    Returns:
+        tuple: (ancho, alto), o None si las cabeceras no son válidas
+    """
+    readers = {
+        "jpeg": _jpeg_dimensions,
+        "png": _png_dimensions,
+        "webp": _webp_dimensions,
+    }
+    try:
+        return readers[image_format](data)
+    except (struct.error, IndexError):
+        return None
+
+
+def read_upload(image_file, max_bytes):
+    """
+    Lee el archivo subido una sola vez, sin superar `max_bytes` + 1 bytes.
+    Un archivo de más de `max_bytes` bytes se detecta por la longitud de lo leído.
+    """
+    image_file.seek(0)
+    data = image_file.read(max_bytes + 1)
+    image_file.seek(0)
+    return data
+
+
+def check_image_content(
+    header,
+    size,
+    max_size_mb=5,
+    min_width=100,
+    min_height=100,
+    allowed_formats=None,
+    max_pixels=DEFAULT_MAX_PIXELS,
+):
+    """
+    Valida una imagen a partir de sus primeros bytes y su tamaño total, sin necesidad
+    de tener el archivo completo (p. ej. un objeto ya subido al storage).
+
+    Args:
+        header (bytes): Primeros bytes del archivo (deben incluir las cabeceras)
+        size (int): Tamaño total del archivo en bytes
+        Resto de argumentos: ver `validate_image_file`
+
+    Returns:
+        tuple: ((formato, ancho, alto) or None, error_message: str or None)
+    """
+
+    if allowed_formats is None:
+        allowed_formats = ["image/jpeg", "image/png", "image/jpg", "image/webp"]
+
+    # Validar tamaño de la imagen
+    if size > max_size_mb * 1024 * 1024:
+        return None, f"El tamaño de la imagen no debe exceder los {max_size_mb}MB"
+
+    # Validar formato de la imagen por su contenido
+    image_format = sniff_image_format(header[:16])
+    if image_format is None or IMAGE_FORMATS[image_format] not in allowed_formats:
+        return None, "La imagen debe ser una foto válida (JPEG, PNG o WebP)"
+
+    # Validar dimensiones de la imagen
+    dimensions = read_image_dimensions(header, image_format)
+    if not dimensions:
+        return None, "Error al validar las dimensiones de la imagen"
+
+    width, height = dimensions
+    if width < min_width or height < min_height:
+        return None, f"La imagen debe tener al menos {min_width}x{min_height}px"
+
+    if width * height > max_pixels:
+        return None, "La imagen tiene demasiados píxeles"
+
+    return (image_format, width, height), None
 
 
 def validate_image_file(
-    image_file, max_size_mb=5, min_width=100, min_height=100, allowed_formats=None
+    image_file,
+    max_size_mb=5,
+    min_width=100,
+    min_height=100,
+    allowed_formats=None,
+    max_pixels=DEFAULT_MAX_PIXELS,
 ):
     """
     Valida el archivo de imagen según los requisitos especificados.
@@ -18,35 +230,32 @@ def validate_image_file(
         min_width (int): Ancho mínimo en píxeles (por defecto 100px)
         min_height (int): Alto mínimo en píxeles (por defecto 100px)
         allowed_formats (list): Lista de formatos permitidos (por defecto JPEG, PNG, WebP)
+        max_pixels (int): Cantidad máxima de píxeles (ancho x alto)
 
     Returns:
-        tuple: (is_valid: bool, error_message: str or None)
+        tuple: (metadata: ImageMetadata or None, error_message: str or None)
     """
 
-    if allowed_formats is None:
-        allowed_formats = ["image/jpeg", "image/png", "image/jpg", "image/webp"]
-
-    # Validar tamaño de la imagen
+    # Validar tamaño de la imagen antes de leerla
     max_size_bytes = max_size_mb * 1024 * 1024
-    if image_file.size > max_size_bytes:
-        return False, f"El tamaño de la imagen no debe exceder los {max_size_mb}MB"
-
-    # Validar formato de la imagen
-    if image_file.content_type not in allowed_formats:
-        return False, "La imagen debe ser una foto válida (JPEG, PNG o WebP)"
+    if image_file.size is not None and image_file.size > max_size_bytes:
+        return None, f"El tamaño de la imagen no debe exceder los {max_size_mb}MB"
 
-    # Validar dimensiones de la imagen
-    try:
-        with Image.open(image_file) as img:
-            if img.width < min_width or img.height < min_height:
-                return (
-                    False,
-                    f"La imagen debe tener al menos {min_width}x{min_height}px",
-                )
-    except Exception:
-        return False, "Error al validar las dimensiones de la imagen"
+    data = read_upload(image_file, max_size_bytes)
+    info, error_message = check_image_content(
+        data,
+        len(data),
+        max_size_mb=max_size_mb,
+        min_width=min_width,
+        min_height=min_height,
+        allowed_formats=allowed_formats,
+        max_pixels=max_pixels,
+    )
+    if not info:
+        return None, error_message
 
-    return True, None
+    image_format, width, height = info
+    return ImageMetadata(format=image_format, width=width, height=height, data=data), None
 
 
 def validate_profile_picture(image_file):
@@ -58,7 +267,7 @@ def validate_profile_picture(image_file):
         image_file: Archivo de imagen a validar
 
     Returns:
-        tuple: (is_valid: bool, error_message: str or None)
+        tuple: (metadata: ImageMetadata or None, error_message: str or None)
     """
     return validate_image_file(
         image_file,
@@ -69,6 +278,15 @@ def validate_profile_picture(image_file):
     )
 
 
+# Parámetros de las imágenes de publicaciones
+POST_IMAGE_LIMITS = {
+    "max_size_mb": 5,  # 5MB para imágenes de posts
+    "min_width": 100,  # Dimensiones mínimas estándar
+    "min_height": 100,
+    "allowed_formats": ["image/jpeg", "image/png", "image/jpg", "image/webp"],
+}
+
+
 def validate_post_image(image_file):
     """
     Valida específicamente una imagen de publicación.
@@ -78,12 +296,17 @@ def validate_post_image(image_file):
         image_file: Archivo de imagen a validar
 
     Returns:
-        tuple: (is_valid: bool, error_message: str or None)
+        tuple: (metadata: ImageMetadata or None, error_message: str or None)
     """
-    return validate_image_file(
-        image_file,
-        max_size_mb=5,  # 5MB para imágenes de posts
-        min_width=100,  # Dimensiones mínimas estándar
-        min_height=100,
-        allowed_formats=["image/jpeg", "image/png", "image/jpg", "image/webp"],
-    )
+    return validate_image_file(image_file, **POST_IMAGE_LIMITS)
+
+
+def validate_post_image_header(header, size):
+    """
+    Valida una imagen de publicación a partir de sus primeros bytes y su tamaño,
+    con los mismos parámetros que `validate_post_image`.
+
+    Returns:
+        tuple: ((formato, ancho, alto) or None, error_message: str or None)
+    """
+    return check_image_content(header, size, **POST_IMAGE_LIMITS)
@@ -0,0 +1,153 @@
+"""
+Módulo de utilidades para resolver las URLs de los archivos del storage.
+
+Con GCS y GS_QUERYSTRING_AUTH cada `url()` firma la URL, lo que cuesta CPU en cada
+objeto de cada respuesta. `resolve_media_url` memoriza las URLs en dos niveles:
+
+1. Un dict por serialización (`memo`), para los archivos que se repiten en una misma
+   respuesta (p. ej. la foto de un autor con varios posts en la página).
+2. Una `TwoTierCache` entre requests, cuyo TTL nunca supera la mitad de la vigencia
+   de las URLs firmadas, así que una URL cacheada siempre se entrega todavía válida.
+
+Los serializers usan `MediaURLField` (o `MediaURLSerializerMixin` para que los
+ImageField del modelo lo usen automáticamente).
+"""
+
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+from rest_framework import serializers
+
+from .two_tier_cache import TwoTierCache
+
+DEFAULT_SETTINGS = {
+    "TTL": 60 * 60,
+    "LOCAL_TTL": 5 * 60,
+    "LOCAL_MAXSIZE": 50000,
+    "KEY_PREFIX": "media_url",
+}
+
+# Clave del contexto de los serializers con las URLs ya resueltas en la respuesta
+MEDIA_URLS_CONTEXT_KEY = "media_urls"
+
+
+def get_media_urls_setting(name):
+    return getattr(settings, "MEDIA_URLS", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def media_url_ttl():
+    """
+    Vida máxima en segundos de una URL cacheada. Si el storage firma las URLs (GCS
+    con GS_QUERYSTRING_AUTH), se recorta a la mitad de su vigencia (GS_EXPIRATION).
+    """
+    ttl = get_media_urls_setting("TTL")
+    expiration = getattr(default_storage, "expiration", None)
+    if expiration and getattr(default_storage, "querystring_auth", False):
+        ttl = min(ttl, expiration.total_seconds() / 2)
+    return ttl
+
+
+class MediaURLCache(TwoTierCache):
+    """
+    URLs de los archivos del storage, indexadas por nombre de archivo.
+    """
+
+    def __init__(self):
+        super().__init__(
+            key_prefix=get_media_urls_setting("KEY_PREFIX"),
+            local_maxsize=get_media_urls_setting("LOCAL_MAXSIZE"),
+            local_ttl=get_media_urls_setting("LOCAL_TTL"),
+        )
+
+    def resolve_many(self, names, memo=None):
+        """
+        Devuelve {nombre: url}. Las URLs que no están cacheadas se piden al storage y
+        se guardan con una sola escritura.
+
+        Args:
+            names: Nombres de archivos del storage
+            memo (dict): URLs ya resueltas en la respuesta actual (se completa)
+        """
+        memo = {} if memo is None else memo
+        missing = [name for name in dict.fromkeys(names) if name and name not in memo]
+        if missing:
+            memo.update(self.get_many(missing))
+            unresolved = [name for name in missing if name not in memo]
+            if unresolved:
+                expires_at = time.time() + media_url_ttl()
+                urls = {name: default_storage.url(name) for name in unresolved}
+                self.set_many({name: (url, expires_at) for name, url in urls.items()})
+                memo.update(urls)
+        return {name: memo[name] for name in names if name}
+
+
+media_url_cache = MediaURLCache()
+
+
+def resolve_media_url(name, memo=None):
+    """Devuelve la URL de un archivo del storage, o None si `name` está vacío"""
+    if not name:
+        return None
+    return media_url_cache.resolve_many([name], memo)[name]
+
+
+def resolve_media_urls(names, memo=None):
+    return media_url_cache.resolve_many(names, memo)
+
+
+def get_media_urls_memo(context):
+    """Memo de URLs de una serialización, guardado en el contexto del serializer raíz"""
+    return context.setdefault(MEDIA_URLS_CONTEXT_KEY, {})
+
+
+class MediaURLField(serializers.ImageField):
+    """
+    ImageField que al serializar devuelve la URL memorizada del archivo.
+    La validación de los archivos subidos no cambia.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        url = resolve_media_url(value.name, get_media_urls_memo(self.context))
+        request = self.context.get("request", None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class MediaURLSerializerMixin:
+    # Mixin para ModelSerializers: los ImageField del modelo se serializan con
+    # MediaURLField. (Sin docstring: drf-spectacular la usaría como descripción del
+    # serializer en el esquema.)
+
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: MediaURLField,
+    }
+
+    def get_media_names(self, instance):
+        """Archivos cuya URL incluye la representación de `instance`"""
+        for field in self.fields.values():
+            if isinstance(field, MediaURLField) and not field.write_only:
+                value = field.get_attribute(instance)
+                if value:
+                    yield value.name
+
+
+class MediaURLListSerializer(serializers.ListSerializer):
+    """
+    Serializer de listas que resuelve con una sola lectura de caché las URLs de todos
+    los elementos (según `get_media_names` del serializer hijo) antes de serializarlos.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        get_media_names = getattr(self.child, "get_media_names", None)
+        if get_media_names is not None:
+            names = [name for item in items for name in get_media_names(item)]
+            resolve_media_urls(names, get_media_urls_memo(self.context))
+        return super().to_representation(items)
@@ -0,0 +1,99 @@
+"""
+Backend de almacenamiento en Google Cloud Storage que carga las credenciales de la
+cuenta de servicio en el primer uso, en lugar de al importar la configuración.
+"""
+
+from functools import lru_cache
+
+from django.utils.deconstruct import deconstructible
+from storages.backends.gcloud import GoogleCloudStorage
+from storages.utils import clean_name, setting
+
+
+@lru_cache(maxsize=None)
+def load_service_account_credentials(path):
+    """Lee las credenciales una sola vez por proceso"""
+    from google.oauth2 import service_account
+
+    return service_account.Credentials.from_service_account_file(path)
+
+
+@deconstructible
+class LazyCredentialsGoogleCloudStorage(GoogleCloudStorage):
+    """
+    GoogleCloudStorage con las credenciales leídas de GS_CREDENTIALS_FILE al crear el
+    cliente o firmar una URL por primera vez.
+    """
+
+    _credentials = None
+
+    def get_default_settings(self):
+        defaults = super().get_default_settings()
+        defaults["credentials_file"] = setting("GS_CREDENTIALS_FILE")
+        return defaults
+
+    @property
+    def credentials(self):
+        credentials_file = getattr(self, "credentials_file", None)
+        if self._credentials is None and credentials_file:
+            self._credentials = load_service_account_credentials(credentials_file)
+        return self._credentials
+
+    @credentials.setter
+    def credentials(self, value):
+        self._credentials = value
+
+    def generate_upload_url(self, name, content_type, max_size, expiration):
+        """
+        Genera una URL firmada (V4) para subir el objeto `name` con un PUT directo a GCS.
+
+        El cliente debe enviar los encabezados devueltos por `upload_headers`, que
+        forman parte de la firma (tipo de contenido y rango de tamaño permitido).
+
+        Args:
+            expiration (timedelta): Vigencia de la URL
+        """
+        blob = self.bucket.blob(self._normalize_name(clean_name(name)))
+        return blob.generate_signed_url(
+            version="v4",
+            method="PUT",
+            expiration=expiration,
+            content_type=content_type,
+            headers={"x-goog-content-length-range": f"0,{max_size}"},
+            credentials=self.credentials,
+        )
+
+    @staticmethod
+    def upload_headers(content_type, max_size):
+        return {
+            "Content-Type": content_type,
+            "x-goog-content-length-range": f"0,{max_size}",
+        }
+
+    def read_header(self, name, nbytes):
+        """Descarga solo los primeros `nbytes` bytes del objeto"""
+        blob = self.bucket.blob(self._normalize_name(clean_name(name)))
+        return blob.download_as_bytes(start=0, end=nbytes - 1)
+
+    def delete_many(self, names):
+        """
+        Elimina varios objetos con una sola petición batch de GCS (hasta 100 por lote).
+        Los objetos que ya no existen se consideran eliminados.
+
+        Returns:
+            dict: {nombre: error} de los objetos que no se pudieron eliminar
+        """
+        names = list(names)
+        if not names:
+            return {}
+
+        batch = self.client.batch(raise_exception=False)
+        with batch:
+            for name in names:
+                self.bucket.delete_blob(self._normalize_name(clean_name(name)))
+
+        failed = {}
+        for name, response in zip(names, batch._responses):
+            if not (200 <= response.status_code < 300 or response.status_code == 404):
+                failed[name] = f"HTTP {response.status_code}: {response.text[:200]}"
+        return failed
@@ -0,0 +1,63 @@
+"""
+Módulo de utilidades para tests.
+Permite fijar un presupuesto de consultas SQL por endpoint y comprobar que no crece
+con el tamaño de la página (detección de consultas N+1).
+"""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def query_budget(max_queries, using=DEFAULT_DB_ALIAS):
+    """
+    Context manager que falla si el bloque ejecuta más de `max_queries` consultas.
+
+    Args:
+        max_queries (int): Cantidad máxima de consultas permitidas
+        using (str): Alias de la base de datos a observar
+
+    Raises:
+        AssertionError: Si se supera el presupuesto, incluyendo el SQL ejecutado
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    if executed > max_queries:
+        queries = "\n".join(
+            f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f"Se ejecutaron {executed} consultas, el presupuesto es {max_queries}:\n{queries}"
+        )
+
+
+class QueryBudgetMixin:
+    """
+    Mixin para TestCase con aserciones sobre la cantidad de consultas por endpoint.
+    """
+
+    def assertQueryBudget(self, max_queries, func, *args, **kwargs):
+        """Ejecuta `func` y verifica que no supere `max_queries` consultas"""
+        with query_budget(max_queries):
+            return func(*args, **kwargs)
+
+    def assertEndpointQueryBudget(self, client, url, max_queries, page_sizes=(1, 10, 30)):
+        """
+        Hace GET a `url` con distintos `page_size` y verifica que todas las respuestas
+        respeten el mismo presupuesto de consultas, sin importar el tamaño de la página.
+
+        Returns:
+            list: Las respuestas obtenidas, en el orden de `page_sizes`
+        """
+        responses = []
+        separator = "&" if "?" in url else "?"
+        for page_size in page_sizes:
+            with query_budget(max_queries):
+                response = client.get(f"{url}{separator}page_size={page_size}")
+            self.assertEqual(response.status_code, 200, getattr(response, "data", None))
+            responses.append(response)
+        return responses
@@ -0,0 +1,129 @@
+"""
+Módulo de utilidades para cachear valores en dos niveles:
+
+1. Un LRU local al proceso, con TTL corto, que nunca supera la vida restante del valor.
+2. La caché compartida de Django (`CACHES`), válida hasta que el valor expira.
+"""
+
+import threading
+import time
+
+from cachetools import TLRUCache
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def shared_cache_is_process_local():
+    """
+    Indica si la caché "compartida" en realidad es local a cada proceso (LocMemCache, en
+    desarrollo o en producción sin CACHE_LOCATION): lo que un proceso escribe no lo ven
+    los demás.
+    """
+    return isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+class TwoTierCache:
+    """
+    Caché en dos niveles: LRU local con TTL por entrada + caché compartida de Django.
+
+    Cada valor se guarda junto con su instante de expiración (epoch), de forma que
+    al traerlo de la caché compartida el TTL local se recorta a la vida restante.
+    """
+
+    def __init__(self, key_prefix, local_maxsize, local_ttl):
+        self.key_prefix = key_prefix
+        self.local_ttl = local_ttl
+        # TLRUCache usa el reloj monotónico: ttu devuelve el instante de expiración local
+        self._local = TLRUCache(maxsize=local_maxsize, ttu=lambda _key, value, _now: value[1])
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key):
+        return f"{self.key_prefix}:{key}"
+
+    def _set_local(self, key, value, expires_at):
+        remaining = min(self.local_ttl, expires_at - time.time())
+        if remaining <= 0:
+            return
+        with self._lock:
+            self._local[key] = (value, time.monotonic() + remaining)
+
+    def get(self, key):
+        """Devuelve el valor cacheado o None si no está en ningún nivel"""
+        with self._lock:
+            entry = self._local.get(key)
+        if entry is not None:
+            return entry[0]
+
+        shared = cache.get(self._shared_key(key))
+        if shared is None:
+            return None
+
+        value, expires_at = shared
+        if expires_at <= time.time():
+            return None
+        self._set_local(key, value, expires_at)
+        return value
+
+    def get_many(self, keys):
+        """
+        Devuelve {clave: valor} de las claves cacheadas en algún nivel. Las que no están
+        en el LRU local se piden a la caché compartida con una sola lectura.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._local.get(key)
+                if entry is not None:
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+        if not missing:
+            return found
+
+        shared = cache.get_many([self._shared_key(key) for key in missing])
+        now = time.time()
+        for key in missing:
+            entry = shared.get(self._shared_key(key))
+            if entry is None or entry[1] <= now:
+                continue
+            value, expires_at = entry
+            self._set_local(key, value, expires_at)
+            found[key] = value
+        return found
+
+    def set(self, key, value, expires_at):
+        """Guarda `value` en ambos niveles hasta `expires_at` (epoch en segundos)"""
+        self.set_many({key: (value, expires_at)})
+
+    def set_many(self, entries):
+        """
+        Guarda varias entradas con una sola escritura en la caché compartida.
+
+        Args:
+            entries (dict): clave -> (valor, expires_at en epoch)
+        """
+        now = time.time()
+        entries = {key: entry for key, entry in entries.items() if entry[1] > now}
+        if not entries:
+            return
+
+        # Se usa el timeout de la entrada que más dura; las que vencen antes se
+        # descartan al leerlas (ver get).
+        timeout = int(max(expires_at for _, expires_at in entries.values()) - now) + 1
+        cache.set_many(
+            {self._shared_key(key): entry for key, entry in entries.items()},
+            timeout,
+        )
+        for key, (value, expires_at) in entries.items():
+            self._set_local(key, value, expires_at)
+
+    def delete(self, key):
+        cache.delete(self._shared_key(key))
+        with self._lock:
+            self._local.pop(key, None)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()